@@ -0,0 +1,215 @@
+"""
+动态单源最短路径：边变化后增量修复已经算好的最短路径树，而不是从头重新计算。
+
+思路来自 Ramalingam–Reps 的动态最短路径算法（以及 Dynamic-SWSF-FP）：
+一次边的变化只会影响一部分顶点的距离，只需要找出这些顶点并在它们之间重新运行 Dijkstra。
+
+- 插入边或降低边权 (u, v, w)：只有 dist[u] + w < dist[v] 时才有影响。此时从 v 开始做 Dijkstra 传播，
+  只有距离真正变小的顶点会被访问。
+- 删除边 (u, v)：如果它不是树边，所有距离都不变。否则受影响的恰好是树中 v 的子树（其他顶点的树路径
+  不经过这条边，而删边不会让距离变小）。先把子树中每个顶点的距离设为"从子树外的前驱进入"的最小值，
+  再只在子树内部做 Dijkstra 传播。
+
+每次修复返回访问过的顶点数，便于和重新计算整棵树（访问全部可达顶点）比较。
+边权必须非负。这里的顶点就是图的顶点标签，邻接关系通过回调读取，树始终跟随图的当前状态。
+"""
+from collections import OrderedDict
+from heapq import heappop, heappush
+
+INF = float('inf')
+
+
+class DynamicShortestPathTree:
+    """
+    可以增量修复的完整单源最短路径树。
+
+    参数：
+    - source: 源点。
+    - successors (callable): `successors(v)` 返回 v 的出边 `(后继, 权重)` 序列。
+    - predecessors (callable): `predecessors(v)` 返回 v 的入边 `(前驱, 权重)` 序列。
+
+    属性：
+    - dist (dict): 每个可达顶点的最短距离，不可达的顶点不在其中。
+    - parent (dict): 最短路径树中每个顶点的父顶点，源点为 None。
+    - built (int): 建树时访问的顶点数，也就是一次完整重新计算的代价。
+    """
+
+    def __init__(self, source, successors, predecessors):
+        self.source = source
+        self.dist = {source: 0.0}
+        self.parent = {source: None}
+        self._children = {source: set()}
+        self._successors = successors
+        self._predecessors = predecessors
+        self.built = self._propagate([(0.0, source)])
+
+    def _set_parent(self, v, u):
+        old = self.parent.get(v)
+        if old is not None:
+            self._children[old].discard(v)
+        self.parent[v] = u
+        self._children.setdefault(u, set()).add(v)
+
+    def _propagate(self, heap):
+        """从堆中的顶点出发做 Dijkstra 传播，返回出堆（访问）的顶点数。"""
+        dist = self.dist
+        done = set()
+        while heap:
+            d, u = heappop(heap)
+            if u in done or d > dist.get(u, INF):
+                continue
+            done.add(u)
+            for v, w in self._successors(u):
+                nd = d + w
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    self._set_parent(v, u)
+                    heappush(heap, (nd, v))
+        return len(done)
+
+    def insert_edge(self, u, v, weight):
+        """
+        边 (u, v) 被插入或权重降低到 weight 之后修复。
+
+        返回：
+        - 访问过的顶点数；这条边不缩短任何路径时为 0。
+        """
+        if weight < 0:
+            raise ValueError("Dijkstra requires non-negative edge weights.")
+        du = self.dist.get(u, INF)
+        if du + weight >= self.dist.get(v, INF):
+            return 0
+        self.dist[v] = du + weight
+        self._set_parent(v, u)
+        return self._propagate([(du + weight, v)])
+
+    def delete_edge(self, u, v):
+        """
+        边 (u, v) 被删除之后修复。调用时这条边必须已经不在图中。
+
+        返回：
+        - 访问过的顶点数；这条边不是树边时为 0。
+        """
+        if v == self.source or self.parent.get(v, self) != u:
+            return 0
+        affected = [v]
+        for x in affected:
+            affected.extend(self._children.get(x, ()))
+        inside = set(affected)
+        self._children[u].discard(v)
+        for x in affected:
+            del self.dist[x], self.parent[x]
+            self._children.pop(x, None)
+
+        dist, heap = self.dist, []
+        for x in affected:
+            best, via = INF, None
+            for p, w in self._predecessors(x):
+                if p not in inside and dist.get(p, INF) + w < best:
+                    best, via = dist[p] + w, p
+            if via is not None:
+                dist[x] = best
+                self._set_parent(x, via)
+                heappush(heap, (best, x))
+        self._propagate(heap)
+        return len(affected)
+
+    def path(self, target):
+        """
+        沿父指针回溯出从源点到目标顶点的路径。
+
+        返回：
+        - 顶点列表；不可达时返回空列表。
+        """
+        if target not in self.dist:
+            return []
+        path = []
+        while target is not None:
+            path.append(target)
+            target = self.parent[target]
+        path.reverse()
+        return path
+
+
+class DynamicShortestPathCache:
+    """
+    按源点缓存 `DynamicShortestPathTree` 的 LRU 缓存。与 `ShortestPathCache` 不同，
+    图的边变化后不丢弃缓存，而是调用 `apply` 修复其中的每一棵树。
+
+    参数：
+    - successors, predecessors (callable): 见 `DynamicShortestPathTree`。
+    - maxsize (int): 最多缓存的最短路径树数量。
+    """
+
+    def __init__(self, successors, predecessors, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.last_settled = 0
+        self.repairs = 0
+        self.touched = 0
+        self.recompute = 0
+        self._successors = successors
+        self._predecessors = predecessors
+        self._trees = OrderedDict()
+
+    def tree(self, source):
+        """获取（必要时新建）源点的最短路径树，并把它标记为最近使用。"""
+        tree = self._trees.get(source)
+        if tree is None:
+            self.misses += 1
+            tree = DynamicShortestPathTree(source, self._successors, self._predecessors)
+            self.last_settled = tree.built
+            self._trees[source] = tree
+            if len(self._trees) > self.maxsize:
+                self._trees.popitem(last=False)
+        else:
+            self.hits += 1
+            self.last_settled = 0
+            self._trees.move_to_end(source)
+        return tree
+
+    def query(self, source, target):
+        """
+        查询两个顶点之间的最短路径。新建树时访问的顶点数记录在 `last_settled` 中。
+
+        返回：
+        - `(距离, 顶点列表)`；不可达时返回 `(inf, [])`。
+        """
+        tree = self.tree(source)
+        return tree.dist.get(target, INF), tree.path(target)
+
+    def apply(self, added=(), removed=()):
+        """
+        边变化之后修复所有缓存的树。调用时图必须已经处于变化之后的状态。
+
+        参数：
+        - added: 插入（或权重降低）的有向边 `(src, dest, weight)` 列表。
+        - removed: 删除的有向边 `(src, dest, ...)` 列表。
+
+        返回：
+        - 每棵树每条边一条记录的列表，记录包含 source、edge、change（"insert" 或 "delete"）、
+          touched（本次修复访问的顶点数）和 recompute（从头重建这棵树需要访问的顶点数）。
+        """
+        records = []
+        changes = [("delete", u, v, None) for u, v, *_ in removed] + [("insert", u, v, w) for u, v, w in added]
+        for source, tree in self._trees.items():
+            for change, u, v, w in changes:
+                touched = tree.delete_edge(u, v) if change == "delete" else tree.insert_edge(u, v, w)
+                records.append({"source": source, "edge": (u, v), "change": change,
+                                "touched": touched, "recompute": len(tree.dist)})
+                self.touched += touched
+                self.recompute += len(tree.dist)
+        self.repairs += len(records)
+        return records
+
+    def info(self):
+        """
+        返回缓存和累计修复的统计信息。
+
+        返回：
+        - 一个包含 hits、misses、size、maxsize、repairs、touched、recompute 的字典；
+          touched 与 recompute 之比就是增量修复相对于完全重新计算的工作量。
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._trees), "maxsize": self.maxsize,
+                "repairs": self.repairs, "touched": self.touched, "recompute": self.recompute}
@@ -1,26 +1,35 @@
-import pickle
+import os
+
 from graph import generate_graph
 
+# 测试用图：文件名 -> generate_graph 的参数。
+# 两张图都由旧版生成器（legacy=True，基于 random 模块）生成，测试中的贪心基准（714 / 1531）针对的是它们。
+# 测试直接在内存中生成（见 build_fixture），本脚本把同样的图写成测试和 tsp_construct.py 使用的文件名。
+FIXTURES = {
+    "medium_graph_300.graph": dict(nodes=300, complete=True, weight_bounds=(1, 100), seed=42, legacy=True),
+    "large_graph_1000.graph": dict(nodes=1000, complete=True, weight_bounds=(1, 100), seed=42, legacy=True),
+}
+
+
+def build_fixture(filename):
+    """按 FIXTURES 中记录的参数生成测试用图。"""
+    return generate_graph(**FIXTURES[filename])
+
+
 if __name__ == "__main__":
-    num_nodes = 300
-    graph = generate_graph(
-        nodes=num_nodes,
-        complete=True,
-        weight_bounds=(1, 100),
-        seed=42  # 可选：设置随机种子以确保可重现性
-    )
-    
-    # 保存到文件
-    filename = "medium_graph_300.pickle"
-    print(f"正在将图保存到 {filename}...")
-    with open(filename, "wb") as f:
-        pickle.dump(graph, f)
-    
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in FIXTURES:
+        graph = build_fixture(filename)
+
+        # 保存到文件（二进制格式，见 graph_io.py；用 Graph_Advanced.load 读取）
+        print(f"正在将图保存到 {filename}...")
+        graph.save(os.path.join(directory, filename))
+
+        # 打印图的基本信息
+        n_vertices = len(graph.graph)
+        n_edges = sum(len(graph.graph[v]) for v in graph.graph) // 2
+        print(f"图的统计信息:")
+        print(f"节点数量: {n_vertices}")
+        print(f"边的数量: {n_edges}")
+
     print("完成！")
-    
-    # 打印图的基本信息
-    n_vertices = len(graph.graph)
-    n_edges = sum(len(edges) for edges in graph.graph.values()) // 2
-    print(f"图的统计信息:")
-    print(f"节点数量: {n_vertices}")
-    print(f"边的数量: {n_edges}") 
\ No newline at end of file
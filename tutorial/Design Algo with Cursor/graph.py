@@ -1,20 +1,82 @@
 import random
 from itertools import combinations
 
+import numpy as np
+
+from dynamic_paths import DynamicShortestPathCache
+from graph_io import load_graph, save_graph
+from graph_storage import INF, STORAGE_BACKENDS, CSRStorage, DenseStorage, DictStorage, make_storage
+from shortest_paths import (LandmarkIndex, ShortestPathCache, all_pairs_dijkstra, all_pairs_method, bidirectional_astar,
+                            floyd_warshall, hop_path, reverse_csr, search_groups)
+from spanning_tree import connected_components, kruskal, prim
+from tsp_budget import SolveBudget
+from tsp_candidates import candidate_rows, candidate_tour, knn_candidates, symmetric_candidates
+from tsp_construct import construct_tour, nearest_neighbour
+from tsp_exact import (HELD_KARP_MEMORY_LIMIT, branch_and_bound, held_karp, held_karp_memory, held_karp_seconds,
+                       tour_cost)
+from tsp_local_search import LocalSearch, candidate_lists, iterated_local_search
+from tsp_parallel import parallel_multistart
+from tsp_profile import Profiler, active, count, phase, profiled
+from tsp_solvers import TSP_SOLVERS, choose_strategy, tsp_stats
+from tsp_tour import TwoLevelTour, two_opt
+
 class Graph:
-    def __init__(self, directed=False):
+    def __init__(self, directed=False, storage="dict", capacity=0, reverse_index=False):
         """
         初始化图。
 
         参数：
         - directed (bool): 指定图是否为有向图。默认为 False（无向图）。
+        - storage (str): 存储后端，"dict"（字典嵌套字典）、"dense"（NumPy 距离矩阵，适合完全图）
+          或 "csr"（CSR 数组，适合稀疏图）。默认为 "dict"。
+        - capacity (int): 预计的顶点数，数组后端会据此预先分配空间。默认为 0。
+        - reverse_index (bool): 有向图是否维护反向邻接索引（每个顶点的前驱集合）。维护后
+          `get_predecessors` 和 `remove_vertex` 只需访问相关的边。无向图的前驱就是邻居，不需要索引。默认为 False。
 
         属性：
-        - graph (dict): 用于存储顶点及其相邻顶点（带权重）的字典。
+        - graph: 存储顶点及其相邻顶点（带权重）的存储对象，可以像字典一样读取（见 graph_storage.py）。
         - directed (bool): 表示图是否为有向图。
         """
-        self.graph = {}
+        self.graph = make_storage(storage, capacity)
         self.directed = directed
+        if reverse_index:
+            self.build_reverse_index()
+
+    # 有向图的反向邻接索引 {顶点: 前驱集合}；None 表示不维护
+    _reverse = None
+
+    # 只在内存中使用的缓存属性，pickle 时不保存
+    _TRANSIENT_ATTRS = ()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._TRANSIENT_ATTRS:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        """
+        从 pickle 恢复图。旧版本保存的图中 `graph` 是普通字典，这里把它包装成 DictStorage。
+        """
+        self.__dict__.update(state)
+        if type(self.graph) is dict:
+            self.graph = DictStorage(self.graph)
+
+    def _graph_changed(self):
+        """
+        图的顶点或边发生变化后调用。子类可以覆盖它来让依赖图结构的缓存失效。
+        """
+
+    def _edges_changed(self, added=(), removed=()):
+        """
+        `add_edge` 或 `remove_edge` 修改了边之后调用，默认转给 `_graph_changed`。
+        子类可以覆盖它，根据具体变化的边增量更新缓存。
+
+        参数：
+        - added: 新加入的有向边 `(src, dest, weight)` 列表。
+        - removed: 被删除的有向边 `(src, dest, weight)` 列表。
+        """
+        self._graph_changed()
     
     def add_vertex(self, vertex):
         """
@@ -23,12 +85,15 @@ class Graph:
         参数：
         - vertex: 要添加的顶点。必须是可哈希类型。
 
-        确保每个顶点在图字典中都表示为一个键，其值为空字典。
+        确保每个顶点在存储中都有一个（初始没有边的）条目。
         """
         if not isinstance(vertex, (int, str, tuple)):
             raise ValueError("Vertex must be a hashable type.")
         if vertex not in self.graph:
-            self.graph[vertex] = {}
+            self.graph.add_vertex(vertex)
+            if self._reverse is not None:
+                self._reverse[vertex] = set()
+            self._graph_changed()
     
     def add_edge(self, src, dest, weight):
         """
@@ -43,10 +108,17 @@ class Graph:
         """
         if src not in self.graph or dest not in self.graph:
             raise KeyError("Both vertices must exist in the graph.")
-        if dest not in self.graph[src]:  # Check to prevent duplicate edges
-            self.graph[src][dest] = weight
-        if not self.directed and src not in self.graph[dest]:
-            self.graph[dest][src] = weight
+        added = []
+        if not self.graph.has_edge(src, dest):  # Check to prevent duplicate edges
+            self.graph.set_edge(src, dest, weight)
+            if self._reverse is not None:
+                self._reverse[dest].add(src)
+            added.append((src, dest, weight))
+        if not self.directed and not self.graph.has_edge(dest, src):
+            self.graph.set_edge(dest, src, weight)
+            added.append((dest, src, weight))
+        if added:
+            self._edges_changed(added=added)
     
     def remove_edge(self, src, dest):
         """
@@ -56,26 +128,79 @@ class Graph:
         - src: 起始顶点
         - dest: 目标顶点
         """
-        if src in self.graph and dest in self.graph[src]:
-            del self.graph[src][dest]
+        removed = []
+        if src in self.graph and dest in self.graph and self.graph.has_edge(src, dest):
+            removed.append((src, dest, self.graph.weight(src, dest)))
+            self.graph.delete_edge(src, dest)
+            if self._reverse is not None:
+                self._reverse[dest].discard(src)
         if not self.directed:
-            if dest in self.graph and src in self.graph[dest]:
-                del self.graph[dest][src]
+            if dest in self.graph and src in self.graph and self.graph.has_edge(dest, src):
+                removed.append((dest, src, self.graph.weight(dest, src)))
+                self.graph.delete_edge(dest, src)
+        if removed:
+            self._edges_changed(removed=removed)
     
     def remove_vertex(self, vertex):
         """
         移除一个顶点及其所有连接的边。
 
+        无向图和维护了反向索引的有向图只访问与该顶点相连的边，O(度数)；
+        否则需要扫描全部边来寻找入边。
+
         参数：
         - vertex: 要移除的顶点
         """
         if vertex in self.graph:
-            # 从其他顶点移除到该顶点的边
-            for adj in list(self.graph):
-                if vertex in self.graph[adj]:
-                    del self.graph[adj][vertex]
-            # 移除该顶点本身
-            del self.graph[vertex]
+            if not self.directed:
+                self.graph.delete_vertex(vertex, self.graph.neighbors)
+            elif self._reverse is not None:
+                successors = self.graph.neighbors(vertex)
+                self.graph.delete_vertex(vertex, self._reverse.__getitem__)
+                for w in successors:
+                    self._reverse[w].discard(vertex)
+                del self._reverse[vertex]
+            else:
+                self.graph.delete_vertex(vertex)
+            self._graph_changed()
+
+    def build_reverse_index(self):
+        """
+        为有向图建立（或重建）反向邻接索引，之后 `add_edge`、`remove_edge`、`remove_vertex` 会保持它最新。
+        无向图不需要索引，调用没有效果。
+        """
+        if not self.directed:
+            return
+        labels = self.vertex_labels()
+        indptr, indices, _ = self.csr_arrays()
+        self._reverse = {v: set() for v in labels}
+        indices = indices.tolist()
+        for u, source in enumerate(labels):
+            for j in indices[indptr[u]:indptr[u + 1]]:
+                self._reverse[labels[j]].add(source)
+
+    def get_predecessors(self, vertex):
+        """
+        获取有边指向指定顶点的所有顶点。
+
+        无向图直接返回邻居；有向图在维护了反向索引时是 O(前驱数)，否则需要扫描全部边（O(m)）。
+
+        参数：
+        - vertex: 顶点
+
+        返回：
+        - 前驱顶点列表。如果顶点不存在，则返回空列表。
+        """
+        if vertex not in self.graph:
+            return []
+        if not self.directed:
+            return self.graph.neighbors(vertex)
+        if self._reverse is not None:
+            return list(self._reverse[vertex])
+        labels = self.vertex_labels()
+        indptr, indices, _ = self.csr_arrays()
+        owners = np.repeat(np.arange(len(labels)), np.diff(indptr))
+        return [labels[u] for u in np.unique(owners[indices == self.vertex_id(vertex)]).tolist()]
     
     def get_adjacent_vertices(self, vertex):
         """
@@ -87,7 +212,9 @@ class Graph:
         返回：
         - 相邻顶点列表。如果顶点不存在，则返回空列表。
         """
-        return list(self.graph.get(vertex, {}).keys())
+        if vertex not in self.graph:
+            return []
+        return self.graph.neighbors(vertex)
 
     def _get_edge_weight(self, src, dest):
         """
@@ -100,7 +227,93 @@ class Graph:
         返回：
         - 边的权重。如果边不存在，则返回无穷大。
         """
-        return self.graph[src].get(dest, float('inf'))
+        return self.graph.weight(src, dest)
+
+    def vertex_labels(self):
+        """
+        按整数编号顺序返回所有顶点标签。`weight_matrix()` 的第 i 行对应其中第 i 个顶点。
+
+        返回：
+        - 顶点标签列表。
+        """
+        return self.graph.vertex_labels()
+
+    def vertex_id(self, vertex):
+        """
+        获取顶点在数组表示中的整数编号。
+
+        参数：
+        - vertex: 顶点标签
+
+        返回：
+        - 从 0 开始的连续整数编号。
+        """
+        return self.graph.vertex_id(vertex)
+
+    def weight_matrix(self):
+        """
+        以 NumPy 矩阵形式返回边权，`matrix[i, j]` 是编号 i 到编号 j 的边权，不存在的边为无穷大。
+
+        对 "dense" 后端返回内部矩阵的视图，不复制数据（图被修改后应重新获取）；
+        其他后端会按当前的边生成一个新矩阵。
+
+        返回：
+        - 形状为 (n, n) 的 float64 矩阵。
+        """
+        return self.graph.weight_matrix()
+
+    def csr_arrays(self):
+        """
+        以 CSR 形式返回所有边：编号 i 的出边是 `indices[indptr[i]:indptr[i+1]]`，对应权重在 `weights` 的同一位置。
+
+        返回：
+        - 一个 `(indptr, indices, weights)` 的 NumPy 数组元组。
+        """
+        return self.graph.csr_arrays()
+
+    def set_storage(self, storage):
+        """
+        就地切换存储后端，顶点编号顺序和所有边保持不变。
+
+        参数：
+        - storage (str): "dict"、"dense" 或 "csr"。
+        """
+        if storage not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {storage!r}. Choose from {sorted(STORAGE_BACKENDS)}.")
+        if self.graph.kind != storage:
+            labels = self.graph.vertex_labels()
+            self.graph = STORAGE_BACKENDS[storage].from_arrays(labels, *self.graph.csr_arrays())
+
+    def save(self, path):
+        """
+        把图保存为二进制文件（格式见 graph_io.py）：版本化的文件头、顶点标签表，
+        以及距离矩阵（"dense" 后端）或 CSR 数组（其他后端）。
+
+        参数：
+        - path (str): 文件路径。
+
+        抛出：
+        - ValueError: 顶点标签不是 int、float 或 str。
+        """
+        save_graph(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        加载 `save` 写出的文件。与 pickle 不同，加载时不会执行文件中的任何代码。
+
+        参数：
+        - path (str): 文件路径。
+        - mmap (bool, optional): 为 True 时用写时复制的内存映射直接使用文件中的数组，不复制数据；
+          对图的修改只影响内存中的副本，不会写回文件。默认为 True。
+
+        返回：
+        - 一个 cls 实例（例如 `Graph_Advanced.load(...)` 返回 Graph_Advanced），存储后端与保存时相同。
+
+        抛出：
+        - ValueError: 文件不是图文件，或版本不受支持。
+        """
+        return load_graph(cls, path, mmap=mmap)
     
     def __str__(self):
         """
@@ -112,7 +325,80 @@ class Graph:
         return str(self.graph)
 
    
-def generate_graph(nodes, edges=None, complete=False, weight_bounds=(1,600), seed=None):
+def _complete_weight_matrix(rng, nodes, low, high):
+    """
+    一次抽取上三角的全部 n(n-1)/2 个随机权重，逐行写入矩阵后按块镜像到下三角，对角线为无穷大。
+    """
+    dtype = np.int32 if -2**31 <= low and high < 2**31 - 1 else np.int64
+    upper = rng.integers(low, high, size=nodes * (nodes - 1) // 2, endpoint=True, dtype=dtype)
+    matrix = np.empty((nodes, nodes))
+    offset = 0
+    for i in range(nodes - 1):
+        count = nodes - i - 1
+        matrix[i, i + 1:] = upper[offset:offset + count]
+        offset += count
+    del upper
+    block = 512
+    for lo in range(0, nodes, block):
+        hi = min(lo + block, nodes)
+        matrix[lo:hi, :lo] = matrix[:lo, lo:hi].T
+        matrix[lo:hi, lo:hi] = np.triu(matrix[lo:hi, lo:hi], 1) + np.triu(matrix[lo:hi, lo:hi], 1).T
+    np.fill_diagonal(matrix, INF)
+    return matrix
+
+
+def _degree_bounded_edges(rng, nodes, degree):
+    """
+    度数受限的随机边（配置模型）：每个顶点准备 degree 个"接口"，随机打乱后两两配对。
+    配对出的自环和重复边直接丢弃，而不是重新抽样，因此每个顶点的度数不超过 degree，且没有拒绝循环。
+
+    返回：
+    - `(heads, tails)`：每条无向边一次，heads < tails。
+    """
+    stubs = np.repeat(np.arange(nodes, dtype=np.int64), degree)
+    rng.shuffle(stubs)
+    stubs = stubs[:len(stubs) // 2 * 2]
+    a, b = stubs[0::2], stubs[1::2]
+    keep = a != b
+    codes = np.minimum(a, b)[keep] * nodes + np.maximum(a, b)[keep]
+    # 保持配对顺序去重，使边的权重与 seed 一一对应
+    codes = codes[np.sort(np.unique(codes, return_index=True)[1])]
+    return codes // nodes, codes % nodes
+
+
+def _legacy_adjacency(nodes, edges, complete, low, high, seed):
+    """
+    旧版 `generate_graph` 的算法（基于 random 模块，逐条抽样并拒绝自环和重复边），逐次调用随机数的顺序与旧版相同，
+    所以同样的 seed 得到与旧版完全相同的图。O(n^2) 次 Python 调用，只用于重现旧的数据。
+
+    返回：
+    - `{顶点: {邻居: 权重}}`，顶点和邻居的顺序与旧版逐条 add_edge 的结果相同，权重为 int。
+    """
+    rng = random.Random(seed)
+    adjacency = {i: {} for i in range(nodes)}
+
+    def add_edge(i, j, weight):
+        adjacency[i].setdefault(j, weight)
+        adjacency[j].setdefault(i, weight)
+
+    if complete:
+        for i in range(nodes):
+            for j in range(i + 1, nodes):
+                add_edge(i, j, rng.randint(low, high))
+        return adjacency
+    for i in range(nodes):
+        for _ in range(edges):
+            j = rng.randint(0, nodes - 1)
+            while (j == i or j in adjacency[i]) and len(adjacency[i]) < nodes - 1:
+                j = rng.randint(0, nodes - 1)
+            weight = rng.randint(low, high)
+            if len(adjacency[i]) < edges and len(adjacency[j]) < edges:
+                add_edge(i, j, weight)
+    return adjacency
+
+
+def generate_graph(nodes, edges=None, complete=False, weight_bounds=(1,600), seed=None, storage=None, directed=False,
+                   legacy=False):
     """
     生成一个具有指定参数的图，允许完全图和非完全图。
     
@@ -124,9 +410,15 @@ def generate_graph(nodes, edges=None, complete=False, weight_bounds=(1,600), see
     - complete (bool, optional): 如果设置为True，则生成一个完全图，其中每个不同的顶点通过唯一的边连接。默认为False。
     - weight_bounds (tuple, optional): 一个指定边随机权重范围的下限和上限（包括）的元组。默认为(1, 600)。
     - seed (int, optional): 用于确保可重复性的随机数生成器种子。默认为None。
+    - storage (str, optional): 图的存储后端。默认为None，即完全图使用"dense"（距离矩阵），非完全图使用"csr"。
+    - directed (bool, optional): 生成有向图。完全图的每条弧 (i, j) 独立抽取权重（矩阵不对称）；
+      非完全图的每条边随机取一个方向，成为单向的弧。默认为False。
+    - legacy (bool, optional): 使用旧版基于 random 模块的生成器，同样的 seed 得到与旧版完全相同的图（见注意）。
+      只支持无向图。默认为False。
 
     抛出：
-    - ValueError: 如果`edges`不是None且`complete`设置为True，因为完全图不需要指定边数。
+    - ValueError: 如果`edges`不是None且`complete`设置为True，因为完全图不需要指定边数；
+      或者 `legacy=True` 时要求生成有向图。
 
     返回：
     - Graph_Advanced: 一个表示生成的图的Graph_Advanced类实例，顶点标签从0开始。
@@ -139,93 +431,756 @@ def generate_graph(nodes, edges=None, complete=False, weight_bounds=(1,600), see
         generate_graph(5, edges=2)
     
     注意：
-    - 该函数假设存在一个具有添加顶点(`add_vertex`)和边(`add_edge`)方法以及获取相邻顶点(`get_adjacent_vertices`)方法的Graph_Advanced类。
+    - 所有随机数都来自 `np.random.default_rng(seed)`，相同的参数和 seed 总是生成相同的图。
+      旧版生成器使用 random 模块，同样的 seed 现在得到的是另一张图：依赖旧图的已保存结果和基准
+      需要用 `legacy=True` 重新生成（测试数据见 generate_large_graph.py）。
+    - 完全图一次性抽取上三角的全部权重并直接写入距离矩阵，O(n^2)，1 万个节点只需几秒（矩阵约 800 MB）。
+    - 非完全图按配置模型生成：每个顶点有 `edges` 个接口，随机配对，丢弃自环和重复边。
+      每个顶点的度数不超过 `edges`（大多数恰好等于 `edges`），边数约为 nodes * edges / 2。
     """
-    random.seed(seed)
-    graph = Graph_Advanced()
     if edges is not None and complete:
         raise ValueError("edges must be None if complete is set to True")
+    if not complete and edges is None:
+        raise ValueError("edges must be given if complete is False")
     if not complete and edges > nodes:
         raise ValueError("number of edges must be less than number of nodes")
-    
-
-    for i in range(nodes):
-        graph.add_vertex(i)
+    if storage is None:
+        storage = "dense" if complete else "csr"
+    if storage not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {storage!r}. Choose from {sorted(STORAGE_BACKENDS)}.")
+    low, high = weight_bounds
+    labels = list(range(nodes))
+    graph = Graph_Advanced(directed=directed, storage=storage)
+    if legacy:
+        if directed:
+            raise ValueError("The legacy generator only builds undirected graphs.")
+        adjacency = DictStorage(_legacy_adjacency(nodes, edges, complete, low, high, seed))
+        if storage != "dict":
+            adjacency = STORAGE_BACKENDS[storage].from_arrays(labels, *adjacency.csr_arrays())
+        graph.graph = adjacency
+        return graph
+    rng = np.random.default_rng(seed)
     if complete:
-        for i in range(nodes):
-            for j in range(i+1,nodes):
-                weight = random.randint(weight_bounds[0], weight_bounds[1])
-                graph.add_edge(i,j,weight)
+        if directed:
+            matrix = rng.integers(low, high, size=(nodes, nodes), endpoint=True).astype(np.float64)
+            np.fill_diagonal(matrix, np.inf)
+        else:
+            matrix = _complete_weight_matrix(rng, nodes, low, high)
+        dense = DenseStorage.from_matrix(labels, matrix)
+        graph.graph = dense if storage == "dense" else STORAGE_BACKENDS[storage].from_arrays(labels, *dense.csr_arrays())
+        return graph
+    heads, tails = _degree_bounded_edges(rng, nodes, edges)
+    weights = rng.integers(low, high, size=len(heads), endpoint=True).astype(np.float64)
+    if directed:
+        # 每条边随机取一个方向，只存在出发顶点的行里
+        flip = rng.random(len(heads)) < 0.5
+        rows, cols = np.where(flip, tails, heads), np.where(flip, heads, tails)
     else:
-        for i in range(nodes):
-            for _ in range(edges):
-                j = random.randint(0, nodes - 1)
-                while (j == i or j in graph.get_adjacent_vertices(i)) and len(graph.get_adjacent_vertices(i)) < nodes - 1:  # Ensure the edge is not a loop or a duplicate
-                    j = random.randint(0, nodes - 1)
-                weight = random.randint(weight_bounds[0], weight_bounds[1])
-                if len(graph.graph[i]) < edges and len(graph.graph[j]) < edges:
-                    graph.add_edge(i, j, weight)
+        # 无向边在两个端点的行里各存一次
+        rows, cols, weights = np.concatenate([heads, tails]), np.concatenate([tails, heads]), np.concatenate([weights, weights])
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=nodes), out=indptr[1:])
+    graph.graph = STORAGE_BACKENDS[storage].from_arrays(labels, indptr, cols[order], weights[order])
     return graph
 
 class Graph_Advanced(Graph):
 
-    def shortest_path(self, start, end) -> tuple[float, list]: 
+    # 最多缓存多少个源点的最短路径树
+    path_cache_size = 64
+
+    # 是否开启增量最短路径模式，见 enable_incremental_paths
+    incremental_paths = False
+
+    _TRANSIENT_ATTRS = ("_path_cache", "_landmarks", "_dynamic_paths", "_all_pairs", "profiler")
+
+    # 隐式权重来源（见 candidate_graph）；None 表示图中的边就是全部距离
+    weight_source = None
+
+    # TSP 求解的剖析器，见 enable_profiling；None 表示不剖析
+    profiler = None
+
+    # 候选图上的顶点数达到这个值时，先在两级链表表示的回路上做 2-opt（见 tsp_tour.py）。
+    # 实测 5000 个顶点时与直接用 LocalSearch 持平，10000 个顶点起明显更好
+    two_level_threshold = 10000
+
+    @classmethod
+    def candidate_graph(cls, weights, k=8):
+        """
+        为不能存下 n×n 距离矩阵的大实例建立候选图：每个顶点只保留到 k 个最近邻的边（合并成对称的 CSR 存储），
+        完整的距离由 weights 按需计算。顶点标签是 0..n-1，内存随 n 线性增长。
+
+        `tsp_large_graph`、`tsp_medium_graph` 在候选图上只使用候选边和按需计算的距离，不会建立距离矩阵。
+        增删顶点会打乱编号与 weights 的对应关系，候选图建好后应只读使用。
+
+        参数：
+        - weights: `tsp_candidates.CoordinateWeights`（坐标加距离函数）或 `tsp_candidates.CallbackWeights`（回调函数）。
+        - k (int): 每个顶点的近邻数。默认为 8。
+
+        返回：
+        - 使用 "csr" 存储的无向图，`weight_source` 为 weights。
+        """
+        indptr, indices, lengths = symmetric_candidates(weights, knn_candidates(weights, k))
+        graph = cls(storage="csr")
+        graph.graph = CSRStorage.from_arrays(list(range(weights.n)), indptr, indices, lengths, copy=False)
+        graph.weight_source = weights
+        return graph
+
+    def _graph_changed(self):
+        self._path_cache = None
+        # 地标距离在图修改后不再是有效下界，需要重新调用 preprocess_landmarks
+        self._landmarks = None
+        self._dynamic_paths = None
+        self._all_pairs = None
+
+    def _edges_changed(self, added=(), removed=()):
+        cache = self.__dict__.get("_dynamic_paths")
+        if cache is None:
+            return self._graph_changed()
+        self._path_cache = None
+        self._landmarks = None
+        self._all_pairs = None
+        self.last_repair_stats = cache.apply(added, removed)
+
+    def add_edge(self, src, dest, weight):
+        # 增量模式的最短路径树只支持非负边权；在修改图之前检查，否则图里会多出一条树没见过的边
+        if self.incremental_paths and weight < 0:
+            raise ValueError("Dijkstra requires non-negative edge weights.")
+        super().add_edge(src, dest, weight)
+
+    def _in_edges(self, vertex):
+        weight = self.graph.weight
+        return [(u, weight(u, vertex)) for u in self.get_predecessors(vertex)]
+
+    def _dynamic_path_cache(self):
+        cache = self.__dict__.get("_dynamic_paths")
+        if cache is None:
+            out_edges = lambda v: self.graph[v].items()
+            cache = DynamicShortestPathCache(out_edges, out_edges if not self.directed else self._in_edges,
+                                             maxsize=self.path_cache_size)
+            self._dynamic_paths = cache
+        return cache
+
+    def enable_incremental_paths(self, enabled=True):
+        """
+        开启或关闭增量最短路径模式（Ramalingam–Reps 式的动态最短路径，见 dynamic_paths.py）。
+
+        开启后 `shortest_path` 默认为每个源点计算完整的最短路径树并放进 LRU 缓存。`add_edge` 和 `remove_edge`
+        不再丢弃这些树，而是只修复受影响的部分：插入边时只访问距离变短的顶点，删除树边时只重新计算
+        挂在这条边下面的子树。每次修复的记录保存在 `last_repair_stats` 中，其中 touched 是修复访问的顶点数，
+        recompute 是从头重建同一棵树需要访问的顶点数；`shortest_path_cache_info()` 给出累计值。
+        增减顶点仍然会清空缓存。有向图会自动建立反向邻接索引，用来查找入边。边权必须非负。
+
+        参数：
+        - enabled (bool): True 开启，False 关闭。默认为 True。
+
+        抛出：
+        - ValueError: 图中有负权边。
+        """
+        if enabled:
+            weights = self.csr_arrays()[2]
+            if len(weights) and weights.min() < 0:
+                raise ValueError("Dijkstra requires non-negative edge weights.")
+            if self.directed and self._reverse is None:
+                self.build_reverse_index()
+        self.incremental_paths = enabled
+        self._dynamic_paths = None
+
+    def enable_profiling(self, enabled=True):
+        """
+        开启或关闭 TSP 求解的剖析（见 tsp_profile.py）。
+
+        开启后 `tsp_small_graph`、`tsp_branch_and_bound`、`tsp_medium_graph`、`tsp_large_graph` 和 `solve_tsp`
+        把各阶段的耗时（输入准备、候选表、构造、局部搜索、回路翻转等）、每种移动的评估 / 应用次数、
+        度量闭包缓存的命中次数和候选图上按需计算距离的次数累计到 `profiler` 中，
+        用 `profiler.report()` 查看，用 `profiler.export_folded(path)` 导出火焰图使用的折叠栈文件。
+        剖析会使局部搜索变慢（每次移动尝试多一次函数调用）；关闭时没有额外开销。
+
+        参数：
+        - enabled (bool): True 开启（换上一个新的、空的剖析器），False 关闭。默认为 True。
+
+        返回：
+        - 新的剖析器；关闭时为 None。
+        """
+        self.profiler = Profiler() if enabled else None
+        return self.profiler
+
+    def _shortest_path_cache(self):
+        """获取当前图结构对应的最短路径树缓存，图被修改后会重新建立。"""
+        cache = self.__dict__.get("_path_cache")
+        if cache is None:
+            cache = ShortestPathCache(self.vertex_labels(), *self.csr_arrays(), maxsize=self.path_cache_size)
+            self._path_cache = cache
+        return cache
+
+    def preprocess_landmarks(self, k=16, seed=None):
+        """
+        为重复的点到点查询做 ALT 预处理：用最远点策略选出 k 个地标，并计算它们与所有顶点之间的距离。
+
+        预处理之后 `shortest_path` 默认改用双向 A* 搜索，利用三角不等式下界减少需要确定的顶点数。
+        图被修改后预处理结果自动作废。边权必须非负。
+
+        参数：
+        - k (int): 地标数量。默认为 16。
+        - seed (int, optional): 选择第一个地标的随机数种子。
+
+        返回：
+        - LandmarkIndex: 预处理结果，其中 `landmarks` 是地标编号，`nbytes` 是距离数组占用的字节数。
+        """
+        cache = self._shortest_path_cache()
+        indptr, indices, weights = self.csr_arrays()
+        landmarks = LandmarkIndex(indptr, indices, weights, k, directed=self.directed, seed=seed)
+        forward = (indptr.tolist(), indices, weights)
+        backward = forward
+        if self.directed:
+            rev_indptr, rev_indices, rev_weights = reverse_csr(indptr, indices, weights)
+            backward = (rev_indptr.tolist(), rev_indices, rev_weights)
+        self._landmarks = (landmarks, forward, backward, cache.index, cache.labels)
+        return landmarks
+
+    def shortest_path(self, start, end, method="auto") -> tuple[float, list]: 
         """
         计算从起始顶点到目标顶点的最短路径。
+
+        "dijkstra" 方法使用二叉堆实现的 Dijkstra 算法，确定目标顶点后立即结束。每个源点的最短路径树会放进
+        LRU 缓存，之后从同一源点出发的查询只需回溯路径（或从上次中断处继续搜索）。
+        "alt" 方法使用 `preprocess_landmarks` 的结果做双向 A* 搜索。
+        `add_vertex`、`add_edge`、`remove_edge`、`remove_vertex` 修改图后缓存和地标自动失效
+        （增量模式下 `add_edge`、`remove_edge` 只修复缓存的树，见 `enable_incremental_paths`）。
+        边权必须非负。每次查询确定的顶点数记录在 `last_path_stats` 中。
+
         参数：
         - start: 起始顶点
         - end: 目标顶点
+        - method (str): "auto"（已做地标预处理时用 "alt"，开启了增量模式时用 "incremental"，否则用 "dijkstra"）、
+          "dijkstra"、"alt" 或 "incremental"（见 `enable_incremental_paths`）。
         
         返回：
-        - 一个包含最短路径距离和路径顶点列表的元组。
+        - 一个包含最短路径距离和路径顶点列表的元组。如果不可达，返回 (inf, [])。
         """
-        # 代码写这里
-        return 0,[]
-    
-    def tsp_small_graph(self, start_vertex) -> tuple[float, list]:
+        if start not in self.graph or end not in self.graph:
+            raise KeyError("Both vertices must exist in the graph.")
+        landmarks = self.__dict__.get("_landmarks")
+        if method == "auto":
+            if landmarks is not None:
+                method = "alt"
+            else:
+                method = "incremental" if self.incremental_paths else "dijkstra"
+        if method == "incremental":
+            if not self.incremental_paths:
+                raise ValueError("Call enable_incremental_paths() before using method='incremental'.")
+            cache = self._dynamic_path_cache()
+            distance, path = cache.query(start, end)
+            self.last_path_stats = {"method": method, "settled": cache.last_settled}
+            return distance, path
+        if method == "alt":
+            if landmarks is None:
+                raise ValueError("Call preprocess_landmarks() before using method='alt'.")
+            index, forward, backward, ids, labels = landmarks
+            distance, path, settled = bidirectional_astar(ids[start], ids[end], forward, backward, index)
+        elif method == "dijkstra":
+            cache = self._shortest_path_cache()
+            distance, path = cache.query(cache.index[start], cache.index[end])
+            settled = cache.last_settled
+            labels = cache.labels
+        else:
+            raise ValueError(f"Unknown shortest path method: {method!r}")
+        self.last_path_stats = {"method": method, "settled": settled}
+        return distance, [labels[i] for i in path]
+
+    def _vertex_ids(self, cache, vertices):
+        index = cache.index
+        missing = [v for v in vertices if v not in index]
+        if missing:
+            raise KeyError(f"Vertices not in the graph: {missing}")
+        return [index[v] for v in vertices]
+
+    def shortest_paths(self, pairs, paths=False, workers=1):
+        """
+        批量计算多对顶点之间的最短路径。
+
+        查询按起点分组，每个起点只做一次多目标 Dijkstra 搜索。`workers` 大于 1 时不同起点分给进程池并行计算；
+        否则复用 `shortest_path` 的最短路径树缓存。
+
+        参数：
+        - pairs: (起点, 终点) 元组的序列
+        - paths (bool): 是否同时返回路径。默认为 False。
+        - workers (int): 并行进程数。默认为 1（不使用进程池）。
+
+        返回：
+        - 与 `pairs` 一一对应的距离数组（NumPy，不可达为无穷大）；
+          如果 `paths` 为 True，返回 `(距离数组, 路径列表)`，不可达的路径为空列表。
+        """
+        pairs = list(pairs)
+        cache = self._shortest_path_cache()
+        sources = self._vertex_ids(cache, [s for s, _ in pairs])
+        targets = self._vertex_ids(cache, [t for _, t in pairs])
+        groups = {}
+        for s, t in zip(sources, targets):
+            groups.setdefault(s, {})[t] = None
+        groups = {s: list(ts) for s, ts in groups.items()}
+        results = search_groups(groups, *self.csr_arrays(), paths=paths, workers=workers,
+                                cache=cache if workers <= 1 else None)
+
+        # 每个起点的结果按 目标 -> 位置 建立索引，再按原始顺序取回
+        positions = {s: {t: j for j, t in enumerate(ts)} for s, ts in groups.items()}
+        distances = np.array([results[s][0][positions[s][t]] for s, t in zip(sources, targets)], dtype=np.float64)
+        if not paths:
+            return distances
+        labels = cache.labels
+        found = [[labels[i] for i in results[s][1][positions[s][t]]] for s, t in zip(sources, targets)]
+        return distances, found
+
+    def distance_table(self, sources, targets, paths=False, workers=1):
+        """
+        计算多个起点到多个终点的距离表，例如为稀疏图上的 TSP 构造输入矩阵。
+
+        参数：
+        - sources: 起点序列
+        - targets: 终点序列
+        - paths (bool): 是否同时返回路径。默认为 False。
+        - workers (int): 并行进程数。默认为 1（不使用进程池）。
+
+        返回：
+        - 形状为 (len(sources), len(targets)) 的距离矩阵，`matrix[i, j]` 是 sources[i] 到 targets[j] 的距离；
+          如果 `paths` 为 True，返回 `(距离矩阵, 路径)`，其中 `路径[i][j]` 是对应的顶点列表。
+        """
+        sources, targets = list(sources), list(targets)
+        cache = self._shortest_path_cache()
+        source_ids = self._vertex_ids(cache, sources)
+        target_ids = self._vertex_ids(cache, targets)
+        groups = {s: target_ids for s in dict.fromkeys(source_ids)}
+        results = search_groups(groups, *self.csr_arrays(), paths=paths, workers=workers,
+                                cache=cache if workers <= 1 else None)
+        matrix = np.array([results[s][0] for s in source_ids], dtype=np.float64).reshape(len(sources), len(targets))
+        if not paths:
+            return matrix
+        labels = cache.labels
+        found = [[[labels[i] for i in path] for path in results[s][1]] for s in source_ids]
+        return matrix, found
+
+    def all_pairs_shortest_paths(self, method="auto", workers=1):
+        """
+        计算所有顶点对之间的最短路径。
+
+        "floyd_warshall" 使用向量化的 Floyd–Warshall（O(n^3) 次数组运算），适合稠密图；
+        "dijkstra" 从每个顶点运行一次二叉堆 Dijkstra（O(n·m log n)），可以分给 workers 个进程，适合稀疏图。
+        结果按 `vertex_labels()` 的顺序编号，缓存到图被修改为止。边权必须非负。
+
+        参数：
+        - method (str): "auto"（按边数和进程数估计哪种更快）、"floyd_warshall" 或 "dijkstra"。
+        - workers (int): "dijkstra" 使用的进程数。默认为 1（不使用进程池）。
+
+        返回：
+        - `(dist, hops)`：只读的 n×n 距离矩阵（不可达为无穷大）和下一跳矩阵。`hops[i, j]` 是从 i 到 j 的
+          最短路径上 i 之后的顶点编号（不可达为 -1），按 n 选用 int16 或 int32 以节省内存，
+          可以用 `shortest_paths.hop_path` 展开成完整路径。
+
+        抛出：
+        - ValueError: 未知的方法，或图中有负权边。
+        """
+        cached = self.__dict__.get("_all_pairs")
+        if cached is not None and method in ("auto", cached[0]):
+            count("all_pairs.hits")
+            return cached[1], cached[2]
+        count("all_pairs.misses")
+        indptr, indices, weights = self.csr_arrays()
+        if len(weights) and weights.min() < 0:
+            raise ValueError("Shortest paths require non-negative edge weights.")
+        if method == "auto":
+            method = all_pairs_method(len(indptr) - 1, len(indices), workers)
+        if method == "floyd_warshall":
+            dist, hops = floyd_warshall(self.weight_matrix())
+        elif method == "dijkstra":
+            dist, hops = all_pairs_dijkstra(indptr, indices, weights, workers=workers)
+        else:
+            raise ValueError(f"Unknown all-pairs method: {method!r}")
+        dist.flags.writeable = False
+        hops.flags.writeable = False
+        self._all_pairs = (method, dist, hops)
+        return dist, hops
+
+    def shortest_path_cache_info(self):
+        """
+        返回最短路径树缓存的统计信息。
+
+        增量模式下返回增量缓存的统计信息，另外包含累计的 repairs、touched、recompute。
+
+        返回：
+        - 一个包含 hits、misses、size、maxsize 的字典。
+        """
+        if self.incremental_paths:
+            return self._dynamic_path_cache().info()
+        return self._shortest_path_cache().info()
+
+    def _edge_arrays(self):
+        """所有边的 `(heads, tails, weights)` 数组（编号形式）。"""
+        indptr, indices, weights = self.csr_arrays()
+        return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr)), indices, weights
+
+    def minimum_spanning_tree(self, method="auto"):
+        """
+        求无向图的最小生成树（不连通时为最小生成森林，每个连通分量一棵树）。
+
+        - "prim"：在稠密矩阵上做 O(n^2) 的向量化 Prim 算法，适合 `generate_graph` 生成的完全图。
+        - "kruskal"：在 CSR 边列表上排序后用数组并查集合并，O(m log m)，适合稀疏图。
+        - "auto"：边数超过 n^2/4 时用 Prim，否则用 Kruskal。
+
+        参数：
+        - method (str): "auto"、"prim" 或 "kruskal"。
+
+        返回：
+        - 一个元组 `(total_weight, edges)`，edges 是 `(u, v, weight)` 列表，u、v 为顶点标签。
+
+        抛出：
+        - ValueError: 有向图，或未知的 method。
+        """
+        if self.directed:
+            raise ValueError("Minimum spanning trees are defined for undirected graphs.")
+        if method not in ("auto", "prim", "kruskal"):
+            raise ValueError(f"Unknown method {method!r}; expected 'auto', 'prim' or 'kruskal'.")
+        labels = self.vertex_labels()
+        n = len(labels)
+        if method == "auto":
+            method = "prim" if self.graph.kind == "dense" or len(self.csr_arrays()[1]) * 4 > n * n else "kruskal"
+        if method == "prim":
+            heads, tails, weights = prim(self.weight_matrix())
+        else:
+            heads, tails, weights = kruskal(n, *self._edge_arrays())
+        edges = [(labels[a], labels[b], w) for a, b, w in zip(heads.tolist(), tails.tolist(), weights.tolist())]
+        return float(weights.sum()), edges
+
+    def connected_components(self):
+        """
+        求连通分量；有向图按无向处理（弱连通分量）。
+
+        返回：
+        - 顶点标签列表的列表，按每个分量中最小的顶点编号排序。
+        """
+        labels = self.vertex_labels()
+        heads, tails, _ = self._edge_arrays()
+        component, roots = connected_components(len(labels), heads, tails)
+        members = {root: [] for root in roots.tolist()}
+        for i, root in enumerate(component.tolist()):
+            members[root].append(labels[i])
+        return list(members.values())
+
+    def _tsp_input(self, start):
+        """
+        准备 TSP 求解器的输入：按编号排列的顶点标签、距离矩阵、起点编号和下一跳矩阵。
+
+        完全图直接使用边权矩阵，候选图使用 weight_source 算出的完整矩阵（只适合小实例），下一跳矩阵为 None。
+        其他图使用度量闭包（全源最短路径距离），
+        回路的每一段之后再用下一跳矩阵展开成图中真实的路径（见 `_tour_labels`）。
         """
-        解决小（~10节点）完全图的旅行商问题，从指定节点开始。
-        任务要求[!]: 需要找到最优路径。预期图最多有10个节点。必须在0.5秒内运行。
+        if start not in self.graph:
+            raise KeyError("Start vertex must exist in the graph.")
+        with phase("tsp_input"):
+            if self.weight_source is not None:
+                return self.vertex_labels(), self.weight_source.matrix(), self.vertex_id(start), None
+            matrix = self.weight_matrix()
+            n = len(matrix)
+            finite = np.isfinite(matrix)
+            if np.count_nonzero(finite) - np.count_nonzero(np.diagonal(finite)) == n * (n - 1):
+                return self.vertex_labels(), matrix, self.vertex_id(start), None
+            dist, hops = self.all_pairs_shortest_paths()
+            if not np.isfinite(dist).all():
+                raise ValueError("Every vertex must be reachable from every other vertex to build a tour.")
+            matrix = dist.copy()
+            np.fill_diagonal(matrix, INF)
+            return self.vertex_labels(), matrix, self.vertex_id(start), hops
+
+    def _tour_labels(self, labels, tour, hops):
+        """把回路的顶点编号转换为标签；使用度量闭包时把每一段展开成最短路径，中间顶点可能重复出现。"""
+        if hops is not None:
+            walk = [tour[0]]
+            for a, b in zip(tour, tour[1:]):
+                walk.extend(hop_path(hops, a, b)[1:])
+            tour = walk
+        return [labels[i] for i in tour]
+
+    def _heuristic_tour(self, matrix, start, budget):
+        """最近邻回路（对称矩阵再加一次局部搜索），作为精确算法超时时的后备结果（`fallback=True`）。"""
+        with phase("heuristic"):
+            tour = nearest_neighbour(matrix, start)
+            if len(tour) >= 5 and np.array_equal(matrix, matrix.T):
+                search = LocalSearch(matrix, candidate_lists(matrix, 10), tour)
+                search.optimize(deadline=budget.deadline)
+                closed = search.closed_tour(start)
+            else:
+                closed = tour + [start]
+        cost = tour_cost(matrix, closed)
+        budget.improve(cost)
+        return cost, closed
+
+    @profiled
+    def tsp_small_graph(self, start_vertex, time_limit=0.45, max_iterations=None,
+                        memory_limit=HELD_KARP_MEMORY_LIMIT, fallback=False) -> tuple[float, list]:
+        """
+        解决小（~20节点以内）完全图的旅行商问题，从指定节点开始。
+        任务要求[!]: 需要找到最优路径。必须在0.5秒内运行。
+
+        用向量化的 Held-Karp 位掩码动态规划求最优解（见 tsp_exact.py），时间复杂度 O(2^n · n^2)。
+        动态规划表约占 2^(n-1) · (n-1) · 4 字节（20 个节点约 40 MB），建立距离矩阵之前先按顶点数检查内存。
+        本机上 20 个节点的动态规划约需 0.2 秒，21 个约 0.5 秒。如果按 `tsp_exact.held_karp_seconds` 估计剩余时间不够，
+        或在预算内没有算完，默认抛出 TimeoutError；`fallback=True` 时改为返回启发式回路（最近邻加局部搜索）。
+        求解统计保存在 `last_tsp_stats` 中，其中 optimal 表示是否为最优解。
+        不是完全图时先求度量闭包（见 `all_pairs_shortest_paths`），返回的路径中每一段展开为图中真实的最短路径。
         
         参数：
         - start_vertex: 起始节点
+        - time_limit (float, optional): 最长运行时间（秒）。默认为 0.45 秒（给输入准备留出余量）；None 表示不限时。
+        - max_iterations (int, optional): 动态规划最多展开的层数（每种子集大小一层，n 个节点共 n-2 层）。
+          默认为 None（不限层数）。
+        - memory_limit (int): 动态规划表允许占用的最大字节数，默认为 256 MB。
+        - fallback (bool): 预算内求不出最优解时是否返回启发式回路。默认为 False（抛出 TimeoutError）。
         
         返回：
         - 一个包含总距离和路径顶点列表的元组。
+
+        抛出：
+        - ValueError: 如果图太大，所需内存超过 `memory_limit`。
+        - TimeoutError: 如果 `fallback=False`，且预计或实际在 `time_limit` / `max_iterations` 内算不完。
         """
-        # 代码写这里
-        
-        return 0, []
+        n = len(self.graph)
+        if held_karp_memory(n) > memory_limit:
+            raise ValueError(f"Held-Karp on {n} vertices needs {held_karp_memory(n) / 2**20:.0f} MB, more than "
+                             f"memory_limit ({memory_limit / 2**20:.0f} MB); use tsp_medium_graph or solve_tsp instead.")
+        budget = SolveBudget(time_limit, max_iterations)
+        labels, matrix, start, hops = self._tsp_input(start_vertex)
+        if fallback:
+            distance, tour = self._heuristic_tour(matrix, start, budget)
+        optimal = False
+        # 预计算不完时不启动动态规划
+        if time_limit is None or held_karp_seconds(n) <= time_limit - budget.elapsed():
+            try:
+                with phase("held_karp"):
+                    distance, tour = held_karp(matrix, start, memory_limit=memory_limit, budget=budget)
+                budget.improve(distance)
+                optimal = True
+            except TimeoutError:
+                if not fallback:
+                    raise
+        elif not fallback:
+            raise TimeoutError(f"Held-Karp on {n} vertices is expected to take {held_karp_seconds(n):.2f} s, "
+                               f"more than the time left; raise time_limit or pass fallback=True.")
+        self.last_tsp_stats = budget.stats(solver="held_karp", optimal=optimal)
+        return distance, self._tour_labels(labels, tour, hops)
 
 
-    def tsp_large_graph(self, start) -> tuple[float, list]: 
+    @profiled
+    def tsp_branch_and_bound(self, start_vertex, time_limit=10.0, max_iterations=100000) -> tuple[float, list]:
+        """
+        用分支定界精确求解中型（30~60节点）无向完全图的旅行商问题，从指定节点开始。
+
+        下界是经次梯度优化的 Held-Karp 1-树下界，初始上界来自启发式回路（见 tsp_exact.py）。
+        在时间或节点预算内证明最优时返回最优回路；预算用完时返回当前最好的回路。
+        求解统计和最优性证书（lower_bound、gap、optimal、nodes）保存在 `last_tsp_stats` 中。
+        不是完全图时先求度量闭包（见 `all_pairs_shortest_paths`），返回的路径中每一段展开为图中真实的最短路径。
+
+        参数：
+        - start_vertex: 起始节点
+        - time_limit (float, optional): 最长运行时间（秒）。默认为 10 秒。
+        - max_iterations (int, optional): 最多展开的分支节点数。默认为 100000。
+
+        返回：
+        - 一个包含总距离和路径顶点列表的元组。
+        """
+        budget = SolveBudget(time_limit, max_iterations)
+        labels, matrix, start, hops = self._tsp_input(start_vertex)
+        with phase("branch_and_bound"):
+            distance, tour, certificate = branch_and_bound(matrix, start, budget=budget)
+        self.last_tsp_stats = budget.stats(solver="branch_and_bound", **certificate)
+        return distance, self._tour_labels(labels, tour, hops)
+
+    def _iterated_local_search(self, start_vertex, k, time_limit, max_iterations, seed, solver, workers=1,
+                               construction="nearest_neighbour", lk_depth=5):
+        """
+        从 construction 构造的回路出发，在预算内运行候选表上的迭代局部搜索（2-opt、Or-opt、Or-3opt 和深度至多 lk_depth 的
+        Lin-Kernighan 式移动，double-bridge 扰动），并把统计写入 `last_tsp_stats`。
+        workers 大于 1 时改为在进程池中并行运行多起点搜索（见 tsp_parallel.py）。
+        """
+        if self.weight_source is not None:
+            return self._candidate_local_search(start_vertex, time_limit, max_iterations, seed, solver, workers,
+                                                construction or "greedy", lk_depth)
+        construction = construction or "nearest_neighbour"
+        budget = SolveBudget(time_limit, max_iterations)
+        labels, matrix, start, hops = self._tsp_input(start_vertex)
+        with phase("candidates"):
+            candidates = candidate_lists(matrix, k)
+        if workers > 1:
+            # 工作进程中的搜索不在剖析范围内，只记录整个并行阶段的耗时
+            with phase("parallel"):
+                cost, tour, info = parallel_multistart(matrix, candidates, start, budget, workers,
+                                                       construction=construction, lk_depth=lk_depth, seed=seed)
+            self.last_tsp_stats = budget.stats(solver=solver, construction=construction, lk_depth=lk_depth, **info)
+            return cost, self._tour_labels(labels, tour, hops)
+        with phase("construction"):
+            tour = construct_tour(matrix, start, construction)
+        search = LocalSearch(matrix, candidates, tour, lk_depth)
+        budget.improve(search.cost)
+        with phase("local_search"):
+            iterated_local_search(search, budget, np.random.default_rng(seed))
+        self.last_tsp_stats = budget.stats(solver=solver, construction=construction, lk_depth=lk_depth)
+        return float(search.cost), self._tour_labels(labels, search.closed_tour(start), hops)
+
+    def _candidate_local_search(self, start_vertex, time_limit, max_iterations, seed, solver, workers, construction,
+                                lk_depth):
+        """
+        候选图上的迭代局部搜索：初始回路只用候选边构造，`LocalSearch` 的候选邻居就是候选图的边，
+        其余距离由 weight_source 按需计算。不建立 n×n 矩阵。顶点数不少于 `two_level_threshold` 时，
+        第一轮 2-opt 在 `TwoLevelTour` 上进行，之后再交给数组表示的 `LocalSearch`。
+        """
+        if start_vertex not in self.graph:
+            raise KeyError("Start vertex must exist in the graph.")
+        if workers > 1:
+            raise ValueError("Parallel search shares a distance matrix; use workers=1 on a candidate graph.")
+        budget = SolveBudget(time_limit, max_iterations)
+        weights = self.weight_source
+        profiler = active()
+        if profiler is not None:
+            weights = profiler.instrument_weights(weights)
+        indptr, indices, lengths = self.csr_arrays()
+        start = self.vertex_id(start_vertex)
+        with phase("construction"):
+            tour = candidate_tour(weights, indptr, indices, lengths, start, construction)
+        with phase("candidates"):
+            candidates = candidate_rows(indptr, indices, lengths)
+        if len(tour) >= self.two_level_threshold:
+            # 大实例的第一轮 2-opt 有大量长距离翻转，先在翻转代价为 O(√n) 的两级链表上做完
+            with phase("two_level_two_opt"):
+                two_level = TwoLevelTour(tour)
+                two_opt(two_level, weights, candidates, deadline=budget.deadline)
+                tour = two_level.tour().tolist()
+        search = LocalSearch(weights, candidates, tour, lk_depth)
+        budget.improve(search.cost)
+        with phase("local_search"):
+            iterated_local_search(search, budget, np.random.default_rng(seed))
+        self.last_tsp_stats = budget.stats(solver=solver, construction=construction, lk_depth=lk_depth,
+                                           candidates=len(indices))
+        labels = self.vertex_labels()
+        return float(search.cost), [labels[i] for i in search.closed_tour(start)]
+
+    @profiled
+    def tsp_large_graph(self, start, time_limit=0.4, max_iterations=None, seed=0, workers=1,
+                        construction=None) -> tuple[float, list]: 
         """
         解决大（~1000节点）完全图的旅行商问题，从指定节点开始。
         任务要求[!]: 不需要找到最优路径。必须在0.5秒内运行。
+
+        从构造出的回路（默认为最近邻）出发，先用候选邻居表上的 2-opt/Or-opt/Or-3opt 和有界深度的 Lin-Kernighan 式移动得到局部最优，
+        然后在剩余时间内做"double-bridge 扰动 + 局部修复"的迭代局部搜索（见 tsp_local_search.py），时间用完时返回最好的回路。
+        求解统计（包括质量-时间轨迹 trace）保存在 `last_tsp_stats` 中。
+        不是完全图时先求度量闭包（见 `all_pairs_shortest_paths`），返回的路径中每一段展开为图中真实的最短路径。
+        对 `candidate_graph` 建立的候选图，构造和局部搜索只使用候选边和按需计算的距离，内存随 n 线性增长。
         
         参数：
         - start: 起始节点
+        - time_limit (float, optional): 最长运行时间（秒）。默认为 0.4 秒。
+        - max_iterations (int, optional): 最多的扰动次数。默认为 None（不限次数）。
+        - seed (int, optional): 扰动使用的随机数种子。默认为 0。
+        - workers (int, optional): 大于 1 时用这么多个进程并行做多起点搜索，距离矩阵通过共享内存传给各进程，
+          进程之间定期交换最好回路；进程启动本身也计入 time_limit。默认为 1（单进程）。
+        - construction (str, optional): 初始回路的构造方法，见 `tsp_construct.CONSTRUCTIONS`
+          （nearest_neighbour、greedy、cheapest_insertion、farthest_insertion、space_filling）。默认为最近邻；
+          候选图（见 `candidate_graph`）上只能用 greedy（默认）或 space_filling。
         
         返回：
         - 一个包含总距离和路径顶点列表的元组。
+
+        抛出：
+        - KeyError: 起点不在图中。
+        - ValueError: 未知的构造方法。
         """
-        # 代码写这里
-        return 0, []
+        return self._iterated_local_search(start, 8, time_limit, max_iterations, seed, "tsp_large_graph", workers,
+                                           construction)
         
 
-    def tsp_medium_graph(self, start_vertex) -> tuple[float, list]:
+    @profiled
+    def tsp_medium_graph(self, start_vertex, time_limit=0.4, max_iterations=None, seed=0, workers=1,
+                         construction=None) -> tuple[float, list]:
         """
         解决中型（~300节点）完全图的旅行商问题，从指定节点开始。
         任务要求[!]: 需要找到相对较优的路径，结果应该优于简单贪心算法。必须在0.5秒内运行。
+
+        从构造出的回路（默认为最近邻）出发，先用候选邻居表上的 2-opt/Or-opt/Or-3opt 和有界深度的 Lin-Kernighan 式移动得到局部最优，
+        然后在剩余时间内做"double-bridge 扰动 + 局部修复"的迭代局部搜索（见 tsp_local_search.py），时间用完时返回最好的回路。
+        求解统计（包括质量-时间轨迹 trace）保存在 `last_tsp_stats` 中。
+        不是完全图时先求度量闭包（见 `all_pairs_shortest_paths`），返回的路径中每一段展开为图中真实的最短路径。
+        对 `candidate_graph` 建立的候选图，构造和局部搜索只使用候选边和按需计算的距离，内存随 n 线性增长。
         
         参数：
         - start_vertex: 起始节点
-        - time_limit: 最大允许时间（秒）
+        - time_limit (float, optional): 最大允许时间（秒）。默认为 0.4 秒。
+        - max_iterations (int, optional): 最多的扰动次数。默认为 None（不限次数）。
+        - seed (int, optional): 扰动使用的随机数种子。默认为 0。
+        - workers (int, optional): 大于 1 时用这么多个进程并行做多起点搜索，距离矩阵通过共享内存传给各进程，
+          进程之间定期交换最好回路；进程启动本身也计入 time_limit。默认为 1（单进程）。
+        - construction (str, optional): 初始回路的构造方法，见 `tsp_construct.CONSTRUCTIONS`
+          （nearest_neighbour、greedy、cheapest_insertion、farthest_insertion、space_filling）。默认为最近邻；
+          候选图（见 `candidate_graph`）上只能用 greedy（默认）或 space_filling。
+
+        返回：
+        - 一个包含总距离和路径顶点列表的元组。
+
+        抛出：
+        - KeyError: 起点不在图中。
+        - ValueError: 未知的构造方法。
+        """
+        return self._iterated_local_search(start_vertex, 10, time_limit, max_iterations, seed, "tsp_medium_graph",
+                                           workers, construction)
+
+    @profiled
+    def solve_tsp(self, start, time_limit=1.0, strategy="auto", max_iterations=None, seed=0, **options):
+        """
+        按实例规模和时间预算自动选择算法求解旅行商问题，从指定节点开始。
+
+        strategy 为 "auto" 时由 `tsp_solvers.choose_strategy` 选择：预计能在一半预算内算完时用 Held-Karp，
+        小的对称实例在预算充足时用分支定界，非对称（有向图）实例用模拟退火，预算充足的中小实例用 EAX 遗传算法，
+        其余用迭代局部搜索。也可以直接指定 `tsp_solvers.TSP_SOLVERS` 中的引擎名；不超过 3 个顶点时总是用 "exact"。
+        不是完全图时先求度量闭包（见 `all_pairs_shortest_paths`），返回的路径中每一段展开为图中真实的最短路径；
+        候选图（见 `candidate_graph`）只支持 "local_search"。
+
+        无论用哪个引擎，`last_tsp_stats` 都具有相同的结构（见 `tsp_solvers.tsp_stats`）：best_cost、iterations、
+        elapsed、trace、solver、strategy、optimal、lower_bound、gap 和引擎自己的 details。
+
+        参数：
+        - start: 起始节点
+        - time_limit (float, optional): 最长运行时间（秒）。默认为 1 秒；None 表示不限时。
+        - strategy (str, optional): "auto" 或引擎名（exact、local_search、annealing、genetic）。默认为 "auto"。
+        - max_iterations (int, optional): 最多的迭代次数，含义由引擎决定。默认为 None（不限次数）。
+        - seed (int, optional): 随机数种子。默认为 0。
+        - options: 传给引擎的其他参数，例如 local_search 的 construction、lk_depth，genetic 的 population。
 
         返回：
         - 一个包含总距离和路径顶点列表的元组。
+
+        抛出：
+        - KeyError: 起点不在图中。
+        - ValueError: 未知的策略，或引擎不支持这个实例（例如对非对称矩阵使用 local_search）。
         """
-        # 代码写这里
-        return 0, []
-            
-        
\ No newline at end of file
+        if strategy != "auto" and strategy not in TSP_SOLVERS:
+            raise ValueError(f"Unknown strategy {strategy!r}; expected 'auto' or one of {sorted(TSP_SOLVERS)}.")
+        if self.weight_source is not None:
+            if strategy not in ("auto", "local_search"):
+                raise ValueError("Candidate graphs have no distance matrix; use strategy='local_search'.")
+            distance, path = self._candidate_local_search(start, time_limit, max_iterations, seed, "local_search", 1,
+                                                          options.get("construction") or "greedy",
+                                                          options.get("lk_depth", 5))
+            stats = self.last_tsp_stats
+            details = {key: stats.pop(key) for key in ("construction", "lk_depth", "candidates")}
+            stats.pop("solver")
+            self.last_tsp_stats = {**stats, "solver": "local_search", "strategy": strategy, "optimal": False,
+                                   "lower_bound": None, "gap": None, "details": details}
+            return distance, path
+        budget = SolveBudget(time_limit, max_iterations)
+        labels, matrix, start, hops = self._tsp_input(start)
+        solver = strategy
+        # 不超过 3 个顶点时至多只有两条回路，不论指定哪个引擎都直接精确求解（启发式引擎假设至少有 4 个顶点）
+        if strategy == "auto" or len(matrix) <= 3:
+            solver = choose_strategy(len(matrix), time_limit, np.array_equal(matrix, matrix.T), max_iterations)
+        with phase(solver):
+            distance, tour, info = TSP_SOLVERS[solver](matrix, start, budget, np.random.default_rng(seed),
+                                                       **options)
+        self.last_tsp_stats = tsp_stats(budget, solver, strategy, info)
+        return float(distance), self._tour_labels(labels, tour, hops)
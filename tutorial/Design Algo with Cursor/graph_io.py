@@ -0,0 +1,151 @@
+"""
+图的二进制文件格式，用来代替 pickle 保存测试和求解用的图。
+
+文件布局（所有整数都是小端序）：
+
+- 6 字节魔数 `\\x93GRAPH`，1 字节主版本号，1 字节次版本号；
+- 4 字节无符号整数：头部长度；
+- 头部：UTF-8 编码的 JSON，用空格补齐，使数据区从 64 字节对齐的位置开始。
+  记录 `directed`、`storage`、顶点数 `n`、顶点标签表的编码方式，以及每个数组的
+  `dtype`、`shape` 和相对数据区起点的 `offset`；
+- 数据区：各数组的原始字节（与 `.npy` 相同的 C 顺序），每个数组从 64 字节对齐的位置开始。
+
+稠密图保存 n×n 的 `matrix`，其他后端保存 CSR 数组 `indptr`、`indices`、`weights`。
+顶点标签是 0..n-1 时不占空间；是整数时保存为 int64 数组 `labels`；否则（字符串、浮点数）写进头部的 JSON。
+
+读取时不执行任何代码，因此可以安全地加载不可信的文件。`mmap=True` 时数组直接映射文件
+（写时复制模式：修改图不会写回文件），加载几乎不花时间，也不会把整个矩阵读进内存。
+"""
+import json
+import struct
+
+import numpy as np
+
+from graph_storage import STORAGE_BACKENDS, CSRStorage, DenseStorage
+
+MAGIC = b"\x93GRAPH"
+VERSION = (1, 0)
+ALIGNMENT = 64
+
+
+def _aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def _label_table(labels):
+    """返回 `(编码方式, 头部中的标签或 None, 标签数组或 None)`。"""
+    n = len(labels)
+    if all(type(v) is int for v in labels):
+        if labels == list(range(n)):
+            return "range", None, None
+        return "int64", None, np.array(labels, dtype=np.int64)
+    if all(type(v) in (int, float, str) for v in labels):
+        return "json", labels, None
+    raise ValueError("Only int, float and str vertex labels can be saved in the binary graph format.")
+
+
+def save_graph(graph, path):
+    """
+    把图写入二进制文件。
+
+    参数：
+    - graph (Graph): 要保存的图。
+    - path (str): 文件路径。
+
+    抛出：
+    - ValueError: 顶点标签不是 int、float 或 str。
+    """
+    labels = graph.vertex_labels()
+    encoding, json_labels, label_array = _label_table(labels)
+    kind = graph.graph.kind
+    if kind == "dense":
+        arrays = {"matrix": np.ascontiguousarray(graph.weight_matrix(), dtype=np.float64)}
+    else:
+        indptr, indices, weights = graph.csr_arrays()
+        arrays = {"indptr": np.ascontiguousarray(indptr, dtype=np.int64),
+                  "indices": np.ascontiguousarray(indices, dtype=np.int64),
+                  "weights": np.ascontiguousarray(weights, dtype=np.float64)}
+    if label_array is not None:
+        arrays["labels"] = label_array
+
+    table, offset = {}, 0
+    for name, array in arrays.items():
+        table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+    header = {"directed": graph.directed, "storage": kind, "n": len(labels),
+              "labels": encoding, "label_values": json_labels, "arrays": table}
+    text = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = len(MAGIC) + 2 + 4
+    text += b" " * (_aligned(prefix + len(text) + 1) - prefix - len(text) - 1) + b"\n"
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + bytes(VERSION) + struct.pack("<I", len(text)) + text)
+        data_start = f.tell()
+        for name, array in arrays.items():
+            f.seek(data_start + table[name]["offset"])
+            array.tofile(f)
+        f.truncate(data_start + offset)
+
+
+def read_header(path):
+    """
+    读取并校验文件头。
+
+    返回：
+    - `(header, data_start)`：解析后的 JSON 头部和数据区在文件中的起始位置。
+
+    抛出：
+    - ValueError: 不是图文件，或主版本号不受支持。
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + 2 + 4)
+        if len(prefix) < len(MAGIC) + 6 or prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path!r} is not a binary graph file.")
+        major, minor = prefix[len(MAGIC)], prefix[len(MAGIC) + 1]
+        if major != VERSION[0]:
+            raise ValueError(f"Unsupported graph file version {major}.{minor}; expected {VERSION[0]}.x.")
+        (length,) = struct.unpack("<I", prefix[len(MAGIC) + 2:])
+        header = json.loads(f.read(length).decode("utf-8"))
+    return header, len(prefix) + length
+
+
+def load_graph(cls, path, mmap=True):
+    """
+    从二进制文件加载图。
+
+    参数：
+    - cls (type): 要创建的图类（`Graph` 或其子类）。
+    - path (str): 文件路径。
+    - mmap (bool): 为 True 时以写时复制模式映射文件，不复制数据；为 False 时把数组读进内存。
+
+    返回：
+    - cls 的实例，存储后端与保存时相同。
+    """
+    header, data_start = read_header(path)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        offset = data_start + spec["offset"]
+        if mmap and int(np.prod(shape)) > 0:
+            # 转成普通 ndarray 视图（仍然引用同一块映射），避免 memmap 子类在后续运算中传播
+            arrays[name] = np.asarray(np.memmap(path, dtype=dtype, mode="c", offset=offset, shape=shape))
+        else:
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+    n = header["n"]
+    if header["labels"] == "range":
+        labels = list(range(n))
+    elif header["labels"] == "int64":
+        labels = arrays["labels"].tolist()
+    else:
+        labels = header["label_values"]
+
+    kind = header["storage"]
+    graph = cls(directed=header["directed"], storage=kind)
+    if kind == "dense":
+        graph.graph = DenseStorage.from_matrix(labels, arrays["matrix"])
+    elif kind == "csr":
+        graph.graph = CSRStorage.from_arrays(labels, arrays["indptr"], arrays["indices"], arrays["weights"], copy=False)
+    else:
+        graph.graph = STORAGE_BACKENDS[kind].from_arrays(labels, arrays["indptr"], arrays["indices"], arrays["weights"])
+    return graph
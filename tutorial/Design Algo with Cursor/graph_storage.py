@@ -0,0 +1,464 @@
+"""
+图的存储后端。
+
+`Graph` 不直接操作字典，而是把顶点和边交给这里的存储对象保管。所有后端都提供同一组接口：
+
+- `DictStorage`：原来的字典嵌套字典（`graph[src][dest] = weight`），适合小图和频繁修改。
+- `DenseStorage`：顶点标签映射为连续整数编号，边权存放在 NumPy 距离矩阵中，适合完全图。
+- `CSRStorage`：顶点同样映射为连续编号，边存放在 CSR（压缩稀疏行）数组中，适合稀疏图。
+
+三种后端都可以像字典一样读取（`storage[v]` 返回 `{邻居: 权重}`），并且都能导出
+`weight_matrix()` 和 `csr_arrays()`，供求解器按编号做向量化计算。
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+INF = float('inf')
+
+
+def _relabel_arrays(labels, indptr, indices, weights):
+    """把 CSR 数组整理成 `(labels, indptr, indices, weights)` 的标准 NumPy 形式。"""
+    return (list(labels),
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int64),
+            np.asarray(weights, dtype=np.float64))
+
+
+def _dense_from_csr(n, indptr, indices, weights):
+    """由 CSR 数组构造 n×n 的距离矩阵，缺失的边为无穷大。"""
+    matrix = np.full((n, n), INF)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    matrix[rows, indices] = weights
+    return matrix
+
+
+class DictStorage(dict):
+    """
+    字典嵌套字典的存储后端，与原来的 `Graph.graph` 完全兼容。
+
+    它本身就是一个 `dict`，因此 `graph.graph[src][dest]`、`str(graph.graph)` 等旧用法保持不变。
+    顶点编号按插入顺序确定，`vertex_id()` 查的是一张 `{标签: 编号}` 字典；删除顶点会让后面的编号前移，
+    这张表在下一次查询时重建。`weight_matrix()` 和 `csr_arrays()` 每次调用都会重新生成数组。
+    """
+
+    kind = "dict"
+    # 标签到编号的缓存，None 表示需要重建（从 pickle 恢复的对象也从 None 开始）
+    _ids = None
+
+    def __init__(self, data=None, capacity=0):
+        super().__init__(data or {})
+
+    def add_vertex(self, vertex):
+        if vertex not in self:
+            self[vertex] = {}
+            if self._ids is not None:
+                self._ids[vertex] = len(self._ids)
+
+    def has_edge(self, src, dest):
+        return dest in self[src]
+
+    def set_edge(self, src, dest, weight):
+        self[src][dest] = weight
+
+    def delete_edge(self, src, dest):
+        del self[src][dest]
+
+    def delete_vertex(self, vertex, predecessors=None):
+        # 从其他顶点移除到该顶点的边：知道前驱时只访问前驱，否则扫描全部顶点
+        for adj in list(self) if predecessors is None else predecessors(vertex):
+            if vertex in self[adj]:
+                del self[adj][vertex]
+        # 移除该顶点本身，之后的顶点编号都会前移
+        del self[vertex]
+        self._ids = None
+
+    def neighbors(self, vertex):
+        return list(self[vertex])
+
+    def degree(self, vertex):
+        return len(self[vertex])
+
+    def weight(self, src, dest):
+        return self[src].get(dest, INF)
+
+    def vertex_labels(self):
+        return list(self)
+
+    def vertex_id(self, vertex):
+        ids = self._ids
+        # 直接通过 dict 接口增删的顶点不会更新缓存，数量对不上或查不到时重建
+        if ids is None or len(ids) != len(self) or vertex not in ids:
+            ids = self._ids = {label: i for i, label in enumerate(self)}
+        return ids[vertex]
+
+    def csr_arrays(self):
+        labels = list(self)
+        n = len(labels)
+        # 顶点恰好是 0..n-1 时无需再查表，这是 generate_graph 生成的图的常见情况
+        identity = labels == list(range(n))
+        index = None if identity else {label: i for i, label in enumerate(labels)}
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indices, weights = [], []
+        for i, label in enumerate(labels):
+            row = self[label]
+            indices.extend(row if identity else (index[v] for v in row))
+            weights.extend(row.values())
+            indptr[i + 1] = len(indices)
+        return indptr, np.array(indices, dtype=np.int64), np.array(weights, dtype=np.float64)
+
+    def weight_matrix(self):
+        indptr, indices, weights = self.csr_arrays()
+        return _dense_from_csr(len(self), indptr, indices, weights)
+
+    @classmethod
+    def from_arrays(cls, labels, indptr, indices, weights):
+        storage = cls()
+        labels, indptr, indices, weights = _relabel_arrays(labels, indptr, indices, weights)
+        targets = [labels[j] for j in indices.tolist()]
+        weights = weights.tolist()
+        for i, label in enumerate(labels):
+            lo, hi = indptr[i], indptr[i + 1]
+            storage[label] = dict(zip(targets[lo:hi], weights[lo:hi]))
+        return storage
+
+
+class _ArrayStorage(Mapping):
+    """
+    基于数组的存储后端的公共部分：维护顶点标签与连续整数编号之间的映射。
+
+    读取 `storage[v]` 会返回一个新建的 `{邻居: 权重}` 字典，修改它不会影响图本身。
+    删除顶点时，把编号最大的顶点移动到被删除的位置，以保持编号连续。
+    """
+
+    kind = None
+
+    def __init__(self, capacity=0):
+        self._index = {}
+        self._labels = []
+
+    # Mapping 接口
+    def __getitem__(self, vertex):
+        i = self._index[vertex]
+        ids, weights = self._row(i)
+        labels = self._labels
+        return {labels[j]: w for j, w in zip(ids.tolist(), weights.tolist())}
+
+    def __iter__(self):
+        return iter(self._labels)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __contains__(self, vertex):
+        return vertex in self._index
+
+    def __repr__(self):
+        return repr({v: self[v] for v in self._labels})
+
+    def vertex_labels(self):
+        return list(self._labels)
+
+    def vertex_id(self, vertex):
+        return self._index[vertex]
+
+    def neighbors(self, vertex):
+        ids, _ = self._row(self._index[vertex])
+        labels = self._labels
+        return [labels[j] for j in ids.tolist()]
+
+    def degree(self, vertex):
+        return len(self._row(self._index[vertex])[0])
+
+    def _append_label(self, vertex):
+        self._index[vertex] = len(self._labels)
+        self._labels.append(vertex)
+
+    def _drop_label(self, vertex):
+        """删除顶点标签，返回 `(被删除的编号, 被移动过来的最后一个编号)`。"""
+        i = self._index.pop(vertex)
+        last = len(self._labels) - 1
+        moved = self._labels.pop()
+        if i != last:
+            self._labels[i] = moved
+            self._index[moved] = i
+        return i, last
+
+
+class DenseStorage(_ArrayStorage):
+    """
+    稠密矩阵存储后端，适合完全图。
+
+    边权存放在一个按容量预留的 float64 矩阵中，不存在的边记为无穷大。
+    `weight_matrix()` 返回矩阵左上角 n×n 部分的视图，不复制数据；
+    图发生修改（特别是增删顶点）后应重新获取该视图。
+    """
+
+    kind = "dense"
+
+    def __init__(self, capacity=0):
+        super().__init__()
+        self._matrix = np.full((capacity, capacity), INF)
+
+    def _grow(self, size):
+        capacity = self._matrix.shape[0]
+        if size <= capacity:
+            return
+        new_capacity = max(size, 4, capacity + capacity // 2)
+        matrix = np.full((new_capacity, new_capacity), INF)
+        matrix[:capacity, :capacity] = self._matrix
+        self._matrix = matrix
+
+    def _row(self, i):
+        row = self._matrix[i, :len(self._labels)]
+        ids = np.flatnonzero(row != INF)
+        return ids, row[ids]
+
+    def add_vertex(self, vertex):
+        if vertex not in self._index:
+            self._grow(len(self._labels) + 1)
+            self._append_label(vertex)
+
+    def has_edge(self, src, dest):
+        return self._matrix[self._index[src], self._index[dest]] != INF
+
+    def set_edge(self, src, dest, weight):
+        self._matrix[self._index[src], self._index[dest]] = weight
+
+    def delete_edge(self, src, dest):
+        self._matrix[self._index[src], self._index[dest]] = INF
+
+    def delete_vertex(self, vertex, predecessors=None):
+        # 矩阵的行列搬移本来就是 O(n)，不需要前驱信息
+        i, last = self._drop_label(vertex)
+        m = self._matrix
+        if i != last:
+            # 先搬行再搬列，m[i, i] 最终取到的是原来最后一个顶点的自环
+            m[i, :last + 1] = m[last, :last + 1]
+            m[:last + 1, i] = m[:last + 1, last]
+        m[last, :last + 1] = INF
+        m[:last + 1, last] = INF
+
+    def weight(self, src, dest):
+        return float(self._matrix[self._index[src], self._index[dest]])
+
+    def weight_matrix(self):
+        n = len(self._labels)
+        return self._matrix[:n, :n]
+
+    def csr_arrays(self):
+        matrix = self.weight_matrix()
+        finite = matrix != INF
+        indptr = np.zeros(len(self._labels) + 1, dtype=np.int64)
+        np.cumsum(finite.sum(axis=1), out=indptr[1:])
+        rows, cols = np.nonzero(finite)
+        return indptr, cols.astype(np.int64), matrix[rows, cols]
+
+    @classmethod
+    def from_arrays(cls, labels, indptr, indices, weights):
+        labels, indptr, indices, weights = _relabel_arrays(labels, indptr, indices, weights)
+        storage = cls()
+        storage._labels = labels
+        storage._index = {label: i for i, label in enumerate(labels)}
+        storage._matrix = _dense_from_csr(len(labels), indptr, indices, weights)
+        return storage
+
+    @classmethod
+    def from_matrix(cls, labels, matrix):
+        """直接接管一个 n×n 的 float64 距离矩阵（不存在的边为无穷大），不复制数据。"""
+        storage = cls()
+        storage._labels = list(labels)
+        storage._index = {label: i for i, label in enumerate(storage._labels)}
+        storage._matrix = matrix
+        return storage
+
+
+class CSRStorage(_ArrayStorage):
+    """
+    CSR 存储后端，适合稀疏图。
+
+    每个顶点的出边占用 `indices`/`weights` 缓冲区中一段连续空间，并预留少量空位；
+    某一行写满时把它整体搬到缓冲区末尾并将容量翻倍，因此逐条加边是均摊 O(1) 的。
+    `csr_arrays()` 返回去掉空位后的标准 CSR 数组 `(indptr, indices, weights)`，在下次修改前会被缓存。
+    """
+
+    kind = "csr"
+
+    def __init__(self, capacity=0):
+        super().__init__()
+        self._start = np.zeros(capacity, dtype=np.int64)
+        self._deg = np.zeros(capacity, dtype=np.int64)
+        self._cap = np.zeros(capacity, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._weights = np.zeros(0, dtype=np.float64)
+        self._used = 0
+        self._compact = None
+
+    def _row(self, i):
+        s = self._start[i]
+        e = s + self._deg[i]
+        return self._indices[s:e], self._weights[s:e]
+
+    def _reserve_buffer(self, size):
+        if size <= len(self._indices):
+            return
+        size = max(size, 16, 2 * len(self._indices))
+        indices = np.zeros(size, dtype=np.int64)
+        weights = np.zeros(size, dtype=np.float64)
+        indices[:self._used] = self._indices[:self._used]
+        weights[:self._used] = self._weights[:self._used]
+        self._indices, self._weights = indices, weights
+
+    def _position(self, i, j):
+        s = self._start[i]
+        hits = np.flatnonzero(self._indices[s:s + self._deg[i]] == j)
+        return s + hits[0] if len(hits) else -1
+
+    def add_vertex(self, vertex):
+        if vertex in self._index:
+            return
+        n = len(self._labels)
+        if n == len(self._start):
+            size = max(4, 2 * n)
+            for name in ("_start", "_deg", "_cap"):
+                array = np.zeros(size, dtype=np.int64)
+                array[:n] = getattr(self, name)
+                setattr(self, name, array)
+        self._start[n] = self._used
+        self._deg[n] = 0
+        self._cap[n] = 0
+        self._append_label(vertex)
+        self._compact = None
+
+    def has_edge(self, src, dest):
+        return self._position(self._index[src], self._index[dest]) >= 0
+
+    def set_edge(self, src, dest, weight):
+        i, j = self._index[src], self._index[dest]
+        p = self._position(i, j)
+        if p < 0:
+            deg = self._deg[i]
+            if deg == self._cap[i]:
+                # 该行已满：搬到缓冲区末尾并把容量翻倍
+                cap = max(4, 2 * deg)
+                self._reserve_buffer(self._used + cap)
+                s = self._start[i]
+                self._indices[self._used:self._used + deg] = self._indices[s:s + deg]
+                self._weights[self._used:self._used + deg] = self._weights[s:s + deg]
+                self._start[i] = self._used
+                self._cap[i] = cap
+                self._used += cap
+            p = self._start[i] + deg
+            self._indices[p] = j
+            self._deg[i] = deg + 1
+        self._weights[p] = weight
+        self._compact = None
+
+    def delete_edge(self, src, dest):
+        i = self._index[src]
+        p = self._position(i, self._index[dest])
+        if p < 0:
+            raise KeyError(dest)
+        # 用该行最后一条边填补空位
+        last = self._start[i] + self._deg[i] - 1
+        self._indices[p] = self._indices[last]
+        self._weights[p] = self._weights[last]
+        self._deg[i] -= 1
+        self._compact = None
+
+    def _in_sources(self, i):
+        """扫描全部边，找出所有指向编号 i 的顶点标签。"""
+        indptr, indices, _ = self.csr_arrays()
+        owners = np.repeat(np.arange(len(self._labels)), np.diff(indptr))
+        return [self._labels[u] for u in np.unique(owners[indices == i]).tolist()]
+
+    def delete_vertex(self, vertex, predecessors=None):
+        """
+        predecessors(label) 给出指向某个顶点的所有顶点时，只访问这些行（O(度数)）；
+        否则扫描全部边找入边，并在整个缓冲区中重新编号被移动的顶点（O(m)）。
+        """
+        i = self._index[vertex]
+        # 从其他顶点移除到该顶点的边
+        sources = self._in_sources(i) if predecessors is None else predecessors(vertex)
+        for u in sources:
+            if u != vertex and self._position(self._index[u], i) >= 0:
+                self.delete_edge(u, vertex)
+        self._deg[i] = 0
+        moved = self._labels[-1]
+        moved_sources = None if predecessors is None or moved == vertex else list(predecessors(moved))
+        i, last = self._drop_label(vertex)
+        if i != last:
+            # 最后一个顶点改用编号 i
+            for name in ("_start", "_deg", "_cap"):
+                array = getattr(self, name)
+                array[i] = array[last]
+            if moved_sources is None:
+                buffer = self._indices[:self._used]
+                buffer[buffer == last] = i
+            else:
+                for u in moved_sources:
+                    if u != vertex:
+                        p = self._position(self._index[u], last)
+                        if p >= 0:
+                            self._indices[p] = i
+        self._compact = None
+
+    def weight(self, src, dest):
+        i = self._index[src]
+        p = self._position(i, self._index[dest])
+        return float(self._weights[p]) if p >= 0 else INF
+
+    def csr_arrays(self):
+        if self._compact is None:
+            n = len(self._labels)
+            deg = self._deg[:n]
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(deg, out=indptr[1:])
+            # 每条边在缓冲区中的位置 = 所在行的起点 + 行内偏移
+            gather = np.repeat(self._start[:n] - indptr[:-1], deg) + np.arange(indptr[-1])
+            self._compact = (indptr, self._indices[gather], self._weights[gather])
+        return self._compact
+
+    def weight_matrix(self):
+        indptr, indices, weights = self.csr_arrays()
+        return _dense_from_csr(len(self._labels), indptr, indices, weights)
+
+    @classmethod
+    def from_arrays(cls, labels, indptr, indices, weights, copy=True):
+        """copy=False 时直接使用传入的 indices/weights 数组（例如写时复制的内存映射），加边时会就地修改它们。"""
+        labels, indptr, indices, weights = _relabel_arrays(labels, indptr, indices, weights)
+        n = len(labels)
+        storage = cls()
+        storage._labels = labels
+        storage._index = {label: i for i, label in enumerate(labels)}
+        deg = np.diff(indptr)
+        storage._start = indptr[:-1].copy()
+        storage._deg = deg.copy()
+        storage._cap = deg.copy()
+        storage._indices = indices.copy() if copy else indices
+        storage._weights = weights.copy() if copy else weights
+        storage._used = int(indptr[n])
+        return storage
+
+
+STORAGE_BACKENDS = {
+    "dict": DictStorage,
+    "dense": DenseStorage,
+    "csr": CSRStorage,
+}
+
+
+def make_storage(kind, capacity=0):
+    """
+    按名称创建存储后端。
+
+    参数：
+    - kind (str): "dict"、"dense" 或 "csr"。
+    - capacity (int): 预计的顶点数，用于预先分配数组，避免反复扩容。
+
+    抛出：
+    - ValueError: 如果 `kind` 不是已知的后端名称。
+    """
+    if kind not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {kind!r}. Choose from {sorted(STORAGE_BACKENDS)}.")
+    return STORAGE_BACKENDS[kind](capacity=capacity)
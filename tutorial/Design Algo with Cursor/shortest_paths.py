@@ -0,0 +1,535 @@
+"""
+最短路径引擎。
+
+这里的函数和类只处理整数编号的顶点，边以 CSR 数组 `(indptr, indices, weights)` 给出
+（见 `Graph.csr_arrays()`）。`Graph_Advanced` 负责在顶点标签和编号之间转换。
+
+单源 / 点到点查询使用可以中断和继续的 Dijkstra 与 ALT 双向 A*；全源最短路径在稠密输入上使用向量化的
+Floyd–Warshall，在稀疏输入上对每个源点运行一次 Dijkstra（可以分给多个进程）。
+"""
+from collections import OrderedDict
+from heapq import heappop, heappush
+
+import numpy as np
+
+INF = float('inf')
+
+
+class ShortestPathTree:
+    """
+    以一个源点为根的 Dijkstra 最短路径树，使用二叉堆作为优先队列。
+
+    搜索在目标顶点被确定（出堆）时提前结束，但堆和已确定的距离都会保留下来，
+    之后查询更远的顶点时从中断处继续搜索，而不是从头开始。
+
+    属性：
+    - source (int): 源点编号。
+    - dist (dict): 已发现顶点的（暂定）距离，已确定顶点的距离是最终结果。
+    - parent (dict): 最短路径树中每个顶点的父顶点编号，源点为 -1。
+    - settled (set): 已确定最短距离的顶点编号。
+    """
+
+    def __init__(self, source, indptr, indices, weights):
+        self.source = source
+        self.dist = {source: 0.0}
+        self.parent = {source: -1}
+        self.settled = set()
+        self._heap = [(0.0, source)]
+        self._indptr = indptr
+        self._indices = indices
+        self._weights = weights
+
+    @property
+    def complete(self):
+        """搜索是否已经结束（所有可达顶点都已确定）。"""
+        return not self._heap
+
+    def settle(self, target=None):
+        """
+        继续 Dijkstra 搜索，直到目标顶点被确定或堆为空。
+
+        参数：
+        - target (int, optional): 目标顶点编号。为 None 时搜索整个可达部分。
+
+        返回：
+        - 目标顶点是否可达。
+        """
+        settled = self.settled
+        if target is not None and target in settled:
+            return True
+        heap, dist, parent = self._heap, self.dist, self.parent
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        while heap:
+            d, u = heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+            lo, hi = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[lo:hi].tolist(), weights[lo:hi].tolist()):
+                nd = d + w
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    parent[v] = u
+                    heappush(heap, (nd, v))
+            if u == target:
+                return True
+        return target in settled
+
+    def path(self, target):
+        """
+        沿父指针回溯出从源点到目标顶点的路径，耗时与路径长度成正比。目标顶点必须已确定。
+
+        返回：
+        - 顶点编号列表；不可达时返回空列表。
+        """
+        if target not in self.settled:
+            return []
+        path = []
+        parent = self.parent
+        while target != -1:
+            path.append(target)
+            target = parent[target]
+        path.reverse()
+        return path
+
+
+class ShortestPathCache:
+    """
+    按源点缓存 `ShortestPathTree` 的 LRU 缓存。
+
+    同一源点的后续查询直接复用缓存的树：目标已确定时只需回溯路径，否则从中断处继续搜索。
+    缓存绑定一份 CSR 快照，图被修改后应丢弃整个缓存。
+
+    参数：
+    - labels (list): 按编号排列的顶点标签。
+    - indptr, indices, weights: 图的 CSR 数组。
+    - maxsize (int): 最多缓存的最短路径树数量。
+    """
+
+    def __init__(self, labels, indptr, indices, weights, maxsize=64):
+        if len(weights) and weights.min() < 0:
+            raise ValueError("Dijkstra requires non-negative edge weights.")
+        self.labels = labels
+        self.index = {label: i for i, label in enumerate(labels)}
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.last_settled = 0
+        self._indptr = indptr.tolist()
+        self._indices = indices
+        self._weights = weights
+        self._trees = OrderedDict()
+
+    def tree(self, source):
+        """获取（必要时新建）源点的最短路径树，并把它标记为最近使用。"""
+        tree = self._trees.get(source)
+        if tree is None:
+            self.misses += 1
+            tree = ShortestPathTree(source, self._indptr, self._indices, self._weights)
+            self._trees[source] = tree
+            if len(self._trees) > self.maxsize:
+                self._trees.popitem(last=False)
+        else:
+            self.hits += 1
+            self._trees.move_to_end(source)
+        return tree
+
+    def query(self, source, target):
+        """
+        查询两个编号之间的最短路径。
+
+        本次查询新确定的顶点数记录在 `last_settled` 中（目标已在缓存中确定时为 0）。
+
+        返回：
+        - `(距离, 顶点编号列表)`；不可达时返回 `(inf, [])`。
+        """
+        tree = self.tree(source)
+        before = len(tree.settled)
+        reached = tree.settle(target)
+        self.last_settled = len(tree.settled) - before
+        if not reached:
+            return INF, []
+        return tree.dist[target], tree.path(target)
+
+    def info(self):
+        """返回缓存统计：命中次数、未命中次数、当前大小和容量。"""
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._trees), "maxsize": self.maxsize}
+
+
+def _settle_targets(tree, targets, paths):
+    """
+    在一棵最短路径树上依次确定多个目标。搜索可以继续，所以总工作量只相当于搜到最远的目标为止。
+
+    返回：
+    - `(距离列表, 路径列表或 None)`。
+    """
+    distances = []
+    found = [] if paths else None
+    for target in targets:
+        if tree.settle(target):
+            distances.append(tree.dist[target])
+            if paths:
+                found.append(tree.path(target))
+        else:
+            distances.append(INF)
+            if paths:
+                found.append([])
+    return distances, found
+
+
+# 进程池中每个工作进程持有的 CSR 数组，由 _init_search_worker 设置
+_worker_csr = None
+
+
+def _init_search_worker(indptr, indices, weights):
+    global _worker_csr
+    _worker_csr = (indptr.tolist(), indices, weights)
+
+
+def _search_group_chunk(chunk, paths):
+    return [_settle_targets(ShortestPathTree(source, *_worker_csr), targets, paths)
+            for source, targets in chunk]
+
+
+def search_groups(groups, indptr, indices, weights, paths=False, workers=1, cache=None):
+    """
+    对按源点分组的查询做多目标搜索：每个源点只运行一次 Dijkstra，直到它的所有目标都被确定。
+
+    参数：
+    - groups (dict): `{源点编号: [目标编号, ...]}`。
+    - indptr, indices, weights: 图的 CSR 数组。
+    - paths (bool): 是否同时回溯路径。
+    - workers (int): 大于 1 时把不同源点分给进程池并行搜索，每个工作进程只接收一次 CSR 数组。
+    - cache (ShortestPathCache, optional): 串行搜索时复用的最短路径树缓存。
+
+    返回：
+    - `{源点编号: (距离列表, 路径列表或 None)}`，列表顺序与该源点的目标顺序一致。
+    """
+    items = list(groups.items())
+    if workers > 1 and len(items) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # 每个工作进程分到若干块，兼顾负载均衡和调度开销
+        size = max(1, len(items) // (workers * 4))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                                 initargs=(indptr, indices, weights)) as pool:
+            results = [r for chunk in pool.map(_search_group_chunk, chunks, [paths] * len(chunks)) for r in chunk]
+        return {source: result for (source, _), result in zip(items, results)}
+    indptr_list = indptr.tolist() if cache is None else None
+    results = {}
+    for source, targets in items:
+        tree = cache.tree(source) if cache is not None else ShortestPathTree(source, indptr_list, indices, weights)
+        results[source] = _settle_targets(tree, targets, paths)
+    return results
+
+
+# Python 中的 Dijkstra 处理一条边的耗时，约为 Floyd–Warshall 中一个矩阵元素向量化松弛的这么多倍；
+# `all_pairs_method` 据此在两种算法之间选择
+DIJKSTRA_EDGE_COST = 300
+
+
+def hop_dtype(n):
+    """能容纳 n 个顶点编号（以及 -1）的最小有符号整数类型，用于紧凑的下一跳矩阵。"""
+    for dtype in (np.int16, np.int32):
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def floyd_warshall(matrix, rows=64):
+    """
+    向量化的 Floyd–Warshall 全源最短路径，同时维护下一跳矩阵。
+
+    中转顶点按编号依次处理，每个中转顶点 k 按每次 rows 行的小块扫描整个矩阵，临时数组留在缓存里。
+    经过 k 严格变短时 `hops[i, j]` 改为 `hops[i, k]`。只在严格变短时修改、且严格按中转顶点的顺序更新，
+    零权边和等长路径才不会让下一跳绕成环；分块处理中转顶点会打乱这个顺序，所以这里不分块。
+
+    参数：
+    - matrix (np.ndarray): n×n 邻接矩阵，不存在的边为无穷大，边权必须非负。
+    - rows (int): 每块的行数。
+
+    返回：
+    - `(dist, hops)`：n×n float64 距离矩阵（对角线为 0，不可达为无穷大）和下一跳矩阵
+      （`hops[i, i] = i`，不可达为 -1，类型见 `hop_dtype`）。
+    """
+    dist = np.array(matrix, dtype=np.float64)
+    n = len(dist)
+    dtype = hop_dtype(n)
+    hops = np.where(np.isfinite(dist), np.arange(n, dtype=dtype), -1).astype(dtype)
+    np.fill_diagonal(dist, 0.0)
+    np.fill_diagonal(hops, np.arange(n))
+    tmp = np.empty((rows, n))
+    better = np.empty((rows, n), dtype=bool)
+    for k in range(n):
+        # 第 k 行和第 k 列在这一轮中不会变短，可以直接读
+        row_k = dist[k]
+        for r in range(0, n, rows):
+            tile, hop_tile = dist[r:r + rows], hops[r:r + rows]
+            t, mask = tmp[:len(tile)], better[:len(tile)]
+            np.add(tile[:, k, None], row_k, out=t)
+            np.less(t, tile, out=mask)
+            np.copyto(tile, t, where=mask)
+            np.copyto(hop_tile, hop_tile[:, k, None], where=mask)
+    return dist, hops
+
+
+def _all_pairs_rows(sources, indptr, indices, weights, n):
+    """对每个源点运行一次完整的 Dijkstra，返回距离和最短路径树中每个顶点的父顶点（源点为它自己，未到达为 -1）。"""
+    dist_rows = np.full((len(sources), n), INF)
+    parent_rows = np.full((len(sources), n), -1, dtype=hop_dtype(n))
+    for row, source in enumerate(sources):
+        dist, parent = {source: 0.0}, {source: source}
+        settled = set()
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+            lo, hi = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[lo:hi].tolist(), weights[lo:hi].tolist()):
+                nd = d + w
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    parent[v] = u
+                    heappush(heap, (nd, v))
+        reached = list(dist)
+        dist_rows[row, reached] = list(dist.values())
+        parent_rows[row, reached] = [parent[v] for v in reached]
+    return dist_rows, parent_rows
+
+
+def _all_pairs_chunk(sources):
+    indptr, indices, weights = _worker_csr
+    return _all_pairs_rows(sources, indptr, indices, weights, len(indptr) - 1)
+
+
+def all_pairs_dijkstra(indptr, indices, weights, workers=1):
+    """
+    从每个顶点运行一次二叉堆 Dijkstra 得到全源最短路径，O(n·m log n)，适合稀疏图。
+
+    搜索在反向图上进行：以 j 为源点的最短路径树里，i 的父顶点就是原图中从 i 到 j 的下一跳，
+    所以 `hops[:, j]` 是一棵指向 j 的树，沿下一跳走不会绕成环（零权边和等长路径也一样）。
+
+    参数：
+    - indptr, indices, weights: 图的 CSR 数组，边权必须非负。
+    - workers (int): 大于 1 时把源点分块交给进程池，每个工作进程只接收一次 CSR 数组。
+
+    返回：
+    - `(dist, hops)`：n×n 距离矩阵和下一跳矩阵（见 `floyd_warshall`）。
+    """
+    n = len(indptr) - 1
+    rev_indptr, rev_indices, rev_weights = reverse_csr(indptr, indices, weights)
+    targets = list(range(n))
+    if workers > 1 and n > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        size = max(1, n // (workers * 4))
+        chunks = [targets[i:i + size] for i in range(0, n, size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                                 initargs=(rev_indptr, rev_indices, rev_weights)) as pool:
+            parts = list(pool.map(_all_pairs_chunk, chunks))
+        dist, parents = np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+    else:
+        dist, parents = _all_pairs_rows(targets, rev_indptr.tolist(), rev_indices, rev_weights, n)
+    return np.ascontiguousarray(dist.T), np.ascontiguousarray(parents.T)
+
+
+def all_pairs_method(n, m, workers=1):
+    """
+    按估计的运行时间在 "floyd_warshall"（O(n^3) 向量化运算）和 "dijkstra"（O(n·m) 次 Python 边松弛，
+    可以分给 workers 个进程）之间选择。
+    """
+    return "dijkstra" if m * DIJKSTRA_EDGE_COST < n * n * max(1, workers) else "floyd_warshall"
+
+
+def hop_path(hops, source, target):
+    """
+    沿下一跳矩阵展开从 source 到 target 的最短路径。
+
+    返回：
+    - 顶点编号列表；不可达时返回空列表。
+
+    抛出：
+    - ValueError: 走了 n 步还没到达 target，即下一跳矩阵中有环（不是本模块算出的矩阵）。
+    """
+    if hops[source, target] < 0:
+        return []
+    path = [source]
+    while source != target:
+        # 最短路径最多经过 n 个顶点，再走下去说明下一跳绕成了环
+        if len(path) >= len(hops):
+            raise ValueError(f"The next-hop matrix has a cycle on the way from {path[0]} to {target}.")
+        source = int(hops[source, target])
+        path.append(source)
+    return path
+
+
+def reverse_csr(indptr, indices, weights):
+    """
+    构造反向图的 CSR 数组：原图中的边 u→v 在反向图中变为 v→u。
+
+    返回：
+    - 反向图的 `(indptr, indices, weights)`。
+    """
+    n = len(indptr) - 1
+    sources = np.repeat(np.arange(n), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    rev_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n), out=rev_indptr[1:])
+    return rev_indptr, sources[order], weights[order]
+
+
+def single_source_distances(source, indptr, indices, weights):
+    """
+    用 Dijkstra 计算源点到所有顶点的距离。
+
+    返回：
+    - 长度为 n 的 float64 数组，不可达的顶点为无穷大。
+    """
+    tree = ShortestPathTree(source, indptr.tolist(), indices, weights)
+    tree.settle()
+    distances = np.full(len(indptr) - 1, INF)
+    distances[list(tree.dist)] = list(tree.dist.values())
+    return distances
+
+
+class LandmarkIndex:
+    """
+    ALT（A*、Landmark、Triangle inequality）预处理结果。
+
+    选出 k 个地标，保存每个顶点到地标、地标到每个顶点的距离，存放在两个形状为 (n, k) 的连续数组中
+    （无向图两者相同，只存一份）。对任意顶点 v 和目标 t，由三角不等式
+    d(v, t) >= d(L, t) - d(L, v) 以及 d(v, t) >= d(v, L) - d(t, L) 得到 A* 所需的下界。
+
+    参数：
+    - indptr, indices, weights: 图的 CSR 数组。
+    - k (int): 地标数量。
+    - directed (bool): 图是否为有向图。
+    - seed (int, optional): 选择第一个地标时使用的随机数种子。
+    """
+
+    def __init__(self, indptr, indices, weights, k, directed=False, seed=None):
+        n = len(indptr) - 1
+        k = min(k, n)
+        reverse = reverse_csr(indptr, indices, weights) if directed else None
+        rng = np.random.default_rng(seed)
+        landmarks = []
+        from_landmark = np.empty((k, n))
+        to_landmark = np.empty((k, n)) if directed else from_landmark
+        closest = np.full(n, INF)
+        candidate = int(rng.integers(n)) if n else 0
+        for i in range(k):
+            landmarks.append(candidate)
+            from_landmark[i] = single_source_distances(candidate, indptr, indices, weights)
+            if directed:
+                to_landmark[i] = single_source_distances(candidate, *reverse)
+            # 最远点选择：下一个地标取离已选地标最远的可达顶点
+            closest = np.minimum(closest, from_landmark[i])
+            scores = np.where(np.isfinite(closest), closest, -1.0)
+            scores[landmarks] = -1.0
+            candidate = int(np.argmax(scores))
+        self.landmarks = landmarks
+        self.from_landmark = np.ascontiguousarray(from_landmark.T)
+        self.to_landmark = self.from_landmark if not directed else np.ascontiguousarray(to_landmark.T)
+
+    @property
+    def nbytes(self):
+        """距离数组占用的字节数。"""
+        if self.to_landmark is self.from_landmark:
+            return self.from_landmark.nbytes
+        return self.from_landmark.nbytes + self.to_landmark.nbytes
+
+    def potential(self, source, target):
+        """
+        返回双向 A* 使用的平均势函数 p(v) = (π_t(v) - π_s(v)) / 2，
+        其中 π_t(v) 是 d(v, target) 的下界，π_s(v) 是 d(source, v) 的下界。结果按顶点缓存。
+        """
+        fs, ts = self.from_landmark[source].tolist(), self.to_landmark[source].tolist()
+        ft, tt = self.from_landmark[target].tolist(), self.to_landmark[target].tolist()
+        from_landmark, to_landmark = self.from_landmark, self.to_landmark
+        memo = {}
+
+        def p(v):
+            value = memo.get(v)
+            if value is None:
+                fv, tv = from_landmark[v].tolist(), to_landmark[v].tolist()
+                to_target = from_source = 0.0
+                for i in range(len(fv)):
+                    # 含无穷大的项无法给出有限下界，直接跳过
+                    bound = max(ft[i] - fv[i], tv[i] - tt[i])
+                    if to_target < bound < INF:
+                        to_target = bound
+                    bound = max(fv[i] - fs[i], ts[i] - tv[i])
+                    if from_source < bound < INF:
+                        from_source = bound
+                value = memo[v] = (to_target - from_source) / 2
+            return value
+
+        return p
+
+
+def bidirectional_astar(source, target, forward, backward, landmarks):
+    """
+    使用 ALT 下界的双向 A* 搜索。
+
+    两个方向分别以 d_f(v) + p(v) 和 d_r(v) - p(v) 为键，总是扩展键较小的一侧；
+    当两侧堆顶键之和不小于当前最优相遇距离 μ 时停止。
+
+    参数：
+    - source, target (int): 起点和终点编号。
+    - forward: 图的 CSR 数组（`indptr` 为列表）。
+    - backward: 反向图的 CSR 数组（`indptr` 为列表）；无向图可与 forward 相同。
+    - landmarks (LandmarkIndex): 地标预处理结果。
+
+    返回：
+    - `(距离, 顶点编号列表, 确定的顶点数)`；不可达时距离为无穷大、路径为空列表。
+    """
+    if source == target:
+        return 0.0, [source], 1
+    p = landmarks.potential(source, target)
+    sides = []
+    for root, (indptr, indices, weights), sign in ((source, forward, 1.0), (target, backward, -1.0)):
+        sides.append({"dist": {root: 0.0}, "parent": {root: -1}, "settled": set(),
+                      "heap": [(sign * p(root), root)], "sign": sign,
+                      "indptr": indptr, "indices": indices, "weights": weights})
+    f, r = sides
+    mu, meet = INF, -1
+    while f["heap"] and r["heap"]:
+        if f["heap"][0][0] + r["heap"][0][0] >= mu:
+            break
+        side, other = (f, r) if f["heap"][0][0] <= r["heap"][0][0] else (r, f)
+        _, u = heappop(side["heap"])
+        settled = side["settled"]
+        if u in settled:
+            continue
+        settled.add(u)
+        dist, parent, heap, sign = side["dist"], side["parent"], side["heap"], side["sign"]
+        other_dist = other["dist"]
+        du = dist[u]
+        lo, hi = side["indptr"][u], side["indptr"][u + 1]
+        for v, w in zip(side["indices"][lo:hi].tolist(), side["weights"][lo:hi].tolist()):
+            nd = du + w
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                parent[v] = u
+                heappush(heap, (nd + sign * p(v), v))
+                through = nd + other_dist.get(v, INF)
+                if through < mu:
+                    mu, meet = through, v
+    settled_count = len(f["settled"]) + len(r["settled"])
+    if meet < 0:
+        return INF, [], settled_count
+    path = []
+    v = meet
+    while v != -1:
+        path.append(v)
+        v = f["parent"][v]
+    path.reverse()
+    v = r["parent"][meet]
+    while v != -1:
+        path.append(v)
+        v = r["parent"][v]
+    return mu, path, settled_count
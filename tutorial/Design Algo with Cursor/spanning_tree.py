@@ -0,0 +1,126 @@
+"""
+最小生成树和连通分量。
+
+- `prim`：稠密矩阵上的 Prim 算法，n 步、每步一次 O(n) 的向量化更新，总计 O(n^2)，适合完全图。
+- `kruskal`：边列表上的 Kruskal 算法，按权重排序后用数组并查集合并，O(m log m)，适合稀疏图。
+- `connected_components`：向量化的"挂接 + 路径压缩"连通分量标记，每一轮都是对全部边的数组运算。
+
+两种最小生成树算法都返回最小生成森林（图不连通时每个分量一棵树），结果是三个等长数组
+`(heads, tails, weights)`，每个位置是一条树边。
+"""
+import numpy as np
+
+INF = float('inf')
+
+
+def find(parent, x):
+    """数组并查集的查找（路径减半）。"""
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def prim(matrix):
+    """
+    稠密矩阵上的 Prim 算法。维护每个树外顶点到树的最短边 `key` 和对应的树内端点 `parent`，
+    每一步用 argmin 选出最近的树外顶点，再用它的一行矩阵更新 `key`。
+    最近的树外顶点也不可达（key 为无穷大）时，从它开始一棵新树。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称矩阵，不存在的边为无穷大。
+
+    返回：
+    - `(heads, tails, weights)` 数组，共 n - 分量数 条边。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    key = np.full(n, INF)
+    parent = np.full(n, -1)
+    done = np.zeros(n, dtype=bool)
+    heads, tails, weights = [], [], []
+    pending = np.zeros(n)  # 已加入树的顶点为无穷大，避免每步重新构造屏蔽数组
+    for _ in range(n):
+        v = int(np.argmin(key + pending))
+        if done[v]:
+            # 剩下的顶点都不可达：任取一个树外顶点作为新树的根
+            v = int(np.flatnonzero(~done)[0])
+        elif parent[v] >= 0:
+            heads.append(int(parent[v]))
+            tails.append(v)
+            weights.append(float(key[v]))
+        done[v] = True
+        pending[v] = INF
+        row = matrix[v]
+        better = (row < key) & ~done
+        key[better] = row[better]
+        parent[better] = v
+    return np.array(heads, dtype=np.int64), np.array(tails, dtype=np.int64), np.array(weights)
+
+
+def kruskal(n, heads, tails, weights):
+    """
+    Kruskal 算法：按权重从小到大扫描边，用数组并查集跳过会成环的边，凑够 n - 分量数 条边后提前结束。
+
+    参数：
+    - n (int): 顶点数。
+    - heads, tails, weights: 边的两个端点和权重（无向边出现一次或两次都可以）。
+
+    返回：
+    - `(heads, tails, weights)` 数组。
+    """
+    heads, tails, weights = np.asarray(heads), np.asarray(tails), np.asarray(weights, dtype=np.float64)
+    order = np.argsort(weights, kind="stable")
+    parent = list(range(n))
+    needed = n - len(connected_components(n, heads, tails)[1])
+    picked = []
+    for e, a, b in zip(order.tolist(), heads[order].tolist(), tails[order].tolist()):
+        if len(picked) == needed:
+            break
+        ra, rb = find(parent, a), find(parent, b)
+        if ra != rb:
+            parent[ra] = rb
+            picked.append(e)
+    picked = np.array(picked, dtype=np.int64)
+    return heads[picked].astype(np.int64), tails[picked].astype(np.int64), weights[picked]
+
+
+def connected_components(n, heads, tails):
+    """
+    无向连通分量（有向边按无向处理，即弱连通分量）。
+
+    每一轮先把每条边两端所在树的根挂到其中较小的根上（`np.minimum.at`），
+    再把每个顶点的指针反复跳到祖父，直到所有树都变成"星形"；没有边连接不同的树时结束。
+
+    参数：
+    - n (int): 顶点数。
+    - heads, tails: 边的两个端点。
+
+    返回：
+    - `(labels, roots)`：每个顶点所在分量的代表（该分量中最小的编号），以及所有代表按编号排序的数组。
+    """
+    parent = np.arange(n)
+    heads, tails = np.asarray(heads, dtype=np.int64), np.asarray(tails, dtype=np.int64)
+    while True:
+        rh, rt = parent[heads], parent[tails]
+        cross = rh != rt
+        if not cross.any():
+            break
+        rh, rt = rh[cross], rt[cross]
+        np.minimum.at(parent, rh, rt)
+        np.minimum.at(parent, rt, rh)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent, np.flatnonzero(parent == np.arange(n))
+
+
+def tree_adjacency(n, heads, tails):
+    """把树边转换为邻接表（列表的列表）。"""
+    adjacency = [[] for _ in range(n)]
+    for a, b in zip(np.asarray(heads).tolist(), np.asarray(tails).tolist()):
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    return adjacency
@@ -1,15 +1,19 @@
+import copy
 import unittest
-from graph import Graph_Advanced
-import pickle
+from unittest import mock
+from generate_large_graph import build_fixture
+from graph import Graph_Advanced, generate_graph
 import time
 import os # Add os import
-
-# Get the directory of the current script
-script_dir = os.path.dirname(os.path.abspath(__file__))
-medium_graph_path = os.path.join(script_dir, "medium_graph_300.pickle")
-large_graph_path = os.path.join(script_dir, "large_graph_1000.pickle")
+from itertools import permutations
 
 class TestGraphAdvanced(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # 测试用图按 generate_large_graph.FIXTURES 中记录的 seed 和参数生成，每个测试拿到一份副本
+        cls.medium_fixture = build_fixture("medium_graph_300.graph")
+        cls.large_fixture = build_fixture("large_graph_1000.graph")
+
     def setUp(self):
         """
         创建测试用的图实例
@@ -43,10 +47,8 @@ class TestGraphAdvanced(unittest.TestCase):
         for src, dest, weight in edges:
             self.small_graph.add_edge(src, dest, weight)
 
-        with open(medium_graph_path, "rb") as f: # Use the new path
-            self.medium_graph = pickle.load(f)
-        with open(large_graph_path, "rb") as f: # Use the new path
-            self.large_graph = pickle.load(f)      
+        self.medium_graph = copy.deepcopy(self.medium_fixture)
+        self.large_graph = copy.deepcopy(self.large_fixture)
               
     def test_shortest_path(self):
         # 测试从顶点0到顶点2的最短路径
@@ -64,6 +66,22 @@ class TestGraphAdvanced(unittest.TestCase):
         self.assertEqual(distance, 0)  # 距离应该是0
         self.assertEqual(path, [0])    # 路径应该只包含起点
 
+    def test_shortest_path_cache(self):
+        # 同一源点的第二次查询应命中缓存
+        self.small_graph.shortest_path(0, 2)
+        self.small_graph.shortest_path(0, 3)
+        self.assertEqual(self.small_graph.shortest_path_cache_info()["hits"], 1)
+
+        # 修改图之后缓存失效，结果反映新的边
+        self.small_graph.remove_edge(1, 2)
+        distance, path = self.small_graph.shortest_path(0, 2)
+        self.assertEqual(distance, 4)
+        self.assertEqual(path, [0, 2])
+        self.small_graph.add_edge(1, 2, 1)
+        distance, path = self.small_graph.shortest_path(0, 2)
+        self.assertEqual(distance, 2)
+        self.assertEqual(path, [0, 1, 2])
+
     def test_tsp_small(self):
         """
         测试旅行商问题(TSP)解决方案
@@ -75,6 +93,46 @@ class TestGraphAdvanced(unittest.TestCase):
         self.assertEqual(distance, 11)  # 最短回路距离应为11
         self.assertTrue(path in [[0, 1, 2, 3, 0], [0, 3, 2, 1, 0]])  # 验证是否为两个最优路径之一
 
+    def test_tsp_small_exact(self):
+        """Held-Karp 的结果应与穷举所有排列的结果一致"""
+        graph = generate_graph(8, complete=True, weight_bounds=(1, 100), seed=3)
+        distance, path = graph.tsp_small_graph(5)
+        best = min(
+            sum(graph._get_edge_weight(a, b) for a, b in zip((5,) + p, p + (5,)))
+            for p in permutations([v for v in range(8) if v != 5])
+        )
+        self.assertEqual(distance, best)
+        self.assertEqual((path[0], path[-1]), (5, 5))
+        self.assertEqual(sorted(path[:-1]), list(range(8)))
+
+        # 内存不够时在建立距离矩阵之前就报错
+        large = generate_graph(30, complete=True, seed=3)
+        with mock.patch.object(large, "weight_matrix", side_effect=AssertionError("matrix built")):
+            with self.assertRaises(ValueError):
+                large.tsp_small_graph(0)
+
+        # 动态规划的层数不够、或预计在默认的 time_limit 内算不完时报错，fallback=True 时返回启发式回路
+        with self.assertRaises(TimeoutError):
+            graph.tsp_small_graph(5, max_iterations=3)
+        graph.tsp_small_graph(5, max_iterations=3, fallback=True)
+        self.assertEqual((graph.last_tsp_stats["optimal"], graph.last_tsp_stats["iterations"]), (False, 3))
+        graph = generate_graph(22, complete=True, weight_bounds=(1, 100), seed=3)
+        with self.assertRaises(TimeoutError):
+            graph.tsp_small_graph(0)
+        distance, path = graph.tsp_small_graph(0, fallback=True)
+        self.assertEqual(sorted(path[:-1]), list(range(22)))
+        self.assertFalse(graph.last_tsp_stats["optimal"])
+
+    def test_tsp_branch_and_bound(self):
+        """分支定界应与 Held-Karp 给出相同的最优长度，并附带最优性证书"""
+        graph = generate_graph(14, complete=True, weight_bounds=(1, 100), seed=11)
+        expected, _ = graph.tsp_small_graph(0)
+        distance, path = graph.tsp_branch_and_bound(0)
+        self.assertEqual(distance, expected)
+        self.assertEqual(len(path), 15)
+        self.assertTrue(graph.last_tsp_stats["optimal"])
+        self.assertEqual(graph.last_tsp_stats["gap"], 0)
+
     def test_tsp_medium(self):
         # 读取图
 
@@ -90,6 +148,73 @@ class TestGraphAdvanced(unittest.TestCase):
         # 验证时间限制
         self.assertTrue(execution_time < 0.5, f"执行时间 {execution_time:.4f} 秒超过了0.5秒限制")
 
+    def test_tsp_time_limit(self):
+        """求解器在 time_limit 内返回，并记录单调下降的质量-时间轨迹"""
+        start_time = time.time()
+        distance, path = self.medium_graph.tsp_medium_graph(0, time_limit=0.1)
+        self.assertLess(time.time() - start_time, 0.2)
+        self.assertEqual(len(path), 301)
+
+        stats = self.medium_graph.last_tsp_stats
+        costs = [cost for _, cost in stats["trace"]]
+        self.assertEqual(costs, sorted(costs, reverse=True))
+        self.assertEqual(costs[-1], distance)
+
+        distance, path = self.medium_graph.tsp_medium_graph(0, time_limit=None, max_iterations=5)
+        self.assertEqual(self.medium_graph.last_tsp_stats["iterations"], 5)
+
+    def test_tsp_deep_moves(self):
+        """Or-3opt / Lin-Kernighan 式移动和 double-bridge 扰动保持回路合法、长度增量正确"""
+        import numpy as np
+        from tsp_construct import nearest_neighbour
+        from tsp_local_search import LocalSearch, candidate_lists
+
+        matrix = self.medium_graph.weight_matrix()
+        rng = np.random.default_rng(0)
+        shallow = LocalSearch(matrix, candidate_lists(matrix, 10), nearest_neighbour(matrix))
+        shallow.optimize()
+        deep = LocalSearch(matrix, candidate_lists(matrix, 10), nearest_neighbour(matrix), lk_depth=5)
+        deep.optimize()
+        for _ in range(20):
+            deep.kick_double_bridge(rng)
+            deep.optimize()
+        self.assertEqual(sorted(deep.tour), list(range(300)))
+        self.assertAlmostEqual(deep.cost, sum(matrix[a, b] for a, b in zip(deep.tour, deep.tour[1:] + deep.tour[:1])))
+        self.assertLess(deep.cost, shallow.cost)
+
+    def test_tsp_constructions(self):
+        """每种构造方法都返回以起点开头的合法回路，并可以交给局部搜索"""
+        from tsp_construct import CONSTRUCTIONS, compare_constructions
+
+        results = compare_constructions(self.medium_graph.weight_matrix(), start=5)
+        self.assertEqual(set(results), set(CONSTRUCTIONS))
+        self.assertLess(results["greedy"]["cost"], results["nearest_neighbour"]["cost"])
+        for name in CONSTRUCTIONS:
+            distance, path = self.medium_graph.tsp_medium_graph(5, max_iterations=10, construction=name)
+            self.assertEqual(path[0], 5)
+            self.assertEqual(len(set(path)), 300)
+        with self.assertRaises(ValueError):
+            self.medium_graph.tsp_medium_graph(0, construction="random")
+
+        # 只有 1~3 个顶点时每种方法都返回全部顶点
+        import numpy as np
+        from tsp_construct import construct_tour
+        for n in (1, 2, 3):
+            matrix = np.ones((n, n)) - np.eye(n)
+            for name in CONSTRUCTIONS:
+                tour = construct_tour(matrix, n - 1, name)
+                self.assertEqual((tour[0], sorted(tour)), (n - 1, list(range(n))))
+
+    def test_tsp_parallel(self):
+        """并行多起点求解在全局时间限制内返回合法回路"""
+        start_time = time.time()
+        distance, path = self.medium_graph.tsp_medium_graph(0, time_limit=0.5, workers=2)
+        self.assertLess(time.time() - start_time, 1.0)
+        self.assertEqual(len(path), 301)
+        self.assertEqual(set(path), set(self.medium_graph.vertex_labels()))
+        self.assertEqual(distance, sum(self.medium_graph.graph[a][b] for a, b in zip(path, path[1:])))
+        self.assertEqual(self.medium_graph.last_tsp_stats["workers"], 2)
+
     def test_tsp_large(self):
         # 测试性能
         start_time = time.time()
@@ -101,6 +226,471 @@ class TestGraphAdvanced(unittest.TestCase):
 
         self.assertTrue(execution_time < 0.5, f"执行时间 {execution_time:.4f} 秒超过了0.5秒限制")
 
+    def test_distance_table(self):
+        matrix, paths = self.small_graph.distance_table([0, 3], [2, 1, 0], paths=True)
+        self.assertEqual(matrix.tolist(), [[3, 1, 0], [3, 3, 4]])
+        self.assertEqual(paths[0][0], [0, 1, 2])
+        self.assertEqual(paths[1][2], [3, 1, 0])
+
+        distances = self.small_graph.shortest_paths([(0, 2), (3, 1), (0, 3)], workers=2)
+        self.assertEqual(distances.tolist(), [3, 3, 4])
+
+    def test_shortest_path_landmarks(self):
+        """ALT 双向 A* 应与 Dijkstra 结果一致，并且确定更少的顶点"""
+        graph = generate_graph(2000, edges=3, weight_bounds=(1, 100), seed=7)
+        graph.preprocess_landmarks(8, seed=0)
+        settled = {"alt": 0, "dijkstra": 0}
+        for start, end in [(0, 1999), (17, 1234), (500, 42)]:
+            results = {}
+            for method in settled:
+                graph._path_cache = None
+                results[method] = graph.shortest_path(start, end, method=method)
+                settled[method] += graph.last_path_stats["settled"]
+            self.assertEqual(results["alt"][0], results["dijkstra"][0])
+        self.assertLess(settled["alt"], settled["dijkstra"])
+
+        # 修改图之后预处理结果作废
+        graph.add_edge(0, 1999, 1)
+        self.assertEqual(graph.shortest_path(0, 1999), (1, [0, 1999]))
+        self.assertEqual(graph.last_path_stats["method"], "dijkstra")
+
+    def test_incremental_paths(self):
+        """增量修复后的最短路径树应与重新计算的结果一致，并且只访问少量顶点"""
+        for directed in (False, True):
+            graph = generate_graph(500, edges=4, weight_bounds=(1, 100), seed=11, directed=directed)
+            # 有向图的边都是单向的弧
+            one_way = [(u, v) for u in graph.graph for v in graph.graph[u] if not graph.graph.has_edge(v, u)]
+            self.assertEqual(bool(one_way), directed)
+            graph.enable_incremental_paths()
+            sources = [0, 123, 321]
+            for s in sources:
+                graph.shortest_path(s, 1)
+            for step, (u, v) in enumerate([(0, 499), (5, 6), (123, 7), (8, 400), (321, 9)] * 2):
+                if step < 5:
+                    graph.add_edge(u, v, 1)
+                else:
+                    graph.remove_edge(u, v)
+                self.assertTrue(all(r["touched"] <= r["recompute"] for r in graph.last_repair_stats))
+                for s in sources:
+                    for t in (1, 9, 250, 499):
+                        distance, path = graph.shortest_path(s, t)
+                        self.assertEqual(graph.last_path_stats["method"], "incremental")
+                        self.assertEqual(distance, graph.shortest_path(s, t, method="dijkstra")[0])
+            info = graph.shortest_path_cache_info()
+            self.assertEqual(info["misses"], len(sources))
+            self.assertLess(info["touched"], info["recompute"] / 4)
+
+            # 负权边在修改图之前被拒绝，图和缓存的树都保持不变
+            before = graph.shortest_path(0, 499)
+            with self.assertRaises(ValueError):
+                graph.add_edge(0, 499, -5)
+            self.assertFalse(graph.graph.has_edge(0, 499) or graph.graph.has_edge(499, 0))
+            self.assertEqual(graph.shortest_path(0, 499), before)
+            self.assertEqual(before[0], graph.shortest_path(0, 499, method="dijkstra")[0])
+
+    def test_all_pairs_shortest_paths(self):
+        """Floyd–Warshall 与 Dijkstra 的全源结果一致；稀疏图上的 TSP 回路展开为真实路径"""
+        import numpy as np
+        from shortest_paths import hop_path
+
+        graph = generate_graph(120, edges=3, weight_bounds=(1, 100), seed=5)
+        results = {}
+        for method in ("floyd_warshall", "dijkstra"):
+            graph._all_pairs = None
+            results[method] = graph.all_pairs_shortest_paths(method)
+        dist, hops = results["floyd_warshall"]
+        self.assertTrue(np.allclose(dist, results["dijkstra"][0]))
+        for s, t in [(0, 119), (42, 7), (3, 3)]:
+            self.assertEqual(dist[s, t], graph.shortest_path(s, t)[0])
+            path = hop_path(hops, s, t)
+            self.assertEqual((path[0], path[-1]), (s, t))
+            self.assertAlmostEqual(sum(graph.graph[a][b] for a, b in zip(path, path[1:])), dist[s, t])
+
+        distance, path = graph.tsp_medium_graph(0, max_iterations=20)
+        self.assertEqual((path[0], path[-1]), (0, 0))
+        self.assertEqual(set(path), set(range(120)))
+        self.assertEqual(distance, sum(graph.graph[a][b] for a, b in zip(path, path[1:])))
+
+        # 零权边（1-2）和等长路径（0-1-3 与 0-2-3 长度相同）不能让下一跳绕成环
+        tied = Graph_Advanced()
+        for v in range(5):
+            tied.add_vertex(v)
+        for a, b, w in [(0, 1, 1), (0, 2, 1), (1, 2, 0), (1, 3, 2), (2, 3, 2), (3, 4, 0)]:
+            tied.add_edge(a, b, w)
+        for method in ("floyd_warshall", "dijkstra"):
+            tied._all_pairs = None
+            dist, hops = tied.all_pairs_shortest_paths(method)
+            for s in range(5):
+                for t in range(5):
+                    path = hop_path(hops, s, t)
+                    self.assertEqual((path[0], path[-1]), (s, t))
+                    self.assertEqual(sum(tied.graph[a][b] for a, b in zip(path, path[1:])), dist[s, t])
+        with self.assertRaises(ValueError):
+            hop_path(np.array([[0, 1, 1], [0, 1, 0], [0, 1, 2]]), 0, 2)
+
+    def test_tsp_candidate_graph(self):
+        """候选图只保存 k 近邻边，近邻与暴力计算一致，求解时不建立距离矩阵"""
+        import numpy as np
+        from tsp_candidates import CallbackWeights, CoordinateWeights, knn_candidates
+        from tsp_local_search import candidate_lists
+
+        coords = np.random.default_rng(1).random((3000, 2)) * 100
+        small = CoordinateWeights(coords[:400], metric="manhattan")
+        matrix = small.matrix()
+        for weights in (small, CallbackWeights(lambda a, b: matrix[a, b], 400)):
+            found = np.take_along_axis(matrix, knn_candidates(weights, 6), axis=1)
+            expected = np.take_along_axis(matrix, candidate_lists(matrix, 6), axis=1)
+            self.assertTrue(np.array_equal(found, expected))
+
+        weights = CoordinateWeights(coords)
+        graph = Graph_Advanced.candidate_graph(weights, k=8)
+        self.assertLessEqual(len(graph.csr_arrays()[1]), 2 * 8 * 3000)
+        distance, path = graph.tsp_large_graph(7, time_limit=1.0)
+        self.assertEqual((path[0], path[-1]), (7, 7))
+        self.assertEqual(len(set(path)), 3000)
+        self.assertAlmostEqual(distance, weights.tour_cost(path[:-1]))
+        stats = graph.last_tsp_stats
+        self.assertEqual(stats["construction"], "greedy")
+        self.assertLess(distance, stats["trace"][0][1])
+
+    def test_two_level_tour(self):
+        """两级链表的翻转、next/prev/between 与数组表示一致；在其上做 2-opt 得到合法的更短回路"""
+        import numpy as np
+        from tsp_local_search import candidate_lists
+        from tsp_tour import TwoLevelTour, two_opt
+
+        rng = np.random.default_rng(2)
+        tour = TwoLevelTour(rng.permutation(400), segment_size=7)
+        for a, b in rng.integers(400, size=(500, 2)).tolist():
+            before = tour.tour().tolist()
+            i, j = before.index(a), before.index(b)
+            expected = before[i:j + 1] if i <= j else before[i:] + before[:j + 1]
+            tour.reverse(a, b)
+            after = tour.tour().tolist()
+            k = after.index(b)
+            # 翻转后从 b 开始的一段就是原来 a..b 的逆序（或者整条回路换了走向）
+            forward = (after[k:] + after[:k])[:len(expected)]
+            backward = (after[k::-1] + after[:k:-1])[:len(expected)]
+            self.assertTrue(forward == expected[::-1] or backward == expected[::-1])
+            v = int(rng.integers(400))
+            self.assertEqual(tour.next(v), after[(after.index(v) + 1) % 400])
+            self.assertEqual(tour.prev(v), after[after.index(v) - 1])
+            self.assertTrue(tour.between(after[10], after[20], after[30]))
+            self.assertFalse(tour.between(after[10], after[5], after[30]))
+
+        matrix = self.large_graph.weight_matrix()
+        tour = TwoLevelTour(np.arange(1000))
+        before = matrix[np.arange(1000), np.roll(np.arange(1000), -1)].sum()
+        gain, moves = two_opt(tour, matrix.tolist(), candidate_lists(matrix, 8).tolist())
+        order = tour.tour()
+        self.assertEqual(sorted(order.tolist()), list(range(1000)))
+        self.assertAlmostEqual(matrix[order, np.roll(order, -1)].sum(), before - gain)
+        self.assertGreater(moves, 0)
+
+    def test_solve_tsp(self):
+        """solve_tsp 按规模和预算选择引擎；每个引擎都返回合法回路和相同结构的统计"""
+        import numpy as np
+        from graph_storage import DenseStorage
+        from tsp_genetic import _adjacency, ab_cycles
+        from tsp_solvers import TSP_SOLVERS, choose_strategy
+
+        self.assertEqual(choose_strategy(12, 1.0), "exact")
+        self.assertEqual(choose_strategy(300, 0.4), "local_search")
+        self.assertEqual(choose_strategy(300, 0.4, symmetric=False), "annealing")
+        self.assertEqual(choose_strategy(200, None), "genetic")
+        self.assertEqual(choose_strategy(200, 10.0), "genetic")
+        self.assertEqual(choose_strategy(5000, 10.0), "local_search")
+
+        self.assertEqual(self.small_graph.solve_tsp(0)[0], 11)
+        self.assertEqual(self.small_graph.last_tsp_stats["solver"], "exact")
+        self.assertTrue(self.small_graph.last_tsp_stats["optimal"])
+
+        graph = generate_graph(40, complete=True, weight_bounds=(1, 100), seed=6)
+        keys = None
+        for strategy in TSP_SOLVERS:
+            distance, path = graph.solve_tsp(3, time_limit=0.3, strategy=strategy)
+            self.assertEqual((path[0], path[-1]), (3, 3))
+            self.assertEqual(sorted(path[:-1]), list(range(40)))
+            self.assertEqual(distance, sum(graph.graph[a][b] for a, b in zip(path, path[1:])))
+            stats = graph.last_tsp_stats
+            self.assertEqual((stats["solver"], stats["best_cost"]), (strategy, distance))
+            keys = keys or set(stats)
+            self.assertEqual(set(stats), keys)
+        with self.assertRaises(ValueError):
+            graph.solve_tsp(0, strategy="tabu")
+
+        # 不超过 3 个顶点时每个策略都得到精确的回路
+        for n in (1, 2, 3):
+            tiny = generate_graph(n, complete=True, weight_bounds=(1, 100), seed=1)
+            expected = tiny.solve_tsp(0)
+            for strategy in TSP_SOLVERS:
+                self.assertEqual(tiny.solve_tsp(0, strategy=strategy), expected)
+                self.assertTrue(tiny.last_tsp_stats["optimal"])
+        self.assertEqual(expected[1][0], expected[1][-1])
+        self.assertEqual(generate_graph(1, complete=True, seed=1).solve_tsp(0, strategy="genetic"), (0.0, [0]))
+
+        # AB 环恰好分解两条回路的对称差
+        rng = np.random.default_rng(0)
+        adj_a, adj_b = _adjacency(rng.permutation(50)), _adjacency(rng.permutation(50))
+        edges = lambda adj: {frozenset((v, int(u))) for v in range(50) for u in adj[v]}
+        cycle_edges = [frozenset(e) for cycle, _ in ab_cycles(adj_a, adj_b, rng) for e in zip(cycle, cycle[1:])]
+        self.assertEqual(len(cycle_edges), len(set(cycle_edges)))
+        self.assertEqual(set(cycle_edges), edges(adj_a) ^ edges(adj_b))
+
+        # 非对称（有向图）实例自动使用模拟退火，局部搜索拒绝非对称矩阵
+        matrix = rng.integers(1, 100, size=(30, 30)).astype(float)
+        np.fill_diagonal(matrix, np.inf)
+        directed = Graph_Advanced(directed=True, storage="dense")
+        directed.graph = DenseStorage.from_matrix(list(range(30)), matrix)
+        distance, path = directed.solve_tsp(0, time_limit=0.2)
+        self.assertEqual(directed.last_tsp_stats["solver"], "annealing")
+        self.assertEqual(distance, sum(matrix[a, b] for a, b in zip(path, path[1:])))
+        with self.assertRaises(ValueError):
+            directed.solve_tsp(0, strategy="local_search")
+
+    def test_benchmark_suite(self):
+        """基准结果带有下界和间隙，可以保存为 JSON 基线；与自身比较没有回归，变差的结果会被报告"""
+        import copy
+        import tempfile
+        from tsp_benchmark import compare, load_results, run_suite, save_results
+        from tsp_exact import held_karp_bound
+
+        results = run_suite(sizes=(10, 40), seeds=(0, 1), budgets=(0.05, 0.1), bound_time_limit=1.0)
+        self.assertEqual(len(results["results"]), 4)
+        for record in results["results"]:
+            self.assertGreaterEqual(record["gap"], 0)
+            self.assertGreater(record["peak_memory"], 0)
+            self.assertLessEqual(record["time_to_first_tour"], record["elapsed"])
+            if record["size"] == 10:
+                self.assertEqual((record["bound"], record["gap"]), ("exact", 0))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_results(results, path)
+            baseline = load_results(path)
+        self.assertEqual(compare(baseline, results), [])
+
+        worse = copy.deepcopy(results)
+        for record in worse["results"]:
+            if record["size"] == 40:
+                record["time_to_first_tour"] += 1.0
+                record["gaps"]["0.1"] += 0.05
+            else:
+                record["best_cost"] = record["lower_bound"] - 1
+        metrics = {(r["size"], r["metric"]) for r in compare(baseline, worse)}
+        self.assertEqual(metrics, {(40, "time_to_first_tour"), (40, "gap@0.1s"), (10, "lower_bound")})
+
+        # 1-树下界不超过最优值
+        graph = generate_graph(12, complete=True, weight_bounds=(1, 100), seed=4)
+        self.assertLessEqual(held_karp_bound(graph.weight_matrix()), graph.tsp_small_graph(0)[0])
+
+    def test_tsp_profiling(self):
+        """开启剖析后记录阶段耗时、移动计数和缓存命中，结果与不剖析时相同，可以导出折叠栈"""
+        import tempfile
+        import tsp_profile
+
+        graph = generate_graph(200, complete=True, weight_bounds=(1, 100), seed=8)
+        expected = graph.tsp_medium_graph(0, time_limit=None, max_iterations=50)
+        self.assertIsNone(graph.profiler)
+        profiler = graph.enable_profiling()
+        self.assertEqual(graph.tsp_medium_graph(0, time_limit=None, max_iterations=50), expected)
+        self.assertIsNone(tsp_profile.active())
+        report = profiler.report()
+        paths = {phase["path"] for phase in report["phases"]}
+        self.assertTrue({"tsp_medium_graph;construction", "tsp_medium_graph;local_search;optimize",
+                         "tsp_medium_graph;local_search;optimize;reverse"} <= paths)
+        for phase in report["phases"]:
+            self.assertLessEqual(phase["self"], phase["total"] + 1e-9)
+        for name in ("two_opt", "or_opt", "or3opt", "lk"):
+            moves = report["moves"][name]
+            self.assertLessEqual(moves["applied"], moves["evaluated"])
+        self.assertGreater(report["counters"]["reverse.elements"], 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.folded")
+            profiler.export_folded(path)
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        self.assertEqual(len(lines), len(paths))
+        for line in lines:
+            stack, value = line.rsplit(" ", 1)
+            self.assertIn(stack, paths)
+            self.assertGreaterEqual(int(value), 0)
+
+        # 第二次求解复用度量闭包
+        sparse = generate_graph(30, edges=3, weight_bounds=(1, 100), seed=2)
+        sparse.enable_profiling()
+        sparse.solve_tsp(0, time_limit=0.1, strategy="local_search")
+        sparse.solve_tsp(0, time_limit=0.1, strategy="annealing")
+        report = sparse.profiler.report()
+        self.assertEqual(report["caches"]["all_pairs"], {"hits": 1, "misses": 1, "hit_rate": 0.5})
+        self.assertIn("annealing", report["moves"])
+        graph.enable_profiling(False)
+        self.assertIsNone(graph.profiler)
+
+    def test_minimum_spanning_tree(self):
+        """Prim 和 Kruskal 得到相同权重的最小生成树；不连通时得到生成森林"""
+        total, edges = self.small_graph.minimum_spanning_tree()
+        self.assertEqual(total, 6)
+        self.assertEqual(len(edges), 3)
+        for storage in ("dict", "dense", "csr"):
+            graph = generate_graph(60, complete=True, seed=3, storage=storage)
+            prim_total, _ = graph.minimum_spanning_tree("prim")
+            kruskal_total, kruskal_edges = graph.minimum_spanning_tree("kruskal")
+            self.assertEqual(prim_total, kruskal_total)
+            self.assertEqual(len(kruskal_edges), 59)
+
+        self.small_graph.add_vertex(9)
+        self.small_graph.add_vertex(8)
+        self.small_graph.add_edge(9, 8, 7)
+        self.assertEqual(self.small_graph.connected_components(), [[0, 1, 2, 3], [9, 8]])
+        total, edges = self.small_graph.minimum_spanning_tree("kruskal")
+        self.assertEqual((total, len(edges)), (13, 4))
+        self.assertEqual(self.small_graph.minimum_spanning_tree("prim")[0], 13)
+
+    def test_tsp_christofides(self):
+        """Christofides 式构造的回路可以直接交给局部搜索"""
+        distance, path = self.medium_graph.tsp_medium_graph(0, max_iterations=0, construction="christofides")
+        self.assertEqual(len(set(path)), 300)
+        double_tree, _ = self.medium_graph.tsp_medium_graph(0, max_iterations=0, construction="double_tree")
+        self.assertLess(distance, 1.5 * double_tree)
+
+
+class TestGraphStorage(unittest.TestCase):
+    def build(self, storage):
+        graph = Graph_Advanced(storage=storage)
+        for v in "abcd":
+            graph.add_vertex(v)
+        graph.add_edge("a", "b", 1)
+        graph.add_edge("b", "c", 2)
+        graph.add_edge("c", "d", 3)
+        return graph
+
+    def test_backends_agree(self):
+        """三种存储后端对同样的操作应给出相同的邻接关系和权重矩阵"""
+        expected = {"a": {"b": 1}, "b": {"a": 1, "c": 2}, "c": {"b": 2, "d": 3}, "d": {"c": 3}}
+        for storage in ["dict", "dense", "csr"]:
+            graph = self.build(storage)
+            self.assertEqual({v: graph.graph[v] for v in graph.graph}, expected)
+            self.assertEqual(sorted(graph.get_adjacent_vertices("b")), ["a", "c"])
+
+            graph.remove_vertex("b")
+            self.assertEqual(graph.get_adjacent_vertices("a"), [])
+            labels = graph.vertex_labels()
+            matrix = graph.weight_matrix()
+            self.assertEqual(matrix.shape, (3, 3))
+            self.assertEqual(matrix[labels.index("c"), labels.index("d")], 3)
+            self.assertEqual(matrix[labels.index("a"), labels.index("c")], float("inf"))
+
+    def test_generate_graph(self):
+        """相同的 seed 生成相同的图；完全图对称且权重在范围内，稀疏图的度数不超过 edges"""
+        import numpy as np
+
+        for storage in ["dict", "dense", "csr"]:
+            first = generate_graph(40, complete=True, weight_bounds=(1, 9), seed=5, storage=storage).weight_matrix()
+            second = generate_graph(40, complete=True, weight_bounds=(1, 9), seed=5, storage=storage).weight_matrix()
+            self.assertTrue(np.array_equal(first, second))
+            self.assertTrue(np.array_equal(first, first.T))
+            off_diagonal = first[~np.eye(40, dtype=bool)]
+            self.assertEqual((off_diagonal.min(), off_diagonal.max()), (1, 9))
+
+            sparse = generate_graph(500, edges=4, seed=5, storage=storage)
+            degrees = [len(sparse.get_adjacent_vertices(v)) for v in sparse.vertex_labels()]
+            self.assertLessEqual(max(degrees), 4)
+            self.assertGreater(sum(degrees), 500 * 3)
+            self.assertEqual(sparse.graph[0], generate_graph(500, edges=4, seed=5, storage=storage).graph[0])
+
+        # legacy=True 按旧版生成器的顺序调用 random 模块：完全图的权重就是按行展开的上三角
+        import random
+        rng = random.Random(7)
+        expected = [rng.randint(1, 9) for _ in range(6 * 5 // 2)]
+        legacy = generate_graph(6, complete=True, weight_bounds=(1, 9), seed=7, legacy=True).weight_matrix()
+        self.assertEqual(legacy[np.triu_indices(6, 1)].tolist(), expected)
+        self.assertTrue(np.array_equal(legacy, legacy.T))
+        sparse = generate_graph(200, edges=3, seed=7, storage="dict", legacy=True)
+        self.assertLessEqual(max(len(sparse.graph[v]) for v in sparse.graph), 3)
+        self.assertEqual(sparse.graph[5], generate_graph(200, edges=3, seed=7, legacy=True).graph[5])
+        with self.assertRaises(ValueError):
+            generate_graph(6, complete=True, seed=7, directed=True, legacy=True)
+
+    def test_save_load(self):
+        """二进制格式保存后加载得到相同的图；内存映射加载后修改图不会写回文件"""
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph.graph")
+            for storage in ["dict", "dense", "csr"]:
+                graph = self.build(storage)
+                graph.save(path)
+                for mmap in (True, False):
+                    loaded = Graph_Advanced.load(path, mmap=mmap)
+                    self.assertEqual(loaded.graph.kind, storage)
+                    self.assertEqual({v: loaded.graph[v] for v in loaded.graph}, {v: graph.graph[v] for v in graph.graph})
+                    self.assertEqual(loaded.shortest_path("a", "d"), (6, ["a", "b", "c", "d"]))
+
+                loaded = Graph_Advanced.load(path)
+                loaded.add_edge("a", "d", 1)
+                loaded.add_vertex("e")
+                self.assertEqual(Graph_Advanced.load(path).get_adjacent_vertices("a"), ["b"])
+
+            with open(path, "wb") as f:
+                f.write(b"not a graph")
+            with self.assertRaises(ValueError):
+                Graph_Advanced.load(path)
+
+    def test_reverse_index(self):
+        """反向邻接索引随加边、删边、删顶点更新，get_predecessors 与全量扫描结果一致"""
+        for storage in ["dict", "dense", "csr"]:
+            for reverse_index in (False, True):
+                graph = Graph_Advanced(directed=True, storage=storage, reverse_index=reverse_index)
+                for v in "abcde":
+                    graph.add_vertex(v)
+                for src, dest in [("a", "b"), ("c", "b"), ("b", "d"), ("e", "b"), ("e", "e"), ("d", "a")]:
+                    graph.add_edge(src, dest, 1)
+                self.assertEqual(sorted(graph.get_predecessors("b")), ["a", "c", "e"])
+                graph.remove_edge("c", "b")
+                graph.remove_vertex("a")
+                self.assertEqual(sorted(graph.get_predecessors("b")), ["e"])
+                self.assertEqual(graph.get_predecessors("d"), ["b"])
+                self.assertEqual(graph.get_adjacent_vertices("d"), [])
+                self.assertEqual(sorted(graph.get_adjacent_vertices("e")), ["b", "e"])
+                self.assertEqual(graph.get_predecessors("a"), [])
+
+            graph.build_reverse_index()
+            self.assertEqual(sorted(graph.get_predecessors("e")), ["e"])
+
+    def test_vertex_id(self):
+        """顶点编号与 vertex_labels() 的顺序一致，增删顶点后也是如此"""
+        for storage in ["dict", "dense", "csr"]:
+            graph = self.build(storage)
+            graph.add_vertex("e")
+            graph.remove_vertex("b")
+            graph.add_vertex("f")
+            labels = graph.vertex_labels()
+            self.assertEqual([graph.vertex_id(v) for v in labels], list(range(len(labels))))
+            with self.assertRaises(KeyError):
+                graph.vertex_id("b")
+
+        # 旧代码直接写 graph.graph 字典，编号也要跟上
+        graph = self.build("dict")
+        graph.vertex_id("a")
+        graph.graph["g"] = {}
+        self.assertEqual(graph.vertex_id("g"), 4)
+
+    def test_dense_weight_matrix_is_view(self):
+        graph = self.build("dense")
+        matrix = graph.weight_matrix()
+        graph.add_edge("a", "d", 7)
+        self.assertEqual(matrix[graph.vertex_id("a"), graph.vertex_id("d")], 7)
+
+    def test_set_storage(self):
+        graph = self.build("dict")
+        graph.set_storage("csr")
+        self.assertEqual(graph.graph.kind, "csr")
+        self.assertEqual(graph._get_edge_weight("c", "d"), 3)
+        with self.assertRaises(ValueError):
+            graph.set_storage("sparse")
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
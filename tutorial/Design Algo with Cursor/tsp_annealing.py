@@ -0,0 +1,160 @@
+"""
+批量评估移动的模拟退火 TSP 引擎。
+
+每一轮随机抽取 `batch` 个候选移动，用 NumPy 花式索引一次算出它们在当前回路上的长度增量，
+再一次性做 Metropolis 判定，只应用第一个被接受的移动。被拒绝的移动不改变回路，
+所以这与逐个抽样、逐个判定的经典模拟退火完全等价，只是把"算增量 + 判定"向量化了：
+温度越低接受率越低，一轮能跳过的被拒绝移动就越多。
+
+移动都以候选邻居为中心（随机顶点 v 与它的一个近邻 w）：
+
+- 2-opt：加入边 (v, w)，翻转中间的一段（只用于对称矩阵）；
+- Or-opt：把从 v 开始的 1~3 个顶点原样（不翻转）移到 w 之后。
+
+Or-opt 不改变任何一段的走向，因此引擎也适用于非对称（有向图）的距离矩阵，
+而 `LocalSearch` 只支持对称矩阵。温度按预算的消耗比例从 T0 几何下降到 T0 · `final_ratio`，
+T0 取使平均"变差"移动以 `initial_acceptance` 的概率被接受的值。
+"""
+import math
+
+import numpy as np
+
+from tsp_local_search import EPS, candidate_lists
+
+# 没有时间和迭代限制时，退火持续的轮数为 DEFAULT_ROUNDS_PER_VERTEX * n
+DEFAULT_ROUNDS_PER_VERTEX = 50
+MAX_SEGMENT = 3
+
+
+def _positions(tour):
+    pos = np.empty_like(tour)
+    pos[tour] = np.arange(len(tour))
+    return pos
+
+
+def _two_opt_moves(matrix, tour, pos, v, w):
+    """加入边 (v, w) 的 2-opt：返回 `(增量, i, j)`，应用时翻转位置 i+1..j。"""
+    n = len(tour)
+    i, j = np.minimum(pos[v], pos[w]), np.maximum(pos[v], pos[w])
+    a, b, c, d = tour[i], tour[(i + 1) % n], tour[j], tour[(j + 1) % n]
+    delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+    # j == i + 1 时翻转的是一个顶点，i == 0 且 j == n-1 时新边与旧边相同，都不是有效移动
+    invalid = (j - i < 2) | ((i == 0) & (j == n - 1))
+    return np.where(invalid, np.inf, delta), i, j
+
+
+def _or_opt_moves(matrix, tour, pos, v, w, length):
+    """把从 v 开始的 length 个顶点移到 w 之后：返回 `(增量, 段起点位置, w 的位置)`。"""
+    n = len(tour)
+    s, x_pos = pos[v], pos[w]
+    p, f = tour[s - 1], v
+    last = tour[(s + length - 1) % n]
+    q = tour[(s + length) % n]
+    y = tour[(x_pos + 1) % n]
+    delta = (matrix[p, q] + matrix[w, f] + matrix[last, y]
+             - matrix[p, f] - matrix[last, q] - matrix[w, y])
+    # w 不能在段内，也不能是段的前驱（那样移动后回路不变）
+    offset = (x_pos - s) % n
+    invalid = (offset < length) | (offset == n - 1)
+    return np.where(invalid, np.inf, delta), s, x_pos
+
+
+def _apply_or_opt(tour, s, x_pos, length):
+    """把位置 s 开始的 length 个顶点移到位置 x_pos 的顶点之后。"""
+    n = len(tour)
+    rotated = np.roll(tour, -s)  # 段移到开头，避免跨越数组末尾
+    segment, rest = rotated[:length], rotated[length:]
+    k = (x_pos - s) % n - length  # w 在 rest 中的下标
+    return np.concatenate([rest[:k + 1], segment, rest[k + 1:]])
+
+
+def simulated_annealing(matrix, tour, budget, rng, candidates=None, batch=256, initial_acceptance=0.1,
+                        final_ratio=1e-3):
+    """
+    从给定回路出发做模拟退火，返回遇到的最好回路。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵，可以不对称（此时只用 Or-opt 移动）。
+    - tour (list): 初始回路的顶点编号（不重复起点）。
+    - budget (SolveBudget): 时间 / 迭代预算，每一轮（一批移动）计一次迭代，每次改进都记入轨迹；
+      温度按已用时间（或已用迭代）占预算的比例下降。
+    - rng (np.random.Generator): 随机数生成器。
+    - candidates (np.ndarray, optional): 候选邻居表，`candidates[v]` 是到 v 距离最短的顶点；
+      默认为 `candidate_lists(matrix.T, 10)`。
+    - batch (int): 每一轮评估的移动数。
+    - initial_acceptance (float): 初始温度下平均"变差"移动被接受的概率。初始回路来自构造算法，已经不差，
+      太高的初始温度只会先把它打乱。
+    - final_ratio (float): 结束温度与初始温度之比。
+
+    返回：
+    - `(最好回路长度, 最好回路顶点编号列表, 信息)`，信息包含 accepted（接受的移动数）、
+      evaluated（评估的移动数）、initial_temperature 和 final_temperature。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    tour = np.asarray(tour, dtype=np.int64)
+    n = len(tour)
+    cost = float(matrix[tour, np.roll(tour, -1)].sum())
+    best_cost, best_tour = cost, tour.copy()
+    budget.improve(cost)
+    info = {"accepted": 0, "evaluated": 0, "initial_temperature": 0.0, "final_temperature": 0.0}
+    if n < 5:
+        return best_cost, best_tour.tolist(), info
+    if candidates is None:
+        # Or-opt 加入的新边是 w -> v，所以按"到 v 的距离"选 v 的近邻
+        candidates = candidate_lists(matrix.T, 10)
+    symmetric = np.array_equal(matrix, matrix.T)
+    pos = _positions(tour)
+    k = candidates.shape[1]
+
+    def sample():
+        v = rng.integers(n, size=batch)
+        w = candidates[v, rng.integers(k, size=batch)]
+        length = rng.integers(1, MAX_SEGMENT + 1, size=batch)
+        length = np.minimum(length, n - 3)
+        delta, a, b = _or_opt_moves(matrix, tour, pos, v, w, length)
+        kind = np.zeros(batch, dtype=bool)
+        if symmetric:
+            kind = rng.random(batch) < 0.5
+            two, i, j = _two_opt_moves(matrix, tour, pos, v, w)
+            delta = np.where(kind, two, delta)
+            a, b = np.where(kind, i, a), np.where(kind, j, b)
+        return delta, kind, a, b, length
+
+    delta = sample()[0]
+    uphill = delta[np.isfinite(delta) & (delta > EPS)]
+    t0 = float(uphill.mean()) / -math.log(initial_acceptance) if len(uphill) else 1.0
+    t1 = t0 * final_ratio
+    info["initial_temperature"] = t0
+    rounds = None
+    if budget.time_limit is not None:
+        progress = lambda: min(1.0, budget.elapsed() / budget.time_limit)
+    else:
+        rounds = budget.max_iterations if budget.max_iterations is not None else DEFAULT_ROUNDS_PER_VERTEX * n
+        progress = lambda: min(1.0, budget.iterations / max(rounds, 1))
+
+    temperature = t0
+    while budget.step() and (rounds is None or budget.iterations <= rounds):
+        temperature = t0 * (t1 / t0) ** progress()
+        delta, kind, a, b, length = sample()
+        info["evaluated"] += batch
+        with np.errstate(over="ignore"):
+            accept = np.isfinite(delta) & ((delta <= 0) | (rng.random(batch) < np.exp(-delta / temperature)))
+        if not accept.any():
+            continue
+        m = int(np.argmax(accept))
+        if kind[m]:
+            i, j = int(a[m]), int(b[m])
+            tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+            pos[tour[i + 1:j + 1]] = np.arange(i + 1, j + 1)
+        else:
+            tour = _apply_or_opt(tour, int(a[m]), int(b[m]), int(length[m]))
+            pos = _positions(tour)
+        cost += float(delta[m])
+        info["accepted"] += 1
+        if cost < best_cost - EPS:
+            best_cost, best_tour = cost, tour.copy()
+            budget.improve(best_cost)
+    info["final_temperature"] = temperature
+    # 增量累加会积累浮点误差，最后按最好回路重新计算一次长度
+    best_cost = float(matrix[best_tour, np.roll(best_tour, -1)].sum())
+    return best_cost, best_tour.tolist(), info
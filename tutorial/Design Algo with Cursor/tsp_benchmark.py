@@ -0,0 +1,328 @@
+"""
+TSP 求解器的基准测试与质量回归检查。
+
+单元测试里的计时断言只能说明"这一次在这台机器上够快"，噪声大，也看不出趋势。这里在 `generate_graph`
+生成的一组实例（默认 10、20、300、1000、5000 个顶点，每个规模若干个 seed）上运行求解器，记录：
+
+- time_to_first_tour：从调用求解器到得到第一条回路的秒数（质量-时间轨迹的第一项）；
+- costs：固定时间预算（默认 0.1、0.4、1.0 秒）下的最好回路长度，从同一次运行的轨迹上读出；
+- peak_memory：求解过程中 tracemalloc 记录的峰值内存（字节，另外运行一次，避免 tracemalloc 影响计时）；
+- lower_bound / gap：实例的下界（不超过 20 个顶点时是 Held-Karp 最优值，否则是 1-树下界，见
+  `tsp_exact.held_karp_bound`）和各预算下的最优性间隙 (长度 - 下界) / 长度。
+
+结果保存为 JSON 基线，`compare` 按规模汇总（seed 之间取中位数 / 平均值）后与基线比较，
+超出容差的指标报告为回归；回路比下界还短、或声称最优却有间隙的结果总是报告为错误。
+
+    python tsp_benchmark.py run -o baseline.json
+    python tsp_benchmark.py run --sizes 10 20 300 -o current.json --compare baseline.json
+    python tsp_benchmark.py compare baseline.json current.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+from statistics import mean, median
+from time import perf_counter
+
+import numpy as np
+
+from graph import generate_graph
+from tsp_exact import held_karp, held_karp_bound
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = (10, 20, 300, 1000, 5000)
+DEFAULT_SEEDS = (0, 1, 2)
+DEFAULT_BUDGETS = (0.1, 0.4, 1.0)
+WEIGHT_BOUNDS = (1, 100)
+EXACT_BOUND_SIZE = 20
+
+SOLVERS = {
+    "tsp_small_graph": lambda graph, time_limit, seed: graph.tsp_small_graph(0, time_limit=time_limit, fallback=True),
+    "tsp_medium_graph": lambda graph, time_limit, seed: graph.tsp_medium_graph(0, time_limit=time_limit, seed=seed),
+    "tsp_large_graph": lambda graph, time_limit, seed: graph.tsp_large_graph(0, time_limit=time_limit, seed=seed),
+    "solve_tsp": lambda graph, time_limit, seed: graph.solve_tsp(0, time_limit=time_limit, seed=seed),
+}
+
+
+def default_solver(n):
+    """按规模选择求解器：不超过 20 个顶点用精确的 tsp_small_graph，不超过 300 个用 tsp_medium_graph，否则用 tsp_large_graph。"""
+    if n <= EXACT_BOUND_SIZE:
+        return "tsp_small_graph"
+    return "tsp_medium_graph" if n <= 300 else "tsp_large_graph"
+
+
+def _budget_key(budget):
+    return f"{budget:g}"
+
+
+def cost_at(trace, budget):
+    """质量-时间轨迹上 budget 秒时的最好回路长度；那时还没有回路时返回 None。"""
+    best = None
+    for elapsed, cost in trace:
+        if elapsed > budget:
+            break
+        best = cost
+    return best
+
+
+def instance_bound(matrix, bound_time_limit=10.0):
+    """
+    实例的下界：不超过 EXACT_BOUND_SIZE 个顶点时用 Held-Karp 求出最优值，否则用 1-树下界。
+
+    返回：
+    - `(下界, 类型)`，类型为 "exact" 或 "one_tree"。
+    """
+    if len(matrix) <= EXACT_BOUND_SIZE:
+        return held_karp(matrix)[0], "exact"
+    return held_karp_bound(matrix, deadline=perf_counter() + bound_time_limit), "one_tree"
+
+
+def run_case(n, seed, budgets=DEFAULT_BUDGETS, solver=None, bound_time_limit=10.0):
+    """
+    生成一个实例并运行一次求解器。
+
+    参数：
+    - n (int): 顶点数。
+    - seed (int): `generate_graph` 和求解器使用的随机数种子。
+    - budgets (sequence): 要记录回路长度的时间预算（秒），求解器的 time_limit 取其中最大的一个。
+    - solver (str, optional): `SOLVERS` 中的求解器名，默认为 `default_solver(n)`。
+    - bound_time_limit (float): 计算 1-树下界的最长时间（秒）。
+
+    返回：
+    - 一条结果记录（字典）。
+    """
+    solver = solver or default_solver(n)
+    solve = SOLVERS[solver]
+    graph = generate_graph(n, complete=True, weight_bounds=WEIGHT_BOUNDS, seed=seed)
+    lower_bound, bound_kind = instance_bound(graph.weight_matrix(), bound_time_limit)
+
+    distance, _ = solve(graph, max(budgets), seed)
+    stats = graph.last_tsp_stats
+    trace = stats["trace"]
+    costs = {_budget_key(b): cost_at(trace, b) for b in budgets}
+
+    tracemalloc.start()
+    try:
+        solve(graph, min(budgets), seed)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    def gap(cost):
+        return None if cost is None else (cost - lower_bound) / cost if cost > 0 else 0.0
+
+    return {"size": n, "seed": seed, "solver": solver,
+            "time_to_first_tour": trace[0][0] if trace else None,
+            "best_cost": float(distance), "costs": costs,
+            "gaps": {key: gap(cost) for key, cost in costs.items()},
+            "gap": gap(float(distance)),
+            "lower_bound": float(lower_bound), "bound": bound_kind,
+            "optimal": bool(stats.get("optimal", False)),
+            "iterations": stats["iterations"], "elapsed": stats["elapsed"],
+            "peak_memory": peak}
+
+
+def run_suite(sizes=DEFAULT_SIZES, seeds=DEFAULT_SEEDS, budgets=DEFAULT_BUDGETS, bound_time_limit=10.0, log=None,
+              solver=None):
+    """
+    在每个规模、每个 seed 上运行 `run_case`。
+
+    参数：
+    - solver (str, optional): 所有规模都使用的求解器名（例如 "solve_tsp"），默认按规模选择。
+    - log (callable, optional): 每完成一个实例调用一次 `log(record)`，用于打印进度。
+
+    返回：
+    - 可以直接写成 JSON 的基线字典：format、created、environment、config 和 results。
+    """
+    results = []
+    for n in sizes:
+        for seed in seeds:
+            record = run_case(n, seed, budgets, solver, bound_time_limit)
+            results.append(record)
+            if log is not None:
+                log(record)
+    return {"format": FORMAT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                            "platform": platform.platform(), "processor": platform.processor()},
+            "config": {"sizes": list(sizes), "seeds": list(seeds), "budgets": list(budgets),
+                       "weight_bounds": list(WEIGHT_BOUNDS)},
+            "results": results}
+
+
+def save_results(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path):
+    """
+    读取 `save_results` 写出的基线。
+
+    抛出：
+    - ValueError: 文件格式版本不受支持。
+    """
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark format {results.get('format')!r}; expected {FORMAT_VERSION}.")
+    return results
+
+
+def check_bounds(results, tolerance=1e-6):
+    """
+    检查每条结果与下界是否一致：回路不能比下界短；求解器声称最优时间隙必须为 0。
+
+    返回：
+    - 问题列表，每项是包含 size、seed、metric 和 message 的字典。
+    """
+    problems = []
+    for record in results["results"]:
+        where = {"size": record["size"], "seed": record["seed"]}
+        if record["best_cost"] < record["lower_bound"] - tolerance:
+            problems.append({**where, "metric": "lower_bound",
+                             "message": f"tour {record['best_cost']} is shorter than the lower bound "
+                                        f"{record['lower_bound']}"})
+        if record["optimal"] and record["gap"] > tolerance:
+            problems.append({**where, "metric": "gap",
+                             "message": f"claimed optimal but the gap to the {record['bound']} bound is "
+                                        f"{record['gap']:.2%}"})
+    return problems
+
+
+def _by_size(results):
+    groups = {}
+    for record in results["results"]:
+        groups.setdefault(record["size"], {})[record["seed"]] = record
+    return groups
+
+
+def compare(baseline, current, time_tolerance=0.5, gap_tolerance=0.01, memory_tolerance=0.2,
+            min_time=0.005, min_memory=2**20):
+    """
+    把本次结果与基线按规模比较（只比较两边都有的 seed）。
+
+    - time_to_first_tour、peak_memory：中位数比基线高出超过相对容差，且绝对差超过 min_time / min_memory；
+    - 每个预算下的间隙和最终间隙：平均值比基线高出超过 gap_tolerance（绝对值，0.01 即 1 个百分点），
+      或者基线在该预算内已经有回路而本次没有；
+    - 实例的下界与基线不同（生成器或下界算法变了）时，结果不可比，也作为问题报告。
+
+    另外包含 `check_bounds(current)` 的结果。
+
+    返回：
+    - 回归列表，每项是包含 size、metric、baseline、current 和 message 的字典；为空表示没有回归。
+    """
+    regressions = [{**problem, "baseline": None, "current": None} for problem in check_bounds(current)]
+    old_groups, new_groups = _by_size(baseline), _by_size(current)
+    for size in sorted(set(old_groups) & set(new_groups)):
+        seeds = sorted(set(old_groups[size]) & set(new_groups[size]))
+        if not seeds:
+            continue
+        old = [old_groups[size][s] for s in seeds]
+        new = [new_groups[size][s] for s in seeds]
+
+        def report(metric, before, after, message):
+            regressions.append({"size": size, "metric": metric, "baseline": before, "current": after,
+                                "message": message})
+
+        changed = [s for s, a, b in zip(seeds, old, new) if abs(a["lower_bound"] - b["lower_bound"]) > 1e-6]
+        if changed:
+            report("instance", None, None, f"lower bounds differ from the baseline for seeds {changed}; "
+                                           "the instances or the bound changed, so the results are not comparable")
+            continue
+
+        for metric, tolerance, floor in (("time_to_first_tour", time_tolerance, min_time),
+                                         ("peak_memory", memory_tolerance, min_memory)):
+            before = [r[metric] for r in old if r[metric] is not None]
+            after = [r[metric] for r in new if r[metric] is not None]
+            if before and after:
+                before, after = median(before), median(after)
+                if after > before * (1 + tolerance) and after - before > floor:
+                    report(metric, before, after, f"median {metric} grew from {before:.4g} to {after:.4g}")
+
+        for key in old[0]["gaps"]:
+            if any(key not in r["gaps"] for r in new):
+                continue
+            missing = [s for s, a, b in zip(seeds, old, new) if a["gaps"][key] is not None and b["gaps"][key] is None]
+            if missing:
+                report(f"gap@{key}s", None, None, f"no tour within {key} s for seeds {missing}")
+                continue
+            pairs = [(a["gaps"][key], b["gaps"][key]) for a, b in zip(old, new) if a["gaps"][key] is not None]
+            if pairs:
+                before, after = mean(p[0] for p in pairs), mean(p[1] for p in pairs)
+                if after > before + gap_tolerance:
+                    report(f"gap@{key}s", before, after, f"mean gap at {key} s grew from {before:.2%} to {after:.2%}")
+        before, after = mean(r["gap"] for r in old), mean(r["gap"] for r in new)
+        if after > before + gap_tolerance:
+            report("gap", before, after, f"mean final gap grew from {before:.2%} to {after:.2%}")
+    return regressions
+
+
+def summarize(results):
+    """按规模汇总结果的文本表格。"""
+    budgets = [_budget_key(b) for b in results["config"]["budgets"]]
+    lines = [f"{'size':>6} {'solver':<17} {'first tour':>11} {'peak MB':>9} "
+             + " ".join(f"{'gap@' + b + 's':>10}" for b in budgets) + f" {'final gap':>10}"]
+    for size, records in sorted(_by_size(results).items()):
+        records = list(records.values())
+        first = [r["time_to_first_tour"] for r in records if r["time_to_first_tour"] is not None]
+        gaps = []
+        for b in budgets:
+            values = [r["gaps"].get(b) for r in records]
+            gaps.append(f"{mean(values):>10.2%}" if None not in values else f"{'-':>10}")
+        lines.append(f"{size:>6} {records[0]['solver']:<17} {median(first) if first else float('nan'):>10.4f}s "
+                     f"{median(r['peak_memory'] for r in records) / 2**20:>9.1f} " + " ".join(gaps)
+                     + f" {mean(r['gap'] for r in records):>10.2%}")
+    return "\n".join(lines)
+
+
+def _print_regressions(regressions):
+    for r in regressions:
+        where = f"size={r['size']}" + (f" seed={r['seed']}" if "seed" in r else "")
+        print(f"REGRESSION {where} {r['metric']}: {r['message']}")
+    print(f"{len(regressions)} regression(s)." if regressions else "No regressions.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the TSP solvers and compare against a JSON baseline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmark suite")
+    run.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    run.add_argument("--seeds", type=int, nargs="+", default=list(DEFAULT_SEEDS))
+    run.add_argument("--budgets", type=float, nargs="+", default=list(DEFAULT_BUDGETS))
+    run.add_argument("--bound-time-limit", type=float, default=10.0)
+    run.add_argument("--solver", choices=sorted(SOLVERS), help="use this solver for every size")
+    run.add_argument("-o", "--output", help="write the results to this JSON file")
+    run.add_argument("--compare", metavar="BASELINE", help="compare the results against this baseline")
+    check = commands.add_parser("compare", help="compare two result files")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    for command in (run, check):
+        command.add_argument("--time-tolerance", type=float, default=0.5)
+        command.add_argument("--gap-tolerance", type=float, default=0.01)
+        command.add_argument("--memory-tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        def log(record):
+            print(f"n={record['size']:<6} seed={record['seed']:<3} cost={record['best_cost']:<10g} "
+                  f"gap={record['gap']:.2%}  first tour {record['time_to_first_tour']:.4f}s", flush=True)
+        current = run_suite(args.sizes, args.seeds, args.budgets, args.bound_time_limit, log=log, solver=args.solver)
+        if args.output:
+            save_results(current, args.output)
+        baseline = load_results(args.compare) if args.compare else None
+    else:
+        baseline, current = load_results(args.baseline), load_results(args.current)
+    print(summarize(current))
+    if baseline is None:
+        regressions = [{**p, "baseline": None, "current": None} for p in check_bounds(current)]
+    else:
+        regressions = compare(baseline, current, args.time_tolerance, args.gap_tolerance, args.memory_tolerance)
+    _print_regressions(regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
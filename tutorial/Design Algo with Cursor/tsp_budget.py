@@ -0,0 +1,97 @@
+"""
+TSP 求解器的时间 / 迭代预算。
+
+所有求解器都是"随时可停"（anytime）的改进循环：先尽快得到一条回路，然后在预算内不断改进，
+预算用完时返回目前最好的回路。`SolveBudget` 负责计时（基于单调时钟 `time.perf_counter`）、
+计数，并记录"质量-时间"轨迹，求解结束后可以在 `Graph_Advanced.last_tsp_stats` 中查看。
+"""
+from time import perf_counter
+
+INF = float('inf')
+
+
+class SolveBudget:
+    """
+    一次求解的预算和改进轨迹。
+
+    参数：
+    - time_limit (float, optional): 最长运行时间（秒）。None 表示不限时。
+    - max_iterations (int, optional): 最多的改进迭代次数（具体含义由求解器决定）。None 表示不限次数。
+
+    属性：
+    - start (float): 开始时刻（`perf_counter()`）。
+    - deadline (float): 截止时刻；不限时为无穷大。内层循环可以每隔若干步直接与 `perf_counter()` 比较。
+    - iterations (int): 已完成的迭代次数。
+    - best_cost (float): 目前最好的回路长度。
+    - trace (list): `(相对开始的秒数, 回路长度)` 列表，每次找到更好的回路时追加一项。
+    """
+
+    def __init__(self, time_limit=None, max_iterations=None):
+        self.start = perf_counter()
+        self.time_limit = time_limit
+        self.deadline = INF if time_limit is None else self.start + time_limit
+        self.max_iterations = max_iterations
+        self.iterations = 0
+        self.best_cost = INF
+        self.trace = []
+
+    def elapsed(self):
+        return perf_counter() - self.start
+
+    def expired(self):
+        """预算是否已经用完。"""
+        if self.max_iterations is not None and self.iterations >= self.max_iterations:
+            return True
+        return perf_counter() >= self.deadline
+
+    def step(self):
+        """
+        开始下一次迭代：预算未用完时计数加一并返回 True，否则返回 False。
+        适合写成 `while budget.step(): ...`。
+        """
+        if self.expired():
+            return False
+        self.iterations += 1
+        return True
+
+    def improve(self, cost):
+        """
+        报告一条回路的长度；比目前最好的更短时记入轨迹。
+
+        返回：
+        - 是否是新的最好结果。
+        """
+        if cost < self.best_cost:
+            self.best_cost = cost
+            self.trace.append((self.elapsed(), float(cost)))
+            return True
+        return False
+
+    def merge(self, trace, iterations=0):
+        """
+        并入另一次求解（例如并行的工作进程）的轨迹和迭代次数。
+
+        参数：
+        - trace (list): `(相对本预算开始的秒数, 回路长度)` 列表。
+        - iterations (int): 要累加的迭代次数。
+        """
+        self.iterations += iterations
+        merged = []
+        for elapsed, cost in sorted(self.trace + list(trace)):
+            if not merged or cost < merged[-1][1]:
+                merged.append((elapsed, float(cost)))
+        self.trace = merged
+        if merged:
+            self.best_cost = min(self.best_cost, merged[-1][1])
+
+    def stats(self, **extra):
+        """
+        汇总本次求解的统计信息。
+
+        返回：
+        - 包含 best_cost、iterations、elapsed、trace 以及 `extra` 中各项的字典。
+        """
+        stats = {"best_cost": float(self.best_cost), "iterations": self.iterations,
+                 "elapsed": self.elapsed(), "trace": list(self.trace)}
+        stats.update(extra)
+        return stats
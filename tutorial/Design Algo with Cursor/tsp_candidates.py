@@ -0,0 +1,274 @@
+"""
+不需要 n×n 距离矩阵的大规模 TSP（10 万个顶点的矩阵要 80 GB）。
+
+距离由隐式的权重来源按需计算：
+
+- `CoordinateWeights`：顶点坐标加距离函数（"euclidean"、"manhattan"、"chebyshev" 或自定义的向量化函数）；
+- `CallbackWeights`：任意的向量化回调 `weight(a, b)`。
+
+两者都可以像矩阵一样读取：`weights[a][b]` 是一条边的长度（供 `LocalSearch` 使用），
+`weights[a, 顶点数组]` 一次算出多条边的长度（供构造算法使用）。
+
+`knn_candidates` 为每个顶点选出 k 个最近邻，`symmetric_candidates` 把它们合并成按长度排序的对称 CSR 数组
+`(indptr, indices, weights)`。坐标加内置距离时用均匀网格分桶，只比较相邻格子里的点，O(n·k) 次距离计算；
+其他情况逐块扫描全部顶点对，时间 O(n^2)，但每次只占用固定大小的内存。
+
+之后构造（候选边上的贪心匹配，或坐标上的 Hilbert 曲线）和局部搜索（tsp_local_search.py）只使用候选边
+和按需计算的距离，峰值内存随 n 线性增长。
+"""
+import math
+
+import numpy as np
+
+from tsp_construct import greedy_from_edges, hilbert_order
+
+INF = float('inf')
+# 逐块计算距离时每块最多的元素数（约 32 MB 的 float64）
+BLOCK_ELEMENTS = 1 << 22
+
+_METRICS = {
+    "euclidean": (lambda d: np.sqrt(np.einsum('...i,...i->...', d, d)), math.dist),
+    "manhattan": (lambda d: np.abs(d).sum(axis=-1), lambda p, q: sum(abs(a - b) for a, b in zip(p, q))),
+    "chebyshev": (lambda d: np.abs(d).max(axis=-1), lambda p, q: max(abs(a - b) for a, b in zip(p, q))),
+}
+
+
+class _WeightRow:
+    """`weights[a]` 的结果：`row[b]` 按需计算 a 到 b 的距离。"""
+
+    __slots__ = ("weights", "a")
+
+    def __init__(self, weights, a):
+        self.weights = weights
+        self.a = a
+
+    def __getitem__(self, b):
+        return self.weights.weight(self.a, b)
+
+
+class _ImplicitWeights:
+    """隐式权重的公共部分：子类提供 `n`、`weight(a, b)` 和向量化的 `pairs(a, b)`。"""
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            a, b = key
+            return self.pairs(np.asarray(a), np.asarray(b))
+        return _WeightRow(self, key)
+
+    def tour_cost(self, tour):
+        """闭合回路的长度。"""
+        tour = np.asarray(tour)
+        return float(self.pairs(tour, np.roll(tour, -1)).sum())
+
+    def matrix(self):
+        """完整的 n×n 距离矩阵（对角线为无穷大），只适合小实例。"""
+        ids = np.arange(self.n)
+        matrix = self.pairs(ids[:, None], ids[None, :]).astype(np.float64)
+        np.fill_diagonal(matrix, INF)
+        return matrix
+
+
+class CoordinateWeights(_ImplicitWeights):
+    """
+    由顶点坐标和距离函数定义的权重。
+
+    参数：
+    - coords (np.ndarray): 形状为 (n, d) 的坐标。
+    - metric (str | callable): "euclidean"、"manhattan"、"chebyshev"，或向量化函数 `metric(p, q)`：
+      对形状为 (..., d) 的两组坐标逐对返回距离。
+    """
+
+    def __init__(self, coords, metric="euclidean"):
+        coords = np.asarray(coords, dtype=np.float64)
+        if coords.ndim == 1:
+            coords = coords[:, None]
+        self.coords = coords
+        self.n = len(coords)
+        self.metric = metric
+        if callable(metric):
+            self._vector = lambda p, q: np.asarray(metric(p, q), dtype=np.float64)
+            self._scalar = lambda p, q: float(metric(np.asarray(p), np.asarray(q)))
+        elif metric in _METRICS:
+            vector, self._scalar = _METRICS[metric]
+            self._vector = lambda p, q: vector(p - q)
+        else:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {sorted(_METRICS)} or a callable.")
+        # LocalSearch 逐对读取距离，元组上的 math 函数比 NumPy 标量运算快得多
+        self._points = [tuple(p) for p in coords.tolist()]
+
+    def weight(self, a, b):
+        return self._scalar(self._points[a], self._points[b])
+
+    def pairs(self, a, b):
+        return self._vector(self.coords[a], self.coords[b])
+
+
+class CallbackWeights(_ImplicitWeights):
+    """
+    由回调函数定义的权重。
+
+    参数：
+    - weight (callable): `weight(a, b)`，a、b 是顶点编号的整数数组（可以广播），返回对应的距离数组；
+      传入两个整数时返回一个数。
+    - n (int): 顶点数。
+    """
+
+    def __init__(self, weight, n):
+        self.callback = weight
+        self.n = n
+
+    def weight(self, a, b):
+        return float(self.callback(a, b))
+
+    def pairs(self, a, b):
+        return np.asarray(self.callback(a, b), dtype=np.float64)
+
+
+def _select_nearest(distances, k):
+    """每行中最小的 k 个元素的列号，按距离从小到大排序。"""
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(nearest, order, axis=1)
+
+
+def _blocked_knn(weights, k):
+    """逐块扫描全部顶点对的 k 近邻：O(n^2) 次距离计算，每块最多 BLOCK_ELEMENTS 个元素。"""
+    n = weights.n
+    ids = np.arange(n)
+    result = np.empty((n, k), dtype=np.int64)
+    step = max(1, BLOCK_ELEMENTS // n)
+    for lo in range(0, n, step):
+        rows = ids[lo:lo + step]
+        distances = weights.pairs(rows[:, None], ids[None, :])
+        distances[np.arange(len(rows)), rows] = INF
+        result[lo:lo + step] = _select_nearest(distances, k)
+    return result
+
+
+def _grid_knn(weights, k):
+    """
+    坐标上的 k 近邻：按前两维把点分进边长为 h 的正方形格子（平均每格约 k 个点），
+    每个点先在以自己格子为中心的 3×3 个格子里找，第 k 近的距离超过 r·h 时把范围扩大到 (2r+1)×(2r+1)。
+    范围之外的点至少在一个坐标上相差 r·h，而内置的三种距离都不小于任一坐标之差，所以结果是精确的。
+    """
+    coords, n = weights.coords, weights.n
+    plane = coords[:, :2] if coords.shape[1] >= 2 else np.column_stack([coords[:, 0], np.zeros(n)])
+    lo = plane.min(axis=0)
+    extent = plane.max(axis=0) - lo
+    h = max(float(extent.max()) / max(1, int(math.sqrt(n / k))), 1e-12)
+    gx, gy = (np.floor(extent / h).astype(np.int64) + 1).tolist()
+    cx = np.minimum(((plane[:, 0] - lo[0]) / h).astype(np.int64), gx - 1)
+    cy = np.minimum(((plane[:, 1] - lo[1]) / h).astype(np.int64), gy - 1)
+    cell = cx * gy + cy
+    order = np.argsort(cell, kind="stable")
+    bounds = np.searchsorted(cell[order], np.arange(gx * gy + 1))
+    bounds_list = bounds.tolist()
+
+    result = np.empty((n, k), dtype=np.int64)
+    for c in np.flatnonzero(np.diff(bounds)).tolist():
+        x, y = divmod(c, gy)
+        pending = order[bounds_list[c]:bounds_list[c + 1]]
+        r = 1
+        while len(pending):
+            y0, y1 = max(0, y - r), min(gy - 1, y + r)
+            nearby = np.concatenate([order[bounds_list[xi * gy + y0]:bounds_list[xi * gy + y1 + 1]]
+                                     for xi in range(max(0, x - r), min(gx - 1, x + r) + 1)])
+            everything = x - r <= 0 and y - r <= 0 and x + r >= gx - 1 and y + r >= gy - 1
+            if len(nearby) > k or everything:
+                distances = weights.pairs(pending[:, None], nearby[None, :])
+                distances[pending[:, None] == nearby[None, :]] = INF
+                picked = _select_nearest(distances, k)
+                kth = np.take_along_axis(distances, picked[:, -1:], axis=1)[:, 0]
+                done = (kth <= r * h) | everything
+                result[pending[done]] = nearby[picked[done]]
+                pending = pending[~done]
+            r += 1
+    return result
+
+
+def knn_candidates(weights, k=8):
+    """
+    为每个顶点选出 k 个最近邻（按距离从小到大排序）。
+
+    参数：
+    - weights: `CoordinateWeights` 或 `CallbackWeights`。
+    - k (int): 每个顶点的近邻数，不超过 n - 1。
+
+    返回：
+    - 形状为 (n, k) 的 int64 数组。
+    """
+    k = max(1, min(k, weights.n - 1))
+    if isinstance(weights, CoordinateWeights) and not callable(weights.metric):
+        return _grid_knn(weights, k)
+    return _blocked_knn(weights, k)
+
+
+def symmetric_candidates(weights, nearest):
+    """
+    把 k 近邻表合并成对称的候选图（a 是 b 的近邻或 b 是 a 的近邻时都有边 a-b），
+    每行按边长从小到大排序。
+
+    返回：
+    - CSR 数组 `(indptr, indices, lengths)`，每个顶点有 k 到 2k 条候选边。
+    """
+    n, k = nearest.shape
+    rows = np.repeat(np.arange(n), k)
+    cols = nearest.ravel()
+    lengths = weights.pairs(rows, cols)
+    heads, tails = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+    lengths = np.concatenate([lengths, lengths])
+    _, unique = np.unique(heads * n + tails, return_index=True)
+    heads, tails, lengths = heads[unique], tails[unique], lengths[unique]
+    order = np.lexsort((lengths, heads))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(heads, minlength=n), out=indptr[1:])
+    return indptr, tails[order], lengths[order]
+
+
+def candidate_rows(indptr, indices, lengths):
+    """把 CSR 候选图转换成 `LocalSearch` 使用的列表的列表，每行按边长从小到大排序。"""
+    n = len(indptr) - 1
+    owners = np.repeat(np.arange(n), np.diff(indptr))
+    order = np.lexsort((lengths, owners))
+    indices = indices[order].tolist()
+    bounds = np.asarray(indptr).tolist()
+    return [indices[bounds[v]:bounds[v + 1]] for v in range(n)]
+
+
+CANDIDATE_CONSTRUCTIONS = ("greedy", "space_filling")
+
+
+def candidate_tour(weights, indptr, indices, lengths, start=0, method="greedy"):
+    """
+    只使用候选边构造初始回路。
+
+    参数：
+    - weights: 隐式权重，连接贪心片段时按需计算距离。
+    - indptr, indices, lengths: 候选图的 CSR 数组。
+    - start (int): 起点编号。
+    - method (str): "greedy"（候选边上的贪心匹配）或 "space_filling"（按 Hilbert 曲线访问，需要坐标）。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+
+    抛出：
+    - ValueError: 未知的构造方法，或对没有坐标的权重使用 "space_filling"。
+    """
+    n = weights.n
+    if method == "space_filling":
+        if not isinstance(weights, CoordinateWeights):
+            raise ValueError("The space_filling construction needs vertex coordinates.")
+        coords = weights.coords
+        if coords.shape[1] < 2:
+            coords = np.column_stack([coords[:, 0], np.zeros(n)])
+        tour = hilbert_order(coords[:, :2]).tolist()
+        i = tour.index(start)
+        return tour[i:] + tour[:i]
+    if method != "greedy":
+        raise ValueError(f"Unknown construction {method!r}; expected one of {list(CANDIDATE_CONSTRUCTIONS)}.")
+    heads = np.repeat(np.arange(n), np.diff(indptr))
+    once = heads < indices
+    return greedy_from_edges(weights, n, heads[once], indices[once], lengths[once], start)
@@ -0,0 +1,495 @@
+"""
+TSP 回路构造启发式。
+
+输入是 NumPy 距离矩阵（见 `Graph.weight_matrix()`），返回不含重复起点的顶点编号列表
+（回路的第一个顶点是起点），可以直接交给 `tsp_local_search.LocalSearch` 继续改进。
+
+可用的构造方法（按名字在 `CONSTRUCTIONS` 中登记，用 `construct_tour` 选择）：
+
+- nearest_neighbour：最近邻，每一步是一次屏蔽 argmin，O(n^2)。
+- greedy：贪心匹配边。只在 k 近邻候选边中按长度从短到长加边（度数不超过 2、用并查集避免成环），
+  剩下的路径片段再按最近邻方式首尾相接。
+- cheapest_insertion：每一步插入"插入代价"最小的顶点，每个未插入顶点的最佳插入边增量维护。
+- farthest_insertion：每一步插入离当前回路最远的顶点，插在代价最小的位置。
+- double_tree：最小生成树的先序遍历（"两倍树"），满足三角不等式时不超过最优解的 2 倍。
+- christofides：Christofides 式构造，最小生成树加上奇度顶点的贪心最小匹配，求欧拉回路后跳过重复顶点。
+  用贪心匹配代替最小权完美匹配，因此没有 1.5 倍的理论保证，但实际回路通常比两倍树短得多。
+- space_filling：按 Hilbert 曲线顺序访问顶点。需要平面坐标；没有坐标时用经典多维缩放（MDS）
+  从距离矩阵中估计二维坐标，适合几何（欧氏）实例，O(n^2)，是最快的构造方法。
+
+`compare_constructions` 对同一个矩阵运行各方法，返回回路长度和用时，便于比较。
+"""
+from time import perf_counter
+
+import numpy as np
+
+from spanning_tree import find, prim, tree_adjacency
+from tsp_local_search import candidate_lists
+
+INF = float('inf')
+
+
+def _rotate(tour, start):
+    """把回路旋转为以 start 开头。"""
+    i = tour.index(start)
+    return tour[i:] + tour[:i]
+
+
+def nearest_neighbour(matrix, start=0):
+    """
+    最近邻构造：每一步走到离当前顶点最近的未访问顶点。
+    用一个"已访问"屏蔽行做 argmin，每一步是一次 O(n) 的向量化运算。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵。
+    - start (int): 起点编号。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    n = len(matrix)
+    penalty = np.zeros(n)
+    penalty[start] = INF
+    tour = [start]
+    current = start
+    for _ in range(n - 1):
+        current = int(np.argmin(matrix[current] + penalty))
+        penalty[current] = INF
+        tour.append(current)
+    return tour
+
+
+def _join_fragments(matrix, fragments, start):
+    """
+    把若干条路径片段按最近邻方式首尾相接成一条回路：从第一个片段出发，每次从当前末端走到
+    最近的未使用片段的某一端（对所有片段端点做一次屏蔽 argmin），并按需要翻转该片段。
+    """
+    ends = np.array([[f[0], f[-1]] for f in fragments]).ravel()
+    penalty = np.zeros(len(ends))
+    penalty[:2] = INF
+    tour = list(fragments[0])
+    for _ in range(len(fragments) - 1):
+        j = int(np.argmin(matrix[tour[-1], ends] + penalty))
+        i = j // 2
+        tour.extend(fragments[i] if j % 2 == 0 else fragments[i][::-1])
+        penalty[2 * i:2 * i + 2] = INF
+    return _rotate(tour, start)
+
+
+def greedy_from_edges(matrix, n, heads, tails, weights, start=0):
+    """
+    在给定的候选边上做贪心匹配：按长度从短到长加入不会使某个顶点度数超过 2、也不会提前成环的边，
+    得到若干条路径片段，再按最近邻方式把片段首尾相接。
+
+    参数：
+    - matrix: 距离矩阵，或支持 `matrix[v, 顶点数组]` 取一行中若干项的隐式权重（见 tsp_candidates.py），
+      只在连接片段时使用。
+    - n (int): 顶点数。
+    - heads, tails, weights: 候选边（每条无向边出现一次）的两个端点和长度。
+    - start (int): 起点编号。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    order = np.argsort(weights, kind="stable")
+    degree = [0] * n
+    parent = list(range(n))
+    adjacency = [[] for _ in range(n)]
+    added = 0
+    for a, b in zip(heads[order].tolist(), tails[order].tolist()):
+        if degree[a] == 2 or degree[b] == 2:
+            continue
+        ra, rb = find(parent, a), find(parent, b)
+        if ra == rb:
+            continue
+        parent[ra] = rb
+        degree[a] += 1
+        degree[b] += 1
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+        added += 1
+        if added == n - 1:
+            break
+
+    fragments = []
+    seen = [False] * n
+    for v in range(n):
+        if seen[v] or degree[v] == 2:
+            continue
+        path = [v]
+        seen[v] = True
+        prev, cur = -1, v
+        while True:
+            nxt = [w for w in adjacency[cur] if w != prev]
+            if not nxt:
+                break
+            prev, cur = cur, nxt[0]
+            path.append(cur)
+            seen[cur] = True
+        fragments.append(path)
+    return _join_fragments(matrix, fragments, start)
+
+
+def greedy_edge(matrix, start=0, k=10):
+    """
+    贪心匹配边构造：把 k 近邻候选边按长度排序，依次加入不会使某个顶点度数超过 2、也不会提前成环的边，
+    得到若干条路径片段，再按最近邻方式把片段首尾相接（见 `greedy_from_edges`）。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵。
+    - start (int): 起点编号。
+    - k (int): 每个顶点参与排序的候选边数；只排序 n·k 条边而不是全部 n^2/2 条。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    n = len(matrix)
+    if n <= 3:
+        return nearest_neighbour(matrix, start)
+    matrix = np.asarray(matrix)
+    cand = candidate_lists(matrix, k)
+    rows = np.repeat(np.arange(n), cand.shape[1])
+    cols = cand.ravel()
+    # 每条无向边只保留一次
+    codes = np.unique(np.minimum(rows, cols) * n + np.maximum(rows, cols))
+    heads, tails = codes // n, codes % n
+    return greedy_from_edges(matrix, n, heads, tails, matrix[heads, tails], start)
+
+
+def cheapest_insertion(matrix, start=0):
+    """
+    最便宜插入构造：从 start 和它的最近邻组成的小回路出发，每一步把"插入代价"
+    d(a,c) + d(c,b) - d(a,b) 最小的未插入顶点 c 插到对应的边 (a,b) 中。
+
+    每个未插入顶点记录它当前的最佳插入边（用边的起点 a 表示，b = next[a]）。插入后只有两条新边需要
+    向量化地检查一遍，而最佳边恰好被拆掉的那些顶点才需要对整条回路重新计算，总体约为 O(n^2)。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵。
+    - start (int): 起点编号。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    if n <= 3:
+        return nearest_neighbour(matrix, start)
+    row = matrix[start].copy()
+    row[start] = INF
+    second = int(np.argmin(row))
+    nxt = np.full(n, -1)
+    nxt[start], nxt[second] = second, start
+    inserted = np.zeros(n, dtype=bool)
+    inserted[[start, second]] = True
+    # 两条边 start->second 和 second->start 的插入代价相同，取前者
+    best_cost = matrix[start] + matrix[second] - matrix[start, second]
+    best_from = np.full(n, start)
+    best_cost[inserted] = INF
+    members = [start, second]
+    for _ in range(n - 2):
+        c = int(np.argmin(best_cost))
+        a = int(best_from[c])
+        b = int(nxt[a])
+        nxt[a], nxt[c] = c, b
+        inserted[c] = True
+        best_cost[c] = INF
+        members.append(c)
+        # 最佳边 (a,b) 被拆掉的顶点：在整条回路上重新计算
+        stale = np.flatnonzero((best_from == a) & ~inserted)
+        if len(stale):
+            tour_from = np.array(members)
+            tour_to = nxt[tour_from]
+            costs = (matrix[np.ix_(tour_from, stale)] + matrix[np.ix_(tour_to, stale)]
+                     - matrix[tour_from, tour_to][:, None])
+            j = np.argmin(costs, axis=0)
+            best_cost[stale] = costs[j, np.arange(len(stale))]
+            best_from[stale] = tour_from[j]
+        # 新边 (a,c) 和 (c,b)
+        for u, v in ((a, c), (c, b)):
+            costs = matrix[u] + matrix[v] - matrix[u, v]
+            better = (costs < best_cost) & ~inserted
+            best_cost[better] = costs[better]
+            best_from[better] = u
+    tour = [start]
+    for _ in range(n - 1):
+        tour.append(int(nxt[tour[-1]]))
+    return tour
+
+
+def farthest_insertion(matrix, start=0):
+    """
+    最远插入构造：每一步选离当前回路最远（到回路的最近距离最大）的未插入顶点，
+    插到使回路增长最少的位置。先把远处的顶点定下来，回路的"骨架"比最近邻更合理。
+    每一步是几次 O(n) 的向量化运算。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵。
+    - start (int): 起点编号。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    if n <= 3:
+        return nearest_neighbour(matrix, start)
+    nearest = matrix[start].copy()
+    nearest[start] = -INF
+    tour = [start]
+    for _ in range(n - 1):
+        c = int(np.argmax(nearest))
+        ring = np.array(tour)
+        after = np.roll(ring, -1)
+        costs = matrix[ring, c] + matrix[c, after] - matrix[ring, after]
+        tour.insert(int(np.argmin(costs)) + 1, c)
+        np.minimum(nearest, matrix[c], out=nearest)
+        nearest[c] = -INF
+    return _rotate(tour, start)
+
+
+def double_tree(matrix, start=0):
+    """
+    两倍树构造：用 Prim 求最小生成树，从 start 出发做先序深度优先遍历（相当于沿树走一圈再跳过重复顶点）。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵。
+    - start (int): 起点编号。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    n = len(matrix)
+    heads, tails, _ = prim(matrix)
+    adjacency = tree_adjacency(n, heads, tails)
+    seen = [False] * n
+    tour = []
+    # 不连通时依次遍历每一棵树
+    for root in [start] + list(range(n)):
+        if seen[root]:
+            continue
+        stack = [root]
+        seen[root] = True
+        while stack:
+            v = stack.pop()
+            tour.append(v)
+            for w in reversed(adjacency[v]):
+                if not seen[w]:
+                    seen[w] = True
+                    stack.append(w)
+    return tour
+
+
+def _greedy_matching(matrix, vertices):
+    """在 vertices（偶数个）上做贪心最小匹配：所有顶点对按距离排序，依次匹配两端都还未匹配的对。"""
+    vertices = np.asarray(vertices)
+    first, second = np.triu_indices(len(vertices), 1)
+    order = np.argsort(matrix[vertices[first], vertices[second]], kind="stable")
+    matched = [False] * len(vertices)
+    pairs = []
+    for i, j in zip(first[order].tolist(), second[order].tolist()):
+        if not matched[i] and not matched[j]:
+            matched[i] = matched[j] = True
+            pairs.append((int(vertices[i]), int(vertices[j])))
+            if 2 * len(pairs) == len(vertices):
+                break
+    return pairs
+
+
+def christofides(matrix, start=0):
+    """
+    Christofides 式构造：最小生成树中奇度顶点有偶数个，把它们贪心地两两匹配后每个顶点都是偶度，
+    用 Hierholzer 算法从 start 出发求欧拉回路，只保留每个顶点第一次出现的位置。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵（完全图）。
+    - start (int): 起点编号。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    if n <= 3:
+        return nearest_neighbour(matrix, start)
+    heads, tails, _ = prim(matrix)
+    adjacency = tree_adjacency(n, heads, tails)
+    odd = [v for v in range(n) if len(adjacency[v]) % 2]
+    for a, b in _greedy_matching(matrix, odd):
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    # Hierholzer：多重图中每条边在两端各出现一次，used 按"边编号"标记
+    edge_ids = [[] for _ in range(n)]
+    count = 0
+    for a in range(n):
+        for b in adjacency[a]:
+            if a < b:
+                edge_ids[a].append((b, count))
+                edge_ids[b].append((a, count))
+                count += 1
+    # 两个奇度顶点之间恰好是一条树边时会出现重复边，上面按 a < b 各登记一次即可
+    used = [False] * count
+    cursor = [0] * n
+    stack, circuit = [start], []
+    while stack:
+        v = stack[-1]
+        edges = edge_ids[v]
+        while cursor[v] < len(edges) and used[edges[cursor[v]][1]]:
+            cursor[v] += 1
+        if cursor[v] == len(edges):
+            circuit.append(stack.pop())
+        else:
+            w, e = edges[cursor[v]]
+            used[e] = True
+            stack.append(w)
+    seen = [False] * n
+    tour = []
+    for v in reversed(circuit):
+        if not seen[v]:
+            seen[v] = True
+            tour.append(v)
+    return tour
+
+
+def classical_mds(matrix, dims=2, iterations=30, seed=0):
+    """
+    经典多维缩放：从距离矩阵估计 dims 维坐标。只用子空间迭代求双中心化矩阵
+    B = -1/2 · J D^2 J 的前 dims 个特征向量，每次迭代是一次 n×n 乘 n×dims 的矩阵乘法。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵。
+    - dims (int): 坐标维数。
+    - iterations (int): 子空间迭代次数。
+    - seed (int): 初始子空间的随机数种子。
+
+    返回：
+    - 形状为 (n, dims) 的坐标数组。
+    """
+    squared = np.asarray(matrix, dtype=np.float64) ** 2
+    squared = np.where(np.isfinite(squared), squared, 0.0)
+    row_mean = squared.mean(axis=1)
+    b = -0.5 * (squared - row_mean[:, None] - row_mean[None, :] + row_mean.mean())
+    basis = np.random.default_rng(seed).standard_normal((len(b), dims))
+    for _ in range(iterations):
+        basis, _ = np.linalg.qr(b @ basis)
+    values = np.maximum(np.einsum('ij,ij->j', basis, b @ basis), 0.0)
+    # 顶点数少于 dims 时 QR 只给出 n 列，其余坐标补 0
+    coords = np.zeros((len(b), dims))
+    coords[:, :basis.shape[1]] = basis * np.sqrt(values)
+    return coords
+
+
+def hilbert_order(coords, order=16):
+    """
+    按 Hilbert 曲线上的位置给平面上的点排序（向量化计算每个点的曲线下标）。
+
+    参数：
+    - coords (np.ndarray): 形状为 (n, 2) 的坐标。
+    - order (int): 曲线的阶数，网格为 2^order × 2^order。
+
+    返回：
+    - 点的编号数组，按曲线顺序排列。
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    lo = coords.min(axis=0)
+    span = max(float((coords.max(axis=0) - lo).max()), 1e-12)
+    side = 1 << order
+    grid = np.minimum(((coords - lo) / span * (side - 1)).astype(np.int64), side - 1)
+    x, y = grid[:, 0].copy(), grid[:, 1].copy()
+    d = np.zeros(len(coords), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # 旋转当前象限，使子曲线的方向一致
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return np.argsort(d, kind="stable")
+
+
+def space_filling(matrix, start=0, coords=None):
+    """
+    空间填充曲线构造：按 Hilbert 曲线顺序访问顶点。回路长度通常比最近邻差约 25%，但几乎不花时间，
+    适合作为超大实例局部搜索的起点。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵；提供 coords 时不使用。
+    - start (int): 起点编号。
+    - coords (np.ndarray, optional): 形状为 (n, 2) 的顶点坐标；缺省时用 `classical_mds` 从矩阵估计。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+    """
+    if len(matrix if coords is None else coords) <= 1:
+        return [start]
+    if coords is None:
+        coords = classical_mds(matrix)
+    return _rotate(hilbert_order(coords).tolist(), start)
+
+
+CONSTRUCTIONS = {
+    "nearest_neighbour": nearest_neighbour,
+    "greedy": greedy_edge,
+    "cheapest_insertion": cheapest_insertion,
+    "farthest_insertion": farthest_insertion,
+    "double_tree": double_tree,
+    "christofides": christofides,
+    "space_filling": space_filling,
+}
+
+
+def construct_tour(matrix, start=0, method="nearest_neighbour"):
+    """
+    按名字选择构造方法。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵。
+    - start (int): 起点编号。
+    - method (str): `CONSTRUCTIONS` 中的名字。
+
+    返回：
+    - 顶点编号列表，以 start 开头，不重复起点。
+
+    抛出：
+    - ValueError: 未知的构造方法。
+    """
+    if method not in CONSTRUCTIONS:
+        raise ValueError(f"Unknown construction {method!r}; expected one of {sorted(CONSTRUCTIONS)}.")
+    return CONSTRUCTIONS[method](matrix, start)
+
+
+def compare_constructions(matrix, start=0, methods=None):
+    """
+    在同一个矩阵上运行各构造方法并计时。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵。
+    - start (int): 起点编号。
+    - methods (list, optional): 要比较的方法名；默认为全部。
+
+    返回：
+    - `{方法名: {"cost": 回路长度, "seconds": 用时}}`。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    results = {}
+    for name in methods or CONSTRUCTIONS:
+        began = perf_counter()
+        tour = construct_tour(matrix, start, name)
+        seconds = perf_counter() - began
+        results[name] = {"cost": float(matrix[tour, np.roll(tour, -1)].sum()), "seconds": seconds}
+    return results
+
+
+if __name__ == "__main__":
+    from generate_large_graph import FIXTURES, build_fixture
+
+    for filename in FIXTURES:
+        graph = build_fixture(filename)
+        print(filename)
+        for name, result in compare_constructions(graph.weight_matrix()).items():
+            print(f"  {name:<20} cost {result['cost']:>10.1f}  {result['seconds'] * 1000:8.1f} ms")
@@ -0,0 +1,444 @@
+"""
+精确求解旅行商问题（TSP）的算法。
+
+这里的函数接收 NumPy 距离矩阵（见 `Graph.weight_matrix()`），顶点用整数编号表示，
+返回的回路以起点开始、以起点结束。
+"""
+from time import perf_counter
+
+import numpy as np
+
+from tsp_budget import SolveBudget
+from tsp_construct import nearest_neighbour
+from tsp_local_search import LocalSearch, candidate_lists, iterated_local_search
+
+INF = float('inf')
+
+# Held-Karp 动态规划表允许占用的默认内存上限（字节）。
+# n 个顶点需要 2^(n-1) * (n-1) 个表项：整数边权且总长不超过 2^24 时用 float32（4 字节），否则用 float64（8 字节）。
+# 以 float32 计，n=20 约 40 MB，n=22 约 176 MB，n=23 约 370 MB。
+HELD_KARP_MEMORY_LIMIT = 256 * 2**20
+# `held_karp` 的耗时约为 HELD_KARP_SECONDS · 2^n · n^2 秒：实测 n = 20 约 0.2 秒、n = 21 约 0.5 秒，
+# 常数取实测值的 1.5 倍，给较慢的机器留出余量
+HELD_KARP_SECONDS = 8e-10
+
+
+def _held_karp_dtype(matrix):
+    """整数边权、且任意回路长度都能被 float32 精确表示时使用 float32，否则使用 float64。"""
+    finite = matrix[np.isfinite(matrix)]
+    if finite.size and np.all(finite == np.round(finite)) and np.abs(finite).max() * len(matrix) < 2**24:
+        return np.float32
+    return np.float64
+
+
+def held_karp_memory(n, dtype=np.float32):
+    """
+    估算 Held-Karp 求解 n 个顶点时动态规划表占用的字节数，表的形状是 (2^(n-1), n-1)。
+    """
+    m = max(n - 1, 0)
+    return (2 ** m) * m * np.dtype(dtype).itemsize
+
+
+def held_karp_seconds(n):
+    """估算 `held_karp` 求解 n 个顶点的秒数，见 HELD_KARP_SECONDS。"""
+    return HELD_KARP_SECONDS * 2.0 ** n * n * n
+
+
+def held_karp(matrix, start=0, memory_limit=HELD_KARP_MEMORY_LIMIT, deadline=None, budget=None):
+    """
+    用 Held-Karp 位掩码动态规划求 TSP 的最优回路。
+
+    `dp[j, mask]` 表示从起点出发、恰好经过集合 mask 中的顶点、最后停在 j 的最短路径长度。
+    同样大小的所有子集一起向量化计算：用 `np.take` 取出这些子集的列（得到按行连续的 (n-1)×G 块），
+    对每个终点 j 逐行做"加常数 + 取最小"，得到把 j 接到末尾的代价（(min, +) 乘积），
+    再写入 `dp[j, mask | (1 << j)]`。每一步都是对一整行连续内存的运算，比按列跨步访问快得多。
+    不保存父指针，回溯时在 dp 表中找出满足 `dp[k, prev] + d[k, j] == dp[j, mask]` 的 k 即可。
+    时间复杂度 O(2^n · n^2)，20 个顶点约 0.2 秒（见 HELD_KARP_SECONDS）。支持有向图（非对称矩阵）。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵，不存在的边为无穷大。
+    - start (int): 起点编号。
+    - memory_limit (int): 动态规划表允许占用的最大字节数。
+    - deadline (float, optional): `time.perf_counter()` 的截止时刻，每算完一个终点检查一次。
+    - budget (SolveBudget, optional): 时间 / 迭代预算，每展开一层子集（一种子集大小）计一次迭代，
+      共 n-2 层；给出时 deadline 取 `budget.deadline`。
+
+    返回：
+    - `(回路长度, 回路顶点编号列表)`，回路以 start 开始并以 start 结束；不存在哈密顿回路时长度为无穷大。
+
+    抛出：
+    - ValueError: 如果所需内存超过 `memory_limit`。
+    - TimeoutError: 如果在算完之前超过了 `deadline`，或用完了 budget 的迭代次数。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    if n <= 1:
+        return 0.0, [start]
+    if budget is not None:
+        deadline = budget.deadline
+    dtype = _held_karp_dtype(matrix)
+    required = held_karp_memory(n, dtype)
+    if required > memory_limit:
+        raise ValueError(
+            f"Held-Karp needs about {required / 2**20:.0f} MB for {n} vertices, "
+            f"which exceeds the limit of {memory_limit / 2**20:.0f} MB. Use a heuristic solver instead.")
+
+    others = np.array([v for v in range(n) if v != start])
+    m = len(others)
+    d = matrix[np.ix_(others, others)].astype(dtype)
+    full = (1 << m) - 1
+
+    dp = np.full((m, 1 << m), INF, dtype=dtype)
+    dp[np.arange(m), 1 << np.arange(m)] = matrix[start, others]
+
+    # 按子集大小对所有掩码分组
+    masks = np.arange(1 << m, dtype=np.int64)
+    popcount = np.zeros(1 << m, dtype=np.int8)
+    for b in range(m):
+        popcount += ((masks >> b) & 1).astype(np.int8)
+    order = np.argsort(popcount, kind="stable")
+    bounds = np.searchsorted(popcount[order], np.arange(m + 2))
+
+    for size in range(1, m):
+        if budget is not None and not budget.step():
+            raise TimeoutError("Held-Karp ran out of iterations before finishing.")
+        group = order[bounds[size]:bounds[size + 1]]
+        block = np.take(dp, group, axis=1)
+        extend = np.empty_like(block)
+        scratch = np.empty(len(group), dtype=dtype)
+        for j in range(m):
+            if deadline is not None and perf_counter() > deadline:
+                raise TimeoutError("Held-Karp did not finish before the deadline.")
+            # (min, +) 乘积：extend[j, i] = min_k block[k, i] + d[k, j]
+            row = extend[j]
+            np.add(block[0], d[0, j], out=row)
+            for k in range(1, m):
+                np.add(block[k], d[k, j], out=scratch)
+                np.minimum(row, scratch, out=row)
+        for j in range(m):
+            bit = 1 << j
+            outside = (group & bit) == 0
+            dp[j, group[outside] | bit] = extend[j, outside]
+
+    closing = dp[:, full].astype(np.float64) + matrix[others, start]
+    last = int(np.argmin(closing))
+    cost = float(closing[last])
+    if cost == INF:
+        return INF, []
+
+    # 回溯：在前一个子集中找到能以相同代价到达当前终点的顶点
+    tour = []
+    mask = full
+    while True:
+        tour.append(int(others[last]))
+        previous_mask = mask ^ (1 << last)
+        if not previous_mask:
+            break
+        candidates = dp[:, previous_mask] + d[:, last]
+        last_cost = dp[last, mask]
+        last = int(np.flatnonzero(candidates == last_cost)[0])
+        mask = previous_mask
+    tour.reverse()
+    return cost, [start] + tour + [start]
+
+
+def tour_cost(matrix, tour):
+    """计算回路（首尾为同一顶点的顶点编号列表）的总长度。"""
+    tour = np.asarray(tour)
+    return float(np.asarray(matrix)[tour[:-1], tour[1:]].sum())
+
+
+# 分支定界中"必须包含"的边在 1-树中使用的代价偏移量
+_FORCED = 1e9
+
+
+def _one_tree(cost, state):
+    """
+    计算带约束的最小 1-树：顶点 1..n-1 上的最小生成树（Prim，O(n^2) 向量化实现），
+    再加上顶点 0 的两条最便宜的边。`state[i, j]` 为 1 表示必须包含，-1 表示禁止使用。
+
+    返回：
+    - `(边的两个端点数组, 各顶点度数)`；约束下不存在 1-树时返回 None。
+    """
+    n = len(cost)
+    c = np.where(state < 0, INF, cost - _FORCED * (state > 0))
+    heads = np.empty(n, dtype=np.int64)
+    tails = np.empty(n, dtype=np.int64)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = in_tree[1] = True
+    key = c[1].copy()
+    parent = np.ones(n, dtype=np.int64)
+    key[in_tree] = INF
+    for k in range(n - 2):
+        v = int(np.argmin(key))
+        if key[v] == INF:
+            return None
+        heads[k], tails[k] = parent[v], v
+        in_tree[v] = True
+        key[v] = INF
+        better = (c[v] < key) & ~in_tree
+        key[better] = c[v][better]
+        parent[better] = v
+    row = c[0].copy()
+    row[0] = INF
+    first, second = np.argsort(row)[:2]
+    if row[second] == INF:
+        return None
+    heads[n - 2:] = 0
+    tails[n - 2], tails[n - 1] = first, second
+    degree = np.bincount(heads, minlength=n) + np.bincount(tails, minlength=n)
+    return (heads, tails), degree
+
+
+def _propagate(state):
+    """
+    根据度数约束推导更多的边状态：每个顶点恰好有两条回路边，
+    已有两条必选边的顶点禁止其余的边，只剩两条可用边的顶点必须使用它们。
+    同时检查必选边是否形成了不经过所有顶点的子回路。
+
+    返回：
+    - 约束是否仍然可能满足。
+    """
+    n = len(state)
+    changed = True
+    while changed:
+        changed = False
+        included = (state > 0).sum(axis=1)
+        available = n - (state < 0).sum(axis=1)  # 对角线也记为禁止
+        if (included > 2).any() or (available < 2).any():
+            return False
+        for v in np.flatnonzero((included == 2) & (available > 2)):
+            free = state[v] == 0
+            free[v] = False
+            state[v, free] = -1
+            state[free, v] = -1
+            changed = True
+        for v in np.flatnonzero((available == 2) & (included < 2)):
+            free = state[v] == 0
+            free[v] = False
+            state[v, free] = 1
+            state[free, v] = 1
+            changed = True
+    # 用并查集检查必选边是否形成过短的环
+    root = list(range(n))
+
+    def find(x):
+        while root[x] != x:
+            root[x] = root[root[x]]
+            x = root[x]
+        return x
+
+    rows, cols = np.nonzero(np.triu(state > 0, 1))
+    if len(rows) == n:
+        # 必选边已经确定了每个顶点的两条边：若它们组成多个子回路，1-树会因为图不连通而不存在
+        return True
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        ri, rj = find(i), find(j)
+        if ri == rj:
+            return False
+        root[ri] = rj
+    return True
+
+
+def _tree_tour(edges, n):
+    """1-树中所有顶点度数都为 2 时，它就是一条哈密顿回路；按邻接关系走一圈得到顶点顺序。"""
+    neighbours = [[] for _ in range(n)]
+    for i, j in zip(*(e.tolist() for e in edges)):
+        neighbours[i].append(j)
+        neighbours[j].append(i)
+    tour = [0]
+    previous, current = -1, 0
+    for _ in range(n - 1):
+        a, b = neighbours[current]
+        previous, current = current, (b if a == previous else a)
+        tour.append(current)
+    return tour + [0]
+
+
+def _rotate(tour, start):
+    """把回路旋转为从 start 开始、以 start 结束。"""
+    body = tour[:-1]
+    i = body.index(start)
+    body = body[i:] + body[:i]
+    return body + [start]
+
+
+def held_karp_bound(matrix, upper_bound=None, iterations=100, deadline=None):
+    """
+    Held-Karp 1-树下界（分支定界根节点上的次梯度优化，不分支）：任何回路的长度都不小于它。
+    每次迭代是一次 O(n^2) 的 Prim，超过 deadline 时返回目前最好的下界（仍然是有效的下界，只是更松）。
+
+    参数：
+    - matrix (np.ndarray): 对称的 n×n 距离矩阵。
+    - upper_bound (float, optional): 已知回路的长度，用来确定次梯度步长；默认为最近邻回路的长度。
+    - iterations (int): 最多的次梯度迭代次数。
+    - deadline (float, optional): `time.perf_counter()` 的截止时刻。
+
+    返回：
+    - 下界；边权都是整数时向上取整。
+
+    抛出：
+    - ValueError: 如果矩阵不对称。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    if not np.array_equal(matrix, matrix.T):
+        raise ValueError("The 1-tree bound requires a symmetric distance matrix (undirected graph).")
+    if n <= 3:
+        return held_karp(matrix)[0]
+    cost = matrix.copy()
+    np.fill_diagonal(cost, INF)
+    if upper_bound is None:
+        upper_bound = tour_cost(matrix, nearest_neighbour(matrix) + [0])
+    state = np.zeros((n, n), dtype=np.int8)
+    np.fill_diagonal(state, -1)
+    state[~np.isfinite(cost)] = -1
+    pi = np.zeros(n)
+    alpha, best_bound, stall = 2.0, -INF, 0
+    for _ in range(iterations):
+        tree = _one_tree(cost + pi[:, None] + pi[None, :], state)
+        if tree is None:
+            return INF
+        edges, degree = tree
+        bound = float(cost[edges].sum()) + float(pi @ (degree - 2))
+        if bound > best_bound + 1e-9:
+            best_bound, stall = bound, 0
+        else:
+            stall += 1
+            if stall >= 5:
+                alpha, stall = alpha / 2, 0
+        norm = float(((degree - 2) ** 2).sum())
+        if norm == 0 or best_bound >= upper_bound - 1e-9 or (deadline is not None and perf_counter() > deadline):
+            break
+        pi += alpha * (upper_bound - bound) / norm * (degree - 2)
+    finite = cost[np.isfinite(cost)]
+    if np.all(finite == np.round(finite)):
+        best_bound = float(np.ceil(best_bound - 1e-6))
+    return best_bound
+
+
+def branch_and_bound(matrix, start=0, budget=None, initial_tour=None):
+    """
+    用分支定界精确求解对称 TSP，下界来自经次梯度优化的 Held-Karp 1-树下界。
+
+    对每个分支节点，用顶点惩罚 π 修改边权 c'(i, j) = c(i, j) + π_i + π_j，
+    1-树的权重减去 2Σπ 就是该节点下所有回路长度的下界；按 π_i += t (deg_i - 2) 迭代可以提高下界。
+    每次在一个度数大于 2 的顶点上选一条 1-树边分支（禁止 / 必须包含），深度优先展开节点，
+    以便尽早得到完整回路来收紧上界；下界不小于当前最好回路的节点被剪枝。
+    初始上界来自最近邻构造加 2-opt/Or-opt 迭代局部搜索。节点数或时间用完时返回当前最好的回路，并给出全局下界和最优性间隙。
+
+    参数：
+    - matrix (np.ndarray): 对称的 n×n 距离矩阵。
+    - start (int): 起点编号。
+    - budget (SolveBudget, optional): 时间 / 节点预算，每展开一个分支节点计一次迭代，上界的每次改进都记入轨迹。
+      默认为 10 秒、100000 个节点。
+    - initial_tour (list, optional): 已知的回路，用作初始上界。
+
+    返回：
+    - `(回路长度, 回路顶点编号列表, 证书)`。证书是一个字典，包含 lower_bound（全局下界）、
+      gap（(上界 - 下界) / 上界）、optimal（是否已证明最优）和 nodes（展开的节点数）。
+
+    抛出：
+    - ValueError: 如果矩阵不对称。
+    """
+    if budget is None:
+        budget = SolveBudget(time_limit=10.0, max_iterations=100000)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    if not np.array_equal(matrix, matrix.T):
+        raise ValueError("Branch and bound requires a symmetric distance matrix (undirected graph).")
+    if n <= 3:
+        cost, tour = held_karp(matrix, start)
+        budget.improve(cost)
+        return cost, tour, {"lower_bound": cost, "gap": 0.0, "optimal": True, "nodes": 0}
+
+    cost = matrix.copy()
+    np.fill_diagonal(cost, INF)
+    integral = bool(np.all(cost[np.isfinite(cost)] == np.round(cost[np.isfinite(cost)])))
+    if initial_tour is None:
+        # 用最多 10% 的时间预算做迭代局部搜索，好的初始上界能剪掉大部分分支
+        search = LocalSearch(matrix, candidate_lists(matrix, 10), nearest_neighbour(matrix, start))
+        remaining = budget.deadline - perf_counter()
+        warmup = SolveBudget(time_limit=remaining / 10 if remaining < INF else None, max_iterations=50 * n)
+        iterated_local_search(search, warmup, np.random.default_rng(0))
+        initial_tour = search.closed_tour(start)
+    tour = initial_tour
+    best_cost, best_tour = tour_cost(matrix, tour), list(tour)
+    budget.improve(best_cost)
+
+    def prunable(bound):
+        if integral:
+            bound = np.ceil(bound - 1e-6)
+        return bound >= best_cost - 1e-9
+
+    root_state = np.zeros((n, n), dtype=np.int8)
+    np.fill_diagonal(root_state, -1)
+    root_state[~np.isfinite(cost)] = -1
+    stack = [(-INF, (), np.zeros(n))]
+    while stack:
+        if prunable(stack[-1][0]):
+            stack.pop()
+            continue
+        if not budget.step():
+            break
+        parent_bound, decisions, pi = stack.pop()
+        state = root_state.copy()
+        for i, j, value in decisions:
+            state[i, j] = state[j, i] = value
+        if not _propagate(state):
+            continue
+
+        # 次梯度优化：根节点迭代多次，子节点在父节点 π 的基础上少量迭代
+        iterations = 100 if not decisions else 15
+        alpha, best_bound, best_tree, stall = 2.0, -INF, None, 0
+        pi = pi.copy()
+        for _ in range(iterations):
+            tree = _one_tree(cost + pi[:, None] + pi[None, :], state)
+            if tree is None:
+                break
+            edges, degree = tree
+            # Σ(c_ij + π_i + π_j) - 2Σπ = Σc_ij + Σπ_i (deg_i - 2)
+            length = float(cost[edges].sum())
+            bound = length + float(pi @ (degree - 2))
+            if bound > best_bound + 1e-9:
+                best_bound, best_tree, stall = bound, (edges, degree, pi.copy()), 0
+            else:
+                stall += 1
+                if stall >= 5:
+                    alpha, stall = alpha / 2, 0
+            if (degree == 2).all():
+                if length < best_cost - 1e-9:
+                    best_cost, best_tour = length, _rotate(_tree_tour(edges, n), start)
+                    budget.improve(best_cost)
+                break
+            if prunable(best_bound):
+                break
+            norm = float(((degree - 2) ** 2).sum())
+            pi += alpha * (best_cost - bound) / norm * (degree - 2)
+        if best_tree is None or prunable(best_bound):
+            continue
+        edges, degree, pi = best_tree
+        if (degree == 2).all():
+            continue
+
+        # 在度数最大的顶点上选一条未固定、代价最大的 1-树边分支
+        v = int(np.argmax(degree))
+        branch = max(((i, j) for i, j in zip(*(e.tolist() for e in edges)) if v in (i, j) and state[i, j] == 0),
+                     key=lambda e: cost[e], default=None)
+        if branch is None:
+            continue
+        i, j = branch
+        # 先展开"必须包含"的分支，使深度优先搜索尽快到达完整回路、收紧上界
+        for value in (-1, 1):
+            stack.append((best_bound, decisions + ((i, j, value),), pi))
+
+    if stack:
+        lower_bound = min(best_cost, min(entry[0] for entry in stack))
+    else:
+        lower_bound = best_cost
+    if integral:
+        lower_bound = min(best_cost, float(np.ceil(lower_bound - 1e-6)))
+    gap = (best_cost - lower_bound) / best_cost if best_cost > 0 else 0.0
+    certificate = {"lower_bound": float(lower_bound), "gap": float(gap),
+                   "optimal": gap <= 1e-12, "nodes": budget.iterations}
+    return float(best_cost), best_tour, certificate
@@ -0,0 +1,276 @@
+"""
+边组装交叉（Edge Assembly Crossover，EAX）遗传算法。
+
+EAX（Nagata & Kobayashi）是对称 TSP 上最强的遗传算法之一，它的交叉不按位置拼接，而是按边组装：
+
+1. 把父代 A、B 的回路看成两组边，去掉公共边后，其余的边可以分解成若干个 A 边、B 边交替出现的环（AB 环）；
+2. 选一个 AB 环（"single" 策略），在 A 中删除环上的 A 边、加入环上的 B 边，每个顶点的度数仍然是 2，
+   但结果通常是若干个子回路；
+3. 反复取最小的子回路，在它的一条边和另一个子回路的一条边之间做 2-opt 式的重连（只在候选近邻中找），
+   直到合并成一条回路。
+
+每一代把种群随机排成一圈，每个个体 A 与下一个个体 B 交叉，生成若干个孩子，最好的孩子比 A 短时替换 A。
+初始种群是随机起点的最近邻回路经过 2-opt/Or-opt 局部搜索得到的局部最优。
+一整代都没有个体被替换时认为种群已经收敛，提前结束。只适用于对称矩阵。
+"""
+from time import perf_counter
+
+import numpy as np
+
+from tsp_budget import SolveBudget
+from tsp_construct import nearest_neighbour
+from tsp_local_search import EPS, LocalSearch, candidate_lists, iterated_local_search
+from tsp_profile import count, phase
+
+INF = float('inf')
+
+
+def _adjacency(tour):
+    """回路的邻接表：形状为 (n, 2) 的数组，每行是顶点的前驱和后继。"""
+    tour = np.asarray(tour)
+    adj = np.empty((len(tour), 2), dtype=np.int64)
+    adj[tour, 0] = np.roll(tour, 1)
+    adj[tour, 1] = np.roll(tour, -1)
+    return adj
+
+
+def _tour_order(adj, start=0):
+    """沿邻接表走一圈，得到顶点顺序。"""
+    n = len(adj)
+    order = [start]
+    previous, current = -1, start
+    for _ in range(n - 1):
+        a, b = adj[current]
+        previous, current = current, (b if a == previous else a)
+        order.append(current)
+    return order
+
+
+def ab_cycles(adj_a, adj_b, rng):
+    """
+    把 A、B 两条回路的对称差分解成 AB 环。
+
+    从还有剩余 A 边的顶点出发，交替沿随机的剩余 A 边、B 边行走；
+    回到路径上一个"同奇偶位置"的顶点时，中间的一段就是一个交替的闭环，把它切下来继续走。
+
+    返回：
+    - AB 环的列表，每个环是 `(顶点列表, 第一条边是否为 A 边)`，顶点列表首尾相同。
+    """
+    n = len(adj_a)
+    a_rows, b_rows = adj_a.tolist(), adj_b.tolist()
+    remaining = ([[u for u in a_rows[v] if u not in b_rows[v]] for v in range(n)],
+                 [[u for u in b_rows[v] if u not in a_rows[v]] for v in range(n)])
+    cycles = []
+    starts = [v for v in range(n) if remaining[0][v]]
+    rng.shuffle(starts)
+    for v0 in starts:
+        while remaining[0][v0]:
+            path, seen, side = [v0], {(v0, 0): 0}, 0
+            while True:
+                options = remaining[side][path[-1]]
+                if not options:
+                    break
+                u = options.pop(int(rng.integers(len(options))))
+                remaining[side][u].remove(path[-1])
+                path.append(u)
+                side ^= 1
+                i = len(path) - 1
+                k = seen.get((u, i % 2))
+                if k is None:
+                    seen[(u, i % 2)] = i
+                    continue
+                # path[k..i] 是交替闭环：第 j 条边（从 path[j] 出发）在 j 为偶数时是 A 边
+                cycles.append((path[k:], k % 2 == 0))
+                for j in range(k + 1, i):
+                    del seen[(path[j], j % 2)]
+                del path[k + 1:]
+                if len(path) == 1:
+                    break
+                side = k % 2
+    return cycles
+
+
+class _Child:
+    """在父代 A 的邻接表上应用一个 AB 环，再把子回路合并成一条回路。"""
+
+    def __init__(self, dist, candidates, adj, cost):
+        self.dist = dist
+        self.candidates = candidates
+        self.adj = adj.copy()
+        self.cost = cost
+        self.touched = set()
+
+    def _replace(self, v, old, new):
+        row = self.adj[v]
+        if row[0] == old:
+            row[0] = new
+        else:
+            row[1] = new
+
+    def apply(self, cycle, first_is_a):
+        vertices, dist, adj = cycle, self.dist, self.adj
+        edges = list(zip(vertices, vertices[1:]))
+        a_edges = edges[0::2] if first_is_a else edges[1::2]
+        b_edges = edges[1::2] if first_is_a else edges[0::2]
+        for v, u in a_edges:
+            self._replace(v, u, -1)
+            self._replace(u, v, -1)
+            self.cost -= dist[v][u]
+        for v, u in b_edges:
+            self._replace(v, -1, u)
+            self._replace(u, -1, v)
+            self.cost += dist[v][u]
+        self.touched.update(vertices)
+
+    def _components(self):
+        n = len(self.adj)
+        component = np.full(n, -1, dtype=np.int64)
+        members = []
+        adj = self.adj.tolist()
+        for s in range(n):
+            if component[s] >= 0:
+                continue
+            label, group = len(members), [s]
+            component[s] = label
+            previous, current = -1, s
+            while True:
+                a, b = adj[current]
+                previous, current = current, (b if a == previous else a)
+                if current == s:
+                    break
+                component[current] = label
+                group.append(current)
+            members.append(group)
+        return component, members
+
+    def merge(self, matrix):
+        """把子回路逐个并入其他子回路，返回合并的次数。"""
+        dist, adj = self.dist, self.adj
+        component, members = self._components()
+        merges = 0
+        alive = set(range(len(members)))
+        while len(alive) > 1:
+            label = min(alive, key=lambda c: len(members[c]))
+            group = members[label]
+            best, best_delta = None, INF
+            for u in group:
+                for u2 in adj[u].tolist():
+                    base = -dist[u][u2]
+                    for v in self.candidates[u]:
+                        if component[v] == label:
+                            continue
+                        for v2 in adj[v].tolist():
+                            d1 = base - dist[v][v2] + dist[u][v] + dist[u2][v2]
+                            d2 = base - dist[v][v2] + dist[u][v2] + dist[u2][v]
+                            if d1 < best_delta:
+                                best, best_delta = (u, u2, v, v2, False), d1
+                            if d2 < best_delta:
+                                best, best_delta = (u, u2, v, v2, True), d2
+            if best is None:
+                # 候选近邻全在同一个子回路中：在所有其他子回路的顶点里找离 group 最近的一个
+                outside = np.flatnonzero(component != label)
+                rows = matrix[np.ix_(group, outside)]
+                i, j = np.unravel_index(int(np.argmin(rows)), rows.shape)
+                u, v = group[i], int(outside[j])
+                u2, v2 = int(adj[u][0]), int(adj[v][0])
+                best = (u, u2, v, v2, False)
+                best_delta = -dist[u][u2] - dist[v][v2] + dist[u][v] + dist[u2][v2]
+            u, u2, v, v2, crossed = best
+            if crossed:
+                v, v2 = v2, v
+            # 删除 (u, u2)、(v, v2)，加入 (u, v)、(u2, v2)
+            self._replace(u, u2, v)
+            self._replace(u2, u, v2)
+            self._replace(v, v2, u)
+            self._replace(v2, v, u2)
+            self.cost += best_delta
+            self.touched.update((u, u2, v, v2))
+            target = int(component[v])
+            component[group] = target
+            members[target].extend(group)
+            alive.discard(label)
+            merges += 1
+        return merges
+
+
+def edge_assembly_crossover(matrix, start, budget, rng, population=30, children=10, k=10, lk_depth=5,
+                            seeding=0.3):
+    """
+    EAX 遗传算法（交叉后对孩子做局部修复的"文化基因"变体）。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵。
+    - start (int): 起点编号。
+    - budget (SolveBudget): 时间 / 迭代预算，每次交叉（一对父代）计一次迭代，每次改进都记入轨迹。
+    - rng (np.random.Generator): 随机数生成器。
+    - population (int): 种群大小。
+    - children (int): 每次交叉最多生成的孩子数（每个孩子使用一个不同的 AB 环）。
+    - k (int): 合并子回路和局部搜索使用的候选近邻数。
+    - lk_depth (int): 局部搜索的 Lin-Kernighan 式移动深度，见 `LocalSearch`。
+    - seeding (float): 用来生成初始种群的时间占 time_limit 的比例，平均分给每个个体做迭代局部搜索；
+      不限时时每个个体做 n 次扰动。
+
+    返回：
+    - `(最好回路长度, 以 start 开始并回到 start 的回路, 信息)`，信息包含 population、generations、
+      children（生成的孩子数）、replacements（替换次数）和 converged（种群是否在预算用完之前收敛；
+      收敛后剩余的时间用于从最好的个体继续做迭代局部搜索）。
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    dist = matrix.tolist()
+    candidates = candidate_lists(matrix, k).tolist()
+    info = {"population": 0, "generations": 0, "children": 0, "replacements": 0, "converged": False}
+
+    individuals = []
+    share = None if budget.time_limit is None else budget.time_limit * seeding / population
+    with phase("seeding"):
+        for first in rng.permutation(n)[:population].tolist():
+            if individuals and budget.expired():
+                break
+            search = LocalSearch(dist, candidates, nearest_neighbour(matrix, first), lk_depth)
+            local = SolveBudget(None if share is None else min(share, max(0.0, budget.deadline - perf_counter())),
+                                n if share is None else None)
+            iterated_local_search(search, local, rng)
+            individuals.append([search.cost, _adjacency(search.tour)])
+            budget.improve(search.cost)
+    info["population"] = len(individuals)
+
+    size = len(individuals)
+    with phase("crossover"):
+        while size > 1 and not budget.expired():
+            order = rng.permutation(size)
+            replaced = 0
+            for i in range(size):
+                if not budget.step():
+                    break
+                parent_a, parent_b = individuals[order[i]], individuals[order[(i + 1) % size]]
+                cycles = ab_cycles(parent_a[1], parent_b[1], rng)
+                best = None
+                for c in rng.permutation(len(cycles))[:children].tolist():
+                    child = _Child(dist, candidates, parent_a[1], parent_a[0])
+                    child.apply(*cycles[c])
+                    child.merge(matrix)
+                    # 只从边发生变化的顶点开始做局部搜索，修复合并子回路时留下的长边
+                    search = LocalSearch(dist, candidates, _tour_order(child.adj), lk_depth)
+                    search.optimize(deadline=budget.deadline, active=child.touched)
+                    info["children"] += 1
+                    if best is None or search.cost < best.cost:
+                        best = search
+                if best is not None and best.cost < parent_a[0] - EPS:
+                    parent_a[0], parent_a[1] = best.cost, _adjacency(best.tour)
+                    replaced += 1
+                    budget.improve(best.cost)
+            info["generations"] += 1
+            info["replacements"] += replaced
+            if not replaced:
+                info["converged"] = True
+                break
+
+    cost, adj = min(individuals, key=lambda entry: entry[0])
+    search = LocalSearch(dist, candidates, _tour_order(adj), lk_depth)
+    if info["converged"] and budget.time_limit is not None:
+        with phase("tail"):
+            iterated_local_search(search, budget, rng)
+    count("moves.crossover.evaluated", info["children"])
+    count("moves.crossover.applied", info["replacements"])
+    return float(search.cost), search.closed_tour(start), info
@@ -0,0 +1,487 @@
+"""
+基于候选邻居表的 TSP 局部搜索引擎（2-opt + Or-opt，可选 Or-3opt 与有界深度的 Lin-Kernighan 式移动）。
+
+回路用两个数组表示：`tour[i]` 是第 i 个位置上的顶点，`pos[v]` 是顶点 v 所在的位置。
+每个顶点只在它的 k 个最近邻中寻找改进，配合"不用看"（don't-look）位：
+只有端点发生过变化的顶点才会被重新检查。每个候选移动的增益都是 O(1) 计算的，
+只有被接受的移动才需要翻转一段回路。
+
+引擎只假设距离矩阵是对称的，不要求满足三角不等式。
+
+`lk_depth > 0` 时启用"深"移动：Or-3opt（交换两段相邻路径，不翻转，可以移动任意长的一段）
+和深度至多为 `lk_depth` 的 Lin-Kernighan 式移动（一串 2-opt 翻转，按累计增益决定是否继续），
+它们能跳出 2-opt/Or-opt 的局部最优。迭代局部搜索配合 `kick_double_bridge`
+（局部的 double-bridge 扰动，即交换两段相邻的短路径）使用。
+"""
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+import tsp_profile
+
+INF = float('inf')
+EPS = 1e-9
+# candidate_lists 每次处理的行数
+CANDIDATE_BLOCK = 256
+
+
+def candidate_lists(matrix, k=8):
+    """
+    用 `argpartition` 为每个顶点选出 k 个最近邻，并按距离从小到大排序。
+
+    参数：
+    - matrix (np.ndarray): n×n 距离矩阵。
+    - k (int): 每个顶点的候选邻居数。
+
+    返回：
+    - 形状为 (n, k) 的 int64 数组。
+    """
+    n = len(matrix)
+    k = max(1, min(k, n - 1))
+    result = np.empty((n, k), dtype=np.int64)
+    # 按行分块处理：不复制整个矩阵，每块都留在缓存里，几千个顶点时比整体处理快一倍
+    for first in range(0, n, CANDIDATE_BLOCK):
+        masked = np.array(matrix[first:first + CANDIDATE_BLOCK], dtype=np.float64)
+        rows = np.arange(len(masked))
+        masked[rows, first + rows] = INF
+        nearest = np.argpartition(masked, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(masked, nearest, axis=1), axis=1, kind="stable")
+        result[first:first + CANDIDATE_BLOCK] = np.take_along_axis(nearest, order, axis=1)
+    return result
+
+
+class _MatrixRows(dict):
+    """
+    `rows[a][b]` 形式访问的距离矩阵：第 a 行在第一次用到时才转换成 Python 列表。
+    一次 `matrix.tolist()` 在 5000 个顶点时就要约 0.8 秒，而局部搜索通常只碰到其中一部分行；
+    已转换的行是普通的字典查找，热路径上和列表一样快。
+    """
+
+    def __init__(self, matrix):
+        super().__init__()
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def __missing__(self, a):
+        row = self[a] = self.matrix[a].tolist()
+        return row
+
+
+class LocalSearch:
+    """
+    在一条回路上反复执行改进的 2-opt 和 Or-opt 移动，直到没有改进或时间用完。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵。
+    - candidates (np.ndarray): `candidate_lists` 的结果。
+    - tour (list): 初始回路的顶点编号（不重复起点）。
+    - lk_depth (int): Lin-Kernighan 式移动的最大翻转次数；0 表示只用 2-opt 和 Or-opt。
+
+    属性：
+    - cost (float): 当前回路长度，随移动增量更新。
+    - moves (int): 已应用的移动数。
+    """
+
+    def __init__(self, matrix, candidates, tour, lk_depth=0):
+        self.n = len(tour)
+        self.lk_depth = lk_depth
+        self.dist = _MatrixRows(matrix) if isinstance(matrix, np.ndarray) else matrix
+        self.cand = candidates.tolist() if isinstance(candidates, np.ndarray) else candidates
+        self.tour = list(tour)
+        self.pos = [0] * self.n
+        for i, v in enumerate(self.tour):
+            self.pos[v] = i
+        if isinstance(matrix, np.ndarray):
+            order = np.asarray(self.tour)
+            self.cost = float(matrix[order, np.roll(order, -1)].sum())
+        else:
+            dist = self.dist
+            self.cost = sum(dist[a][b] for a, b in zip(self.tour, self.tour[1:] + self.tour[:1]))
+        self.moves = 0
+        # 只在创建时检查一次是否开启了剖析（见 tsp_profile.py），关闭时移动和翻转没有任何额外开销
+        profiler = tsp_profile.active()
+        if profiler is not None:
+            profiler.instrument_search(self)
+
+    def restore(self, tour, cost):
+        """把当前回路替换为 tour（例如回退到之前保存的最好回路）。"""
+        self.tour = list(tour)
+        pos = self.pos
+        for i, v in enumerate(self.tour):
+            pos[v] = i
+        self.cost = cost
+
+    def closed_tour(self, start):
+        """返回从 start 开始并回到 start 的回路。"""
+        i = self.pos[start]
+        return self.tour[i:] + self.tour[:i] + [start]
+
+    def _succ(self, v):
+        i = self.pos[v] + 1
+        return self.tour[i if i < self.n else 0]
+
+    def _pred(self, v):
+        return self.tour[self.pos[v] - 1]
+
+    def _reverse_exact(self, i, j):
+        """
+        把位置 i 到 j（沿回路正向、含两端）上的顶点顺序翻转。
+
+        `tour` 用切片赋值整段翻转（在 C 里完成），跨过回路末尾的一段拆成 `tour[i:]` 和 `tour[:j+1]` 两片；
+        `pos` 只需按新顺序重写这一段。tour/pos 保持为 Python 列表：改成 NumPy 数组后翻转更快，
+        但移动评估里大量的单元素读取会变慢，整体的迭代局部搜索反而慢一倍。
+        """
+        tour, pos, n = self.tour, self.pos, self.n
+        if i <= j:
+            piece = tour[i:j + 1]
+            piece.reverse()
+            tour[i:j + 1] = piece
+            for k, v in enumerate(piece, i):
+                pos[v] = k
+            return
+        piece = tour[i:] + tour[:j + 1]
+        piece.reverse()
+        tail = n - i
+        tour[i:], tour[:j + 1] = piece[:tail], piece[tail:]
+        for k, v in enumerate(piece, i):
+            pos[v] = k if k < n else k - n
+
+    def _reverse(self, i, j):
+        """
+        2-opt 翻转：翻转位置 i..j 与翻转其余部分得到的是同一条（方向相反的）回路，选较短的一段翻转。
+        """
+        n = self.n
+        if 2 * ((j - i) % n + 1) > n:
+            i, j = (j + 1) % n, (i - 1) % n
+        self._reverse_exact(i, j)
+
+    def _flip(self, t1, t2, t4):
+        """t2 与 t1 相邻：翻转从 t2 出发、沿远离 t1 的方向走到 t4 的一段，即把边 (t1,t2)、(t4,t5) 换成 (t1,t4)、(t2,t5)。"""
+        pos = self.pos
+        if self._succ(t1) == t2:
+            self._reverse(pos[t2], pos[t4])
+        else:
+            self._reverse(pos[t4], pos[t2])
+
+    def _swap_blocks(self, s0, s1, s2):
+        """
+        回路被位置 s0、s1、s2 分成正向相邻的三段 X Y Z，把它变成 X 与 Y 交换后的回路（不翻转任何一段）。
+        交换任意一对相邻的段得到的是同一条回路，这里跳过最长的一段，只移动较短的两段。
+        """
+        n = self.n
+        l0, l1 = (s1 - s0) % n, (s2 - s1) % n
+        l2 = n - l0 - l1
+        if l0 >= l1 and l0 >= l2:
+            start, la, lb = s1, l1, l2
+        elif l1 >= l2:
+            start, la, lb = s2, l2, l0
+        else:
+            start, la, lb = s0, l0, l1
+        # [A][B] -> 整体翻转 [B'][A'] -> 各自翻转回来 [B][A]
+        self._reverse_exact(start, (start + la + lb - 1) % n)
+        self._reverse_exact(start, (start + lb - 1) % n)
+        self._reverse_exact((start + lb) % n, (start + la + lb - 1) % n)
+
+    def _try_two_opt(self, a):
+        """尝试以顶点 a 为端点的 2-opt 移动，成功时返回端点发生变化的顶点。"""
+        tour, pos, dist, n = self.tour, self.pos, self.dist, self.n
+        row = dist[a]
+        i = pos[a]
+        for forward in (True, False):
+            b = tour[i + 1 if i + 1 < n else 0] if forward else tour[i - 1]
+            dab = row[b]
+            for c in self.cand[a]:
+                g1 = dab - row[c]
+                if g1 <= EPS:
+                    break
+                j = pos[c]
+                d = tour[j + 1 if j + 1 < n else 0] if forward else tour[j - 1]
+                if c == b or d == a:
+                    continue
+                gain = g1 + dist[c][d] - dist[b][d]
+                if gain > EPS:
+                    # 正向：a b ... c d -> a c ... b d；反向：d c ... b a -> d b ... c a
+                    if forward:
+                        self._reverse(pos[b], j)
+                    else:
+                        self._reverse(pos[c], pos[b])
+                    self.cost -= gain
+                    self.moves += 1
+                    return (a, b, c, d)
+        return None
+
+    def _try_or_opt(self, a):
+        """尝试把包含顶点 a 的 1~3 个顶点的一段移到别处（可翻转），成功时返回端点发生变化的顶点。"""
+        tour, pos, dist, n = self.tour, self.pos, self.dist, self.n
+        for length in (1, 2, 3):
+            if n < length + 3:
+                break
+            for anchored_first in ((True,) if length == 1 else (True, False)):
+                if anchored_first:
+                    i1 = pos[a]
+                    i2 = (i1 + length - 1) % n
+                else:
+                    i2 = pos[a]
+                    i1 = (i2 - length + 1) % n
+                s1, s2 = tour[i1], tour[i2]
+                p, nx = tour[i1 - 1], tour[(i2 + 1) % n]
+                g1 = dist[p][s1] + dist[s2][nx] - dist[p][nx]
+                if g1 <= EPS:
+                    continue
+                for s, other in ((s1, s2), (s2, s1)):
+                    row = dist[s]
+                    for c in self.cand[s]:
+                        dsc = row[c]
+                        if dsc >= g1:
+                            break
+                        j = pos[c]
+                        if (j - i1) % n < length:
+                            continue
+                        for e in (tour[j + 1 if j + 1 < n else 0], tour[j - 1]):
+                            if (pos[e] - i1) % n < length:
+                                continue
+                            gain = g1 - dsc - dist[other][e] + dist[c][e]
+                            if gain > EPS:
+                                self._move_segment(i1, length, s1, s, c, e)
+                                self.cost -= gain
+                                self.moves += 1
+                                return (p, nx, s1, s2, c, e)
+        return None
+
+    def _move_segment(self, i1, length, s1, s, c, e):
+        """
+        把从位置 i1 开始、长度为 length 的一段移到相邻顶点 c、e 之间，并让顶点 s 与 c 相邻。
+        通过两到三次翻转实现，被翻转的中间部分取两侧中较短的一侧。
+        """
+        tour, pos, n = self.tour, self.pos, self.n
+        i2 = (i1 + length - 1) % n
+        # 按回路正向排列插入位置的两个端点：x 在前，y 在后
+        x, y = (c, e) if tour[(pos[c] + 1) % n] == e else (e, c)
+        first = s if x == c else (s1 if s != s1 else tour[i2])
+        nx_pos = (i2 + 1) % n
+        between = (pos[x] - nx_pos) % n + 1  # 段之后到 x 的顶点数
+        if 2 * between <= n - length:
+            # p S [nx..x] y -> p [nx..x] S' y
+            self._reverse_exact(i1, pos[x])
+            self._reverse_exact(i1, (i1 + between - 1) % n)
+            seg_start = (i1 + between) % n
+        else:
+            # x [y..p] S nx -> x S' [y..p] nx
+            y_pos = pos[y]
+            self._reverse_exact(y_pos, i2)
+            self._reverse_exact((y_pos + length) % n, i2)
+            seg_start = y_pos
+        # 此时该段是翻转过的（首个顶点是原来的段尾）
+        if tour[seg_start] != first:
+            self._reverse_exact(seg_start, (seg_start + length - 1) % n)
+
+    def _try_or3opt(self, a):
+        """
+        Or-3opt：断开 (t1,t2)、(t3,t4)、(t5,t6)，把 t1 [t2..t5] [t6..t3] t4 重连为 t1 [t6..t3] [t2..t5] t4，
+        即交换两段相邻路径而不翻转。t3 取自 t2 的候选邻居，t5 取自 t4 的候选邻居，每一步的部分增益都必须为正。
+        成功时返回端点发生变化的顶点。
+        """
+        tour, pos, dist, cand, n = self.tour, self.pos, self.dist, self.cand, self.n
+        if n < 6:
+            return None
+        t1 = a
+        i1 = pos[t1]
+        for forward in (True, False):
+            t2 = self._succ(t1) if forward else self._pred(t1)
+            i2 = pos[t2]
+            g0 = dist[t1][t2]
+            for t3 in cand[t2]:
+                g1 = g0 - dist[t2][t3]
+                if g1 <= EPS:
+                    break
+                i3 = pos[t3]
+                t4 = self._succ(t3) if forward else self._pred(t3)
+                if t3 == t1 or t4 == t1:
+                    continue
+                span = (i3 - i2) % n if forward else (i2 - i3) % n
+                g2 = g1 + dist[t3][t4]
+                row = dist[t4]
+                for t5 in cand[t4]:
+                    g3 = g2 - row[t5]
+                    if g3 <= EPS:
+                        break
+                    i5 = pos[t5]
+                    # t5 必须落在 t2..t3 之间（不含 t3）
+                    if ((i5 - i2) % n if forward else (i2 - i5) % n) >= span:
+                        continue
+                    t6 = self._succ(t5) if forward else self._pred(t5)
+                    gain = g3 + dist[t5][t6] - dist[t6][t1]
+                    if gain > EPS:
+                        if forward:
+                            self._swap_blocks(i2, pos[t6], pos[t4])
+                        else:
+                            self._swap_blocks(i3, i5, i1)
+                        self.cost -= gain
+                        self.moves += 1
+                        return (t1, t2, t3, t4, t5, t6)
+        return None
+
+    def _try_lk(self, a):
+        """
+        以 a 为 t1 的有界深度 Lin-Kernighan 式移动。断开 (t1,t2) 后，每一步从 t2 的候选邻居中选 t3
+        （要求累计增益 G - d(t2,t3) > 0，并在其中选 G - d(t2,t3) + d(t3,t4) 最大者），
+        用一次翻转断开 (t3,t4)、接上 (t2,t3)，再把 t4 当作新的 t2 继续，最多 `lk_depth` 步。
+        每步都记下"此刻用 (t4,t1) 闭合"的增益，最后只保留到增益最大的那一步，其余翻转撤销。
+        已经加入或断开过的边的端点不会再被选为 t3，避免来回打转。成功时返回端点发生变化的顶点。
+        """
+        dist, cand = self.dist, self.cand
+        t1 = a
+        for t2 in (self._succ(t1), self._pred(t1)):
+            g = dist[t1][t2]
+            used = {t1, t2}
+            flips = []
+            best_gain, best_len = EPS, 0
+            for _ in range(self.lk_depth):
+                forward = self._succ(t1) == t2
+                row = dist[t2]
+                best = None
+                best_score = -INF
+                for t3 in cand[t2]:
+                    g1 = g - row[t3]
+                    if g1 <= EPS:
+                        break
+                    if t3 in used:
+                        continue
+                    t4 = self._pred(t3) if forward else self._succ(t3)
+                    if t4 == t2:
+                        continue
+                    score = g1 + dist[t3][t4]
+                    if score > best_score:
+                        best, best_score = (t3, t4), score
+                if best is None:
+                    break
+                t3, t4 = best
+                self._flip(t1, t2, t4)
+                flips.append((t2, t3, t4))
+                used.add(t3)
+                used.add(t4)
+                g = best_score
+                gain = g - dist[t4][t1]
+                if gain > best_gain:
+                    best_gain, best_len = gain, len(flips)
+                t2 = t4
+            while len(flips) > best_len:
+                t2, _, t4 = flips.pop()
+                self._flip(t1, t4, t2)
+            if best_len:
+                self.cost -= best_gain
+                self.moves += 1
+                return (t1,) + tuple(v for flip in flips for v in flip)
+        return None
+
+    def kick_segment_reversal(self, rng):
+        """
+        扰动：随机翻转一段回路（一次随机的 2-opt 移动），回路会变差，之后由局部搜索修复。
+
+        返回：
+        - 端点发生变化的顶点，作为下一轮局部搜索的起点。
+        """
+        tour, dist, n = self.tour, self.dist, self.n
+        i = int(rng.integers(n))
+        j = (i + 2 + int(rng.integers(n - 3))) % n
+        a, b = tour[i], tour[(i + 1) % n]
+        c, d = tour[j], tour[(j + 1) % n]
+        self.cost += dist[a][c] + dist[b][d] - dist[a][b] - dist[c][d]
+        self._reverse((i + 1) % n, j)
+        return (a, b, c, d)
+
+    def kick_double_bridge(self, rng, max_segment=50):
+        """
+        扰动：局部的 double-bridge（Or-opt 式）移动。在随机位置取两段相邻的短路径
+        （每段 1~max_segment 个顶点）并交换它们：a [b1..b2] [c1..c2] d -> a [c1..c2] [b1..b2] d。
+        2-opt 和 Or-opt 都很难一步撤销这种移动，而且只影响回路的一小块，局部修复的代价很低。
+
+        返回：
+        - 端点发生变化的顶点，作为下一轮局部搜索的起点。
+        """
+        tour, dist, n = self.tour, self.dist, self.n
+        limit = max(1, min(max_segment, (n - 2) // 2))
+        l1 = 1 + int(rng.integers(limit))
+        l2 = 1 + int(rng.integers(limit))
+        i = int(rng.integers(n))
+        s1, s2, s3 = (i + 1) % n, (i + 1 + l1) % n, (i + 1 + l1 + l2) % n
+        a, b1, b2 = tour[i], tour[s1], tour[s2 - 1]
+        c1, c2, d = tour[s2], tour[s3 - 1], tour[s3]
+        self.cost += (dist[a][c1] + dist[c2][b1] + dist[b2][d]
+                      - dist[a][b1] - dist[b2][c1] - dist[c2][d])
+        self._swap_blocks(s1, s2, s3)
+        return (a, b1, b2, c1, c2, d)
+
+    def optimize(self, deadline=None, active=None):
+        """
+        执行局部搜索直到达到局部最优或超过截止时间。
+
+        参数：
+        - deadline (float, optional): `time.perf_counter()` 的截止时刻。
+        - active (iterable, optional): 需要检查的顶点；默认为全部顶点。
+
+        返回：
+        - 是否达到了局部最优（False 表示因为时间用完而中止）。
+        """
+        queue = deque(self.tour if active is None else active)
+        queued = [False] * self.n
+        for v in queue:
+            queued[v] = True
+        steps = 0
+        while queue:
+            steps += 1
+            if deadline is not None and not steps & 63 and perf_counter() > deadline:
+                return False
+            a = queue.popleft()
+            queued[a] = False
+            touched = self._try_two_opt(a) or self._try_or_opt(a)
+            if not touched and self.lk_depth:
+                touched = self._try_or3opt(a) or self._try_lk(a)
+            if touched:
+                for v in touched:
+                    if not queued[v]:
+                        queued[v] = True
+                        queue.append(v)
+        return True
+
+
+def iterated_local_search(search, budget, rng, kick=None, exchange=None):
+    """
+    随时可停的迭代局部搜索：先把当前回路优化到局部最优，然后反复"扰动 + 局部修复"，
+    只保留更好的（或一样好的）结果，更差时回退到目前最好的回路。
+
+    参数：
+    - search (LocalSearch): 已装入初始回路的局部搜索引擎，结束时其中是最好的回路。
+    - budget (SolveBudget): 时间 / 迭代预算，每次扰动计一次迭代，每次改进都记入轨迹。
+    - rng (np.random.Generator): 扰动使用的随机数生成器。
+    - kick (callable, optional): `kick(search, rng)` 扰动函数，返回需要重新检查的顶点；
+      默认为 `LocalSearch.kick_double_bridge`。
+    - exchange (callable, optional): 每次迭代调用的 `exchange(best_tour, best_cost)`，
+      返回 `(tour, cost)` 时改为从这条更好的回路继续搜索（用于并行求解时交换最好回路）。
+
+    返回：
+    - 最好回路的长度。
+    """
+    if kick is None:
+        kick = LocalSearch.kick_double_bridge
+    search.optimize(deadline=budget.deadline)
+    best_tour, best_cost = list(search.tour), search.cost
+    budget.improve(best_cost)
+    while search.n >= 8 and budget.step():
+        touched = kick(search, rng)
+        search.optimize(deadline=budget.deadline, active=touched)
+        if search.cost < best_cost - EPS:
+            best_tour, best_cost = list(search.tour), search.cost
+            budget.improve(best_cost)
+        elif search.cost > best_cost + EPS:
+            search.restore(best_tour, best_cost)
+        if exchange is not None:
+            shared = exchange(best_tour, best_cost)
+            if shared is not None:
+                best_tour, best_cost = shared
+                search.restore(best_tour, best_cost)
+                budget.improve(best_cost)
+    return best_cost
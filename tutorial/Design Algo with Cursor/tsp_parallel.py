@@ -0,0 +1,139 @@
+"""
+多进程并行的多起点 TSP 求解。
+
+每个工作进程从不同的随机构造出发，独立运行候选表上的迭代局部搜索（见 tsp_local_search.py）。
+距离矩阵只在主进程中写入一次 `multiprocessing.shared_memory`，工作进程按名字映射同一块内存，
+不需要为每个进程序列化整张图。
+
+可选地，工作进程每隔 `exchange_interval` 秒通过共享内存中的"最好回路"槽交换结果：
+自己的回路更好时写入槽中，槽中的回路更好时换成它继续搜索。
+所有工作进程在全局截止时刻之前返回，主进程取其中最好的一条。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Lock, shared_memory
+from time import perf_counter
+
+import numpy as np
+
+from tsp_budget import SolveBudget
+from tsp_construct import CONSTRUCTIONS, construct_tour
+from tsp_local_search import EPS, LocalSearch, iterated_local_search
+
+INF = float('inf')
+# 为工作进程返回结果、主进程汇总预留的时间（秒）
+RESULT_MARGIN = 0.02
+
+# 每个工作进程持有的共享内存映射，由 _init_worker 设置
+_worker_state = None
+
+
+def _init_worker(matrix_name, shape, best_name, candidates, lock):
+    global _worker_state
+    matrix_shm = shared_memory.SharedMemory(name=matrix_name)
+    best_shm = shared_memory.SharedMemory(name=best_name) if best_name else None
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=matrix_shm.buf)
+    _worker_state = (matrix_shm, best_shm, matrix, candidates, lock)
+
+
+class _TourExchange:
+    """
+    工作进程一侧的最好回路交换，作为 `iterated_local_search` 的 exchange 回调。
+    共享槽的布局是一个 float64 长度，后面跟 n 个 int64 顶点编号。
+    """
+
+    def __init__(self, shm, n, lock, interval):
+        self.cost = np.ndarray((1,), dtype=np.float64, buffer=shm.buf)
+        self.tour = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=8)
+        self.lock = lock
+        self.interval = interval
+        self.next_sync = perf_counter() + interval
+        self.published = 0
+        self.adopted = 0
+
+    def __call__(self, best_tour, best_cost):
+        now = perf_counter()
+        if now < self.next_sync:
+            return None
+        self.next_sync = now + self.interval
+        with self.lock:
+            shared = float(self.cost[0])
+            if best_cost < shared - EPS:
+                self.cost[0] = best_cost
+                self.tour[:] = best_tour
+                self.published += 1
+            elif shared < best_cost - EPS:
+                self.adopted += 1
+                return self.tour.tolist(), shared
+        return None
+
+
+def _multistart_worker(start, first, seed, deadline, max_iterations, construction, lk_depth, exchange_interval):
+    _, best_shm, matrix, candidates, lock = _worker_state
+    n = len(matrix)
+    budget = SolveBudget(None if deadline is None else max(0.0, deadline - perf_counter()), max_iterations)
+    search = LocalSearch(matrix, candidates, construct_tour(matrix, first, construction), lk_depth)
+    budget.improve(search.cost)
+    exchange = _TourExchange(best_shm, n, lock, exchange_interval) if best_shm is not None else None
+    iterated_local_search(search, budget, np.random.default_rng(seed), exchange=exchange)
+    return (search.cost, search.closed_tour(start), budget.start, budget.iterations, budget.trace,
+            exchange.published if exchange else 0, exchange.adopted if exchange else 0)
+
+
+def parallel_multistart(matrix, candidates, start, budget, workers, construction="nearest_neighbour", lk_depth=5,
+                        seed=0, exchange_interval=0.05):
+    """
+    在进程池中并行运行 workers 个多起点迭代局部搜索，返回最好的回路。
+
+    第 0 个工作进程从 start 出发构造初始回路（与串行求解相同），其余进程从随机顶点出发构造，
+    并使用由 seed 派生的不同随机数种子。每个进程的扰动次数上限都是 `budget.max_iterations`。
+
+    参数：
+    - matrix (np.ndarray): n×n 对称距离矩阵，会被复制到共享内存中。
+    - candidates (np.ndarray): `candidate_lists` 的结果，每个工作进程只接收一次。
+    - start (int): 起点编号。
+    - budget (SolveBudget): 全局预算；所有工作进程在它的截止时刻前结束，它们的轨迹和迭代次数会并入其中。
+    - workers (int): 工作进程数。
+    - construction (str): 初始回路的构造方法，见 `tsp_construct.CONSTRUCTIONS`。
+    - lk_depth (int): 传给 `LocalSearch` 的 Lin-Kernighan 式移动深度。
+    - seed (int): 随机数种子。
+    - exchange_interval (float, optional): 交换最好回路的间隔（秒）；None 表示各进程完全独立。
+
+    返回：
+    - `(cost, tour, info)`：回路长度、从 start 出发并回到 start 的顶点编号列表，
+      以及包含 workers、published、adopted（写入 / 采用共享回路的次数）的字典。
+    """
+    if construction not in CONSTRUCTIONS:
+        raise ValueError(f"Unknown construction {construction!r}; expected one of {sorted(CONSTRUCTIONS)}.")
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    n = len(matrix)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(workers)]
+    rng = np.random.default_rng(seed)
+    firsts = [start] + [int(v) for v in rng.integers(n, size=workers - 1)]
+    deadline = budget.deadline - RESULT_MARGIN if budget.deadline < INF else None
+
+    matrix_shm = shared_memory.SharedMemory(create=True, size=max(1, matrix.nbytes))
+    best_shm = None
+    try:
+        np.ndarray(matrix.shape, dtype=np.float64, buffer=matrix_shm.buf)[:] = matrix
+        if exchange_interval is not None:
+            best_shm = shared_memory.SharedMemory(create=True, size=8 * (n + 1))
+            np.ndarray((1,), dtype=np.float64, buffer=best_shm.buf)[0] = INF
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(matrix_shm.name, matrix.shape, best_shm.name if best_shm else None,
+                                           candidates, Lock())) as pool:
+            futures = [pool.submit(_multistart_worker, start, first, worker_seed, deadline,
+                                   budget.max_iterations, construction, lk_depth, exchange_interval or 0.0)
+                       for first, worker_seed in zip(firsts, seeds)]
+            results = [future.result() for future in futures]
+    finally:
+        for shm in (matrix_shm, best_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    # perf_counter 是系统范围的单调时钟，工作进程记录的开始时刻可以直接与主进程比较
+    for _, _, worker_start, iterations, trace, _, _ in results:
+        budget.merge([(worker_start - budget.start + elapsed, cost) for elapsed, cost in trace], iterations)
+    cost, tour = min(((r[0], r[1]) for r in results), key=lambda r: r[0])
+    info = {"workers": workers, "published": sum(r[5] for r in results), "adopted": sum(r[6] for r in results)}
+    return float(cost), tour, info
@@ -0,0 +1,212 @@
+"""
+TSP 求解器的可选性能剖析。
+
+`Graph_Advanced.enable_profiling()` 之后，每次求解都会记录：
+
+- 各阶段的耗时（输入准备、候选表、构造、局部搜索、回路翻转……），阶段可以嵌套，按调用栈累计；
+- 计数器：每种移动的评估次数（evaluated，对一个顶点检查一次这种移动的全部候选）和应用次数（applied），
+  翻转的次数和移动的顶点数，候选图上按需计算的距离次数等；
+- 缓存命中率：名为 "<缓存>.hits" / "<缓存>.misses" 的计数器（例如度量闭包 all_pairs）。
+
+`Profiler.export_folded` 把阶段写成 flamegraph.pl / speedscope 使用的折叠栈格式
+（每行 `阶段;子阶段 自身耗时微秒`）。
+
+关闭时的开销几乎为零：热循环中没有任何检查。剖析器通过模块级的"当前剖析器"生效，
+`LocalSearch` 只在创建时检查一次，开启时才在这个实例上换上计时 / 计数的方法；
+求解流程中的 `phase`、`count` 在关闭时只是一次全局变量判断，每次求解只调用几次。
+"""
+import copy
+import functools
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+# 当前生效的剖析器，见 profiling
+_active = None
+_NULL_PHASE = nullcontext()
+
+# LocalSearch 中按"评估 / 应用"计数的移动
+MOVES = {"_try_two_opt": "two_opt", "_try_or_opt": "or_opt", "_try_or3opt": "or3opt", "_try_lk": "lk"}
+
+
+class Profiler:
+    """
+    累计阶段耗时和计数器。
+
+    属性：
+    - phases (dict): `{调用栈元组: [总耗时秒数, 调用次数]}`。
+    - counters (collections.Counter): 计数器。
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = Counter()
+        self._stack = []
+
+    def _enter(self, name):
+        self._stack.append(name)
+        return tuple(self._stack), perf_counter()
+
+    def _leave(self, key, began):
+        entry = self.phases.get(key)
+        if entry is None:
+            entry = self.phases[key] = [0.0, 0]
+        entry[0] += perf_counter() - began
+        entry[1] += 1
+        self._stack.pop()
+
+    @contextmanager
+    def phase(self, name):
+        """计时一个阶段，嵌套在当前阶段之下。"""
+        key, began = self._enter(name)
+        try:
+            yield
+        finally:
+            self._leave(key, began)
+
+    def timed(self, name, func):
+        """返回计时版本的 func，每次调用都是一个名为 name 的阶段（比 `phase` 的生成器开销小）。"""
+        def wrapper(*args, **kwargs):
+            key, began = self._enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._leave(key, began)
+        return wrapper
+
+    def counted(self, name, func):
+        """返回计数版本的 func：每次调用计入 "<name>.evaluated"，返回真值时计入 "<name>.applied"。"""
+        counters = self.counters
+        evaluated, applied = name + ".evaluated", name + ".applied"
+
+        def wrapper(*args):
+            counters[evaluated] += 1
+            result = func(*args)
+            if result:
+                counters[applied] += 1
+            return result
+        return wrapper
+
+    def instrument_search(self, search):
+        """在一个 `LocalSearch` 实例上换上计时、计数的方法（只影响这个实例）。"""
+        search.optimize = self.timed("optimize", search.optimize)
+        reverse_exact = search._reverse_exact
+        counters, n = self.counters, search.n
+
+        def reverse(i, j):
+            counters["reverse.calls"] += 1
+            counters["reverse.elements"] += (j - i) % n + 1
+            reverse_exact(i, j)
+        search._reverse_exact = self.timed("reverse", reverse)
+        for method, name in MOVES.items():
+            setattr(search, method, self.counted("moves." + name, getattr(search, method)))
+
+    def instrument_weights(self, weights):
+        """
+        返回隐式权重（见 tsp_candidates.py）的一个浅拷贝，它的单个距离和成批距离的计算次数
+        计入 "weights.scalar" 和 "weights.vector"。原对象不受影响。
+        """
+        weights = copy.copy(weights)
+        weight, pairs, counters = weights.weight, weights.pairs, self.counters
+
+        def counted_weight(a, b):
+            counters["weights.scalar"] += 1
+            return weight(a, b)
+
+        def counted_pairs(a, b):
+            result = pairs(a, b)
+            counters["weights.vector"] += result.size
+            return result
+        weights.weight, weights.pairs = counted_weight, counted_pairs
+        return weights
+
+    def _self_times(self):
+        self_times = {key: total for key, (total, _) in self.phases.items()}
+        for key, (total, _) in self.phases.items():
+            if len(key) > 1 and key[:-1] in self_times:
+                self_times[key[:-1]] -= total
+        return self_times
+
+    def report(self):
+        """
+        返回剖析结果。
+
+        返回：
+        - 字典：phases（按调用栈排序的列表，每项有 path、calls、total、self 秒数）、counters、
+          moves（每种移动的 evaluated、applied 和 rate = applied / evaluated）和
+          caches（每个缓存的 hits、misses 和 hit_rate）。
+        """
+        self_times = self._self_times()
+        phases = [{"path": ";".join(key), "calls": calls, "total": total, "self": max(0.0, self_times[key])}
+                  for key, (total, calls) in sorted(self.phases.items())]
+        counters = dict(self.counters)
+        moves = {}
+        for key, evaluated in counters.items():
+            if key.startswith("moves.") and key.endswith(".evaluated") and evaluated:
+                name = key[len("moves."):-len(".evaluated")]
+                applied = counters.get(f"moves.{name}.applied", 0)
+                moves[name] = {"evaluated": evaluated, "applied": applied, "rate": applied / evaluated}
+        caches = {}
+        for key in counters:
+            if key.endswith((".hits", ".misses")):
+                cache = key.rsplit(".", 1)[0]
+                hits, misses = counters.get(cache + ".hits", 0), counters.get(cache + ".misses", 0)
+                caches[cache] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+        return {"phases": phases, "counters": counters, "moves": moves, "caches": caches}
+
+    def folded(self):
+        """折叠栈格式的文本：每个调用栈一行，值为自身耗时（微秒，取整）。"""
+        self_times = self._self_times()
+        return "".join(f"{';'.join(key)} {max(0, round(self_times[key] * 1e6))}\n" for key in sorted(self.phases))
+
+    def export_folded(self, path):
+        """
+        把阶段写成折叠栈文件，可以用 `flamegraph.pl profile.folded > profile.svg` 画火焰图，
+        或直接拖进 speedscope。
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.folded())
+
+
+def active():
+    """当前生效的剖析器；没有开启剖析时为 None。"""
+    return _active
+
+
+@contextmanager
+def profiling(profiler, name):
+    """让 profiler 在这段代码中生效，并把整段代码计为一个名为 name 的阶段。profiler 为 None 时什么也不做。"""
+    global _active
+    if profiler is None:
+        yield
+        return
+    previous, _active = _active, profiler
+    try:
+        with profiler.phase(name):
+            yield
+    finally:
+        _active = previous
+
+
+def profiled(method):
+    """
+    方法装饰器：对象的 profiler 属性不为 None 时，让它在方法调用期间生效，并把调用计为一个以方法名命名的阶段。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        with profiling(self.profiler, method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def phase(name):
+    """当前剖析器上的一个阶段；没有开启剖析时返回一个空的上下文管理器。"""
+    return _NULL_PHASE if _active is None else _active.phase(name)
+
+
+def count(name, k=1):
+    """给当前剖析器的计数器加 k；没有开启剖析时什么也不做。"""
+    if _active is not None:
+        _active.counters[name] += k
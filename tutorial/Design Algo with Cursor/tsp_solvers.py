@@ -0,0 +1,160 @@
+"""
+TSP 求解引擎的注册表和自动选择。
+
+`Graph_Advanced.tsp_small_graph` / `tsp_medium_graph` / `tsp_large_graph` 按方法名固定了算法；
+`Graph_Advanced.solve_tsp` 改为按实例规模和时间预算从这里的引擎中选择：
+
+- "exact"：Held-Karp 动态规划（预计能在一半预算内算完时），或对称矩阵上的分支定界（见 tsp_exact.py）；
+- "local_search"：候选表上的迭代局部搜索（见 tsp_local_search.py）；
+- "annealing"：批量评估移动的模拟退火（见 tsp_annealing.py），也适用于非对称矩阵；
+- "genetic"：边组装交叉遗传算法（见 tsp_genetic.py）。
+
+每个引擎的签名都是 `engine(matrix, start, budget, rng, **options)`，返回 `(回路长度, 闭合回路, 信息)`，
+信息中的 optimal、lower_bound 是可选的，其余各项是引擎自己的细节。`tsp_stats` 把它们整理成统一的统计结构。
+新的引擎只需加入 `TSP_SOLVERS`。
+"""
+import numpy as np
+
+from tsp_annealing import simulated_annealing
+from tsp_construct import construct_tour
+from tsp_exact import (HELD_KARP_MEMORY_LIMIT, branch_and_bound, held_karp, held_karp_memory, held_karp_seconds,
+                       tour_cost)
+from tsp_genetic import edge_assembly_crossover
+from tsp_local_search import LocalSearch, candidate_lists, iterated_local_search
+from tsp_profile import count, phase
+
+# 对称实例不超过这么多个顶点、预算至少 BRANCH_AND_BOUND_TIME 秒时尝试分支定界
+BRANCH_AND_BOUND_SIZE = 40
+BRANCH_AND_BOUND_TIME = 1.0
+# 预算至少 GENETIC_SECONDS · n^2 秒时遗传算法（生成初始种群、交叉若干代）才能胜过迭代局部搜索：
+# 在 1..100 随机边权的完全图上，n = 100 时约 1 秒，n = 300 时约 15 秒
+GENETIC_SECONDS = 1.5e-4
+GENETIC_SIZE = 1000
+
+
+def _rotate(tour, start):
+    """把不闭合的回路旋转为从 start 开始，并回到 start。"""
+    i = tour.index(start)
+    return tour[i:] + tour[:i] + [start]
+
+
+def _require_symmetric(matrix, engine):
+    if not np.array_equal(matrix, matrix.T):
+        raise ValueError(f"The {engine} engine requires a symmetric distance matrix; use 'annealing' or 'exact'.")
+
+
+def _exact(matrix, start, budget, rng, memory_limit=HELD_KARP_MEMORY_LIMIT):
+    n = len(matrix)
+    symmetric = np.array_equal(matrix, matrix.T)
+    if held_karp_memory(n) > memory_limit:
+        if not symmetric:
+            raise ValueError("Too many vertices for Held-Karp, and branch and bound needs a symmetric matrix.")
+        cost, tour, certificate = branch_and_bound(matrix, start, budget=budget)
+        return cost, tour, {"method": "branch_and_bound", **certificate}
+    # 先得到一条启发式回路，超时时返回它
+    with phase("heuristic"):
+        tour = construct_tour(matrix, start)
+        if n >= 5 and symmetric:
+            search = LocalSearch(matrix, candidate_lists(matrix, 10), tour)
+            search.optimize(deadline=budget.deadline)
+            tour = search.tour
+    tour = _rotate(list(tour), start)
+    cost = tour_cost(matrix, tour)
+    budget.improve(cost)
+    optimal = False
+    try:
+        with phase("held_karp"):
+            cost, tour = held_karp(matrix, start, memory_limit=memory_limit, budget=budget)
+        budget.improve(cost)
+        optimal = True
+    except TimeoutError:
+        pass
+    return cost, tour, {"method": "held_karp", "optimal": optimal, "lower_bound": cost if optimal else None}
+
+
+def _local_search(matrix, start, budget, rng, construction="nearest_neighbour", k=10, lk_depth=5):
+    _require_symmetric(matrix, "local_search")
+    with phase("candidates"):
+        candidates = candidate_lists(matrix, k)
+    with phase("construction"):
+        tour = construct_tour(matrix, start, construction)
+    search = LocalSearch(matrix, candidates, tour, lk_depth)
+    budget.improve(search.cost)
+    with phase("local_search"):
+        iterated_local_search(search, budget, rng)
+    return float(search.cost), search.closed_tour(start), {"construction": construction, "lk_depth": lk_depth,
+                                                             "moves": search.moves}
+
+
+def _annealing(matrix, start, budget, rng, construction="nearest_neighbour", batch=256, initial_acceptance=0.1,
+               final_ratio=1e-3):
+    with phase("construction"):
+        tour = construct_tour(matrix, start, construction)
+    cost, tour, info = simulated_annealing(matrix, tour, budget, rng, batch=batch,
+                                           initial_acceptance=initial_acceptance, final_ratio=final_ratio)
+    count("moves.annealing.evaluated", info["evaluated"])
+    count("moves.annealing.applied", info["accepted"])
+    return cost, _rotate(tour, start), {"construction": construction, "batch": batch, **info}
+
+
+def _genetic(matrix, start, budget, rng, population=30, children=10, lk_depth=5):
+    _require_symmetric(matrix, "genetic")
+    return edge_assembly_crossover(matrix, start, budget, rng, population=population, children=children,
+                                   lk_depth=lk_depth)
+
+
+TSP_SOLVERS = {
+    "exact": _exact,
+    "local_search": _local_search,
+    "annealing": _annealing,
+    "genetic": _genetic,
+}
+
+
+def choose_strategy(n, time_limit, symmetric=True, max_iterations=None, memory_limit=HELD_KARP_MEMORY_LIMIT):
+    """
+    按规模和预算选择引擎：
+
+    - Held-Karp 的内存够用、预计耗时不超过一半预算时用 "exact"；对称实例不超过 BRANCH_AND_BOUND_SIZE 个顶点、
+      预算至少 BRANCH_AND_BOUND_TIME 秒时也用 "exact"（分支定界，预算内没有证明最优时返回最好的回路）；
+    - 非对称实例用 "annealing"（局部搜索和遗传算法都假设矩阵对称）；
+    - 既不限时也不限迭代次数时用 "genetic"：种群收敛后自然结束，而迭代局部搜索会一直运行；
+    - 预算至少 GENETIC_SECONDS · n^2 秒、且不超过 GENETIC_SIZE 个顶点时用 "genetic"；
+    - 其他情况用 "local_search"。
+
+    返回：
+    - `TSP_SOLVERS` 中的引擎名。
+    """
+    unlimited = time_limit is None and max_iterations is None
+    if n <= 3:
+        return "exact"
+    if held_karp_memory(n) <= memory_limit and (time_limit is None or held_karp_seconds(n) <= time_limit / 2):
+        return "exact"
+    if symmetric and n <= BRANCH_AND_BOUND_SIZE and (time_limit is None or time_limit >= BRANCH_AND_BOUND_TIME):
+        return "exact"
+    if not symmetric:
+        return "annealing"
+    if unlimited or (time_limit is not None and n <= GENETIC_SIZE and time_limit >= GENETIC_SECONDS * n * n):
+        return "genetic"
+    return "local_search"
+
+
+def tsp_stats(budget, solver, strategy, info):
+    """
+    所有引擎共用的统计结构。
+
+    返回：
+    - 字典：best_cost、iterations、elapsed、trace（见 `SolveBudget.stats`），solver（实际使用的引擎）、
+      strategy（调用时指定的策略，可能是 "auto"）、optimal、lower_bound、gap（有下界时为
+      (长度 - 下界) / 长度，否则为 None），以及 details（引擎自己的细节）。
+    """
+    details = dict(info)
+    optimal = bool(details.pop("optimal", False))
+    lower_bound = details.pop("lower_bound", None)
+    details.pop("gap", None)
+    best = budget.best_cost
+    gap = None
+    if lower_bound is not None:
+        gap = (best - lower_bound) / best if best > 0 else 0.0
+    return budget.stats(solver=solver, strategy=strategy, optimal=optimal, lower_bound=lower_bound, gap=gap,
+                        details=details)
@@ -0,0 +1,325 @@
+"""
+两级双向链表表示的 TSP 回路，翻转一段路径的代价与 √n 成正比，而不是与 n 成正比。
+
+`LocalSearch`（tsp_local_search.py）用 `tour`/`pos` 两个数组表示回路，一次 2-opt 翻转要改写 O(n) 个元素，
+顶点数上万之后翻转占据了大部分运行时间。这里把回路切成约 √n 段（记为 m）：
+
+- 下层：每段的顶点存放在一个 NumPy 数组里，`seg[v]`、`idx[v]` 记录顶点 v 所在的段和它在段数组中的下标；
+- 上层：段头组成一个环形双向链表，`succ[s]`、`pred[s]` 是回路方向上的后一段和前一段，
+  每段还有一个"翻转"位（为真时该段按数组的逆序走）和一个序号 `rank`（用于 `between`）。
+
+`next`、`prev`、`between` 都是 O(1)。`reverse(a, b)` 先在 a 之前、b 之后切开：把被切下的较短部分
+并入相邻的段，段数保持不变，只改写两段（与段长成正比）；然后对中间的整段只改段头——交换 succ/pred、
+切换翻转位、重排序号，如果中间的段超过一半就改为翻转其余的段（得到同一条方向相反的回路），
+所以至多处理 m/2 个段头。切分会让段变长，某段超过 4 倍初始段长时整体重建一次（O(n) 的向量化运算）。
+因此单次翻转是 O(√n)，外加偶尔的重建。
+
+常数因子上，每次翻转仍有若干次 NumPy 小数组操作的固定开销。`benchmark` 的实测（随机翻转，微秒/次）：
+n = 1000 时约 13，慢于列表切片（约 10）和 NumPy 切片（约 3）；n = 10000 时约 18，快于 `LocalSearch`
+使用的列表切片（约 95），与 NumPy 切片（约 10）相当；n = 100000 时约 32，两者分别约 1100 和 90。
+所以只在候选图上、顶点数达到 `Graph_Advanced.two_level_threshold`（10000）时才用它做第一轮 2-opt。
+稠密矩阵的 `tsp_large_graph` 面向约 1000 个顶点，在那里它没有优势，因此不使用。重新测量：
+
+    python tsp_tour.py
+"""
+import math
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+EPS = 1e-9
+
+
+class TwoLevelTour:
+    """
+    两级双向链表表示的回路。
+
+    参数：
+    - tour (sequence): 初始回路的顶点编号（0..n-1 的一个排列，不重复起点）。
+    - segment_size (int, optional): 每段的初始顶点数，默认为 √n。
+
+    属性：
+    - rebuilds (int): 因为某段过长而整体重建的次数。
+    """
+
+    def __init__(self, tour, segment_size=None):
+        tour = np.asarray(tour, dtype=np.int64)
+        self.n = len(tour)
+        # 至少两段，切分时才有相邻的段可以并入
+        self.segment_size = max(1, min(segment_size or max(8, math.isqrt(self.n)), (self.n + 1) // 2))
+        self.seg = np.empty(self.n, dtype=np.int64)
+        self.idx = np.empty(self.n, dtype=np.int64)
+        self.rebuilds = 0
+        self._build(tour)
+
+    def _build(self, tour):
+        size = self.segment_size
+        self.items = [tour[i:i + size].copy() for i in range(0, self.n, size)]
+        m = len(self.items)
+        self.rev = [False] * m
+        self.succ = [(s + 1) % m for s in range(m)]
+        self.pred = [(s - 1) % m for s in range(m)]
+        self.rank = list(range(m))
+        positions = np.arange(self.n)
+        self.seg[tour] = positions // size
+        self.idx[tour] = positions % size
+        self._max_length = 4 * size
+
+    def tour(self):
+        """按回路顺序返回全部顶点（NumPy 数组）。"""
+        s = self.rank.index(0)
+        pieces = []
+        for _ in range(len(self.items)):
+            pieces.append(self.items[s][::-1] if self.rev[s] else self.items[s])
+            s = self.succ[s]
+        return np.concatenate(pieces)
+
+    def _locate(self, v):
+        """返回 `(段, 顶点在段内按回路方向的位置, 段长)`。"""
+        s = int(self.seg[v])
+        length = len(self.items[s])
+        i = int(self.idx[v])
+        return s, (length - 1 - i if self.rev[s] else i), length
+
+    def _at(self, s, p):
+        items = self.items[s]
+        return int(items[len(items) - 1 - p] if self.rev[s] else items[p])
+
+    def next(self, v):
+        """回路上 v 的后继。"""
+        s, p, length = self._locate(v)
+        if p + 1 < length:
+            return self._at(s, p + 1)
+        return self._at(self.succ[s], 0)
+
+    def prev(self, v):
+        """回路上 v 的前驱。"""
+        s, p, _ = self._locate(v)
+        if p > 0:
+            return self._at(s, p - 1)
+        t = self.pred[s]
+        return self._at(t, len(self.items[t]) - 1)
+
+    def _key(self, v):
+        s, p, _ = self._locate(v)
+        return self.rank[s], p
+
+    def between(self, a, b, c):
+        """从 a 沿回路正向走到 c 时是否经过 b（含两端）。"""
+        ka, kb, kc = self._key(a), self._key(b), self._key(c)
+        if ka <= kc:
+            return ka <= kb <= kc
+        return kb >= ka or kb <= kc
+
+    def _ordered(self, s):
+        """段 s 的顶点按回路方向排列。"""
+        return self.items[s][::-1] if self.rev[s] else self.items[s]
+
+    def _store(self, s, ordered):
+        """把按回路方向排列的顶点写回段 s，并更新它们的 seg/idx。"""
+        items = ordered[::-1].copy() if self.rev[s] else ordered.copy()
+        self.items[s] = items
+        self.seg[items] = s
+        self.idx[items] = np.arange(len(items))
+
+    def _split(self, v, avoid=None):
+        """
+        让 v 成为所在段按回路方向的第一个顶点：把 v 之前的部分并到前一段的末尾，
+        或者把从 v 开始的部分并到后一段的开头（移动较短的一部分，但不会并入段 `avoid`）。
+        段数不变，只改写两段，耗时与段长成正比。返回变长的那一段。
+        """
+        s, p, length = self._locate(v)
+        if p == 0:
+            return s
+        ordered = self._ordered(s)
+        t, u = self.pred[s], self.succ[s]
+        if 2 * p <= length or u == avoid:
+            self._store(t, np.concatenate((self._ordered(t), ordered[:p])))
+            self._store(s, ordered[p:])
+            return t
+        self._store(u, np.concatenate((ordered[p:], self._ordered(u))))
+        self._store(s, ordered[:p])
+        return u
+
+    def _reverse_within(self, s, pa, pb):
+        """翻转段 s 内按回路方向的位置 pa..pb（pa <= pb）。"""
+        items = self.items[s]
+        if self.rev[s]:
+            length = len(items)
+            pa, pb = length - 1 - pb, length - 1 - pa
+        piece = items[pa:pb + 1][::-1].copy()
+        items[pa:pb + 1] = piece
+        self.idx[piece] = np.arange(pa, pb + 1)
+
+    def _reverse_segments(self, first, count):
+        """翻转从段 first 开始、沿回路正向的 count 个整段：改写它们的链接、翻转位和序号。"""
+        succ, pred, rev, rank, m = self.succ, self.pred, self.rev, self.rank, len(self.items)
+        run = [first]
+        for _ in range(count - 1):
+            run.append(succ[run[-1]])
+        last = run[-1]
+        before, after = pred[first], succ[last]
+        base = rank[first]
+        for i, s in enumerate(run):
+            succ[s], pred[s] = pred[s], succ[s]
+            rev[s] = not rev[s]
+            rank[s] = (base + count - 1 - i) % m
+        succ[before], pred[last] = last, before
+        succ[first], pred[after] = after, first
+
+    def reverse(self, a, b):
+        """
+        翻转从 a 沿回路正向走到 b 的一段（含两端），即把 ... p [a .. b] q ... 变成 ... p [b .. a] q ...。
+        这一段超过半条回路时改为翻转其余部分，结果是同一条回路，但走向相反。
+        """
+        if a == b:
+            return
+        after = self.next(b)
+        if after == a:
+            return  # 整条回路：翻转后仍是同一条回路
+        s, pa, _ = self._locate(a)
+        t, pb, _ = self._locate(b)
+        if s == t and pa < pb:
+            self._reverse_within(s, pa, pb)
+            return
+        grown = [self._split(a)]
+        s, pa, _ = self._locate(a)
+        t, pb, _ = self._locate(b)
+        if s == t:
+            self._reverse_within(s, pa, pb)
+        else:
+            grown.append(self._split(after, avoid=s))
+            s, t = int(self.seg[a]), int(self.seg[b])
+            m = len(self.items)
+            count = (self.rank[t] - self.rank[s]) % m + 1
+            if 2 * count > m:
+                self._reverse_segments(self.succ[t], m - count)
+            else:
+                self._reverse_segments(s, count)
+        # 切分会把顶点并入相邻的段，某段超过 4 倍初始段长时整体重建一次
+        if max(len(self.items[g]) for g in grown) > self._max_length:
+            self.rebuilds += 1
+            self._build(self.tour())
+
+
+def two_opt(tour, dist, candidates, deadline=None):
+    """
+    在 `TwoLevelTour` 上运行候选表 2-opt，直到局部最优或超过截止时间。
+    与 `LocalSearch._try_two_opt` 使用相同的候选邻居剪枝和"不用看"队列，但每次翻转是 O(√n) 而不是 O(n)。
+
+    参数：
+    - tour (TwoLevelTour): 回路，原地修改。
+    - dist: 距离矩阵，或支持 `dist[a][b]` 的隐式权重（见 tsp_candidates.py）。
+    - candidates (list): 每个顶点按距离排序的候选邻居列表。
+    - deadline (float, optional): `time.perf_counter()` 的截止时刻。
+
+    返回：
+    - `(总增益, 应用的移动数)`。
+    """
+    queue = deque(tour.tour().tolist())
+    queued = [True] * tour.n
+    total, moves, steps = 0.0, 0, 0
+    while queue:
+        steps += 1
+        if deadline is not None and not steps & 63 and perf_counter() > deadline:
+            break
+        a = queue.popleft()
+        queued[a] = False
+        row = dist[a]
+        touched = None
+        for forward in (True, False):
+            b = tour.next(a) if forward else tour.prev(a)
+            dab = row[b]
+            for c in candidates[a]:
+                g1 = dab - row[c]
+                if g1 <= EPS:
+                    break
+                d = tour.next(c) if forward else tour.prev(c)
+                if c == b or d == a:
+                    continue
+                gain = g1 + dist[c][d] - dist[b][d]
+                if gain > EPS:
+                    # 正向：a b ... c d -> a c ... b d；反向：d c ... b a -> d b ... c a
+                    if forward:
+                        tour.reverse(b, c)
+                    else:
+                        tour.reverse(c, b)
+                    total += gain
+                    moves += 1
+                    touched = (a, b, c, d)
+                    break
+            if touched:
+                break
+        if touched:
+            for v in touched:
+                if not queued[v]:
+                    queued[v] = True
+                    queue.append(v)
+    return total, moves
+
+
+def _array_reverse(tour, pos, i, j):
+    """数组表示的翻转（与 `LocalSearch._reverse_exact` 相同的列表切片翻转）。"""
+    n = len(tour)
+    if i <= j:
+        piece = tour[i:j + 1]
+        piece.reverse()
+        tour[i:j + 1] = piece
+        for k, v in enumerate(piece, i):
+            pos[v] = k
+        return
+    piece = tour[i:] + tour[:j + 1]
+    piece.reverse()
+    tour[i:], tour[:j + 1] = piece[:n - i], piece[n - i:]
+    for k, v in enumerate(piece, i):
+        pos[v] = k if k < n else k - n
+
+
+def benchmark(sizes=(1000, 10000, 100000), reversals=2000, seed=0):
+    """
+    比较三种表示下随机翻转的平均耗时（每次随机选两个顶点 a、b，翻转它们之间的一段）。
+
+    - "array"：Python 列表上的切片翻转，同时维护 pos，翻转较短的一侧（`LocalSearch` 的做法）；
+    - "numpy_slice"：NumPy 数组上位置 pos[a]..pos[b] 的切片翻转，再用一次花式索引更新 pos；
+    - "two_level"：`TwoLevelTour.reverse`。
+
+    返回：
+    - `{n: {表示: 每次翻转的微秒数}}`。
+    """
+    rng = np.random.default_rng(seed)
+    results = {}
+    for n in sizes:
+        pairs = rng.integers(n, size=(reversals, 2)).tolist()
+        timings = {}
+
+        tour, pos = list(range(n)), list(range(n))
+        began = perf_counter()
+        for a, b in pairs:
+            i, j = pos[a], pos[b]
+            if 2 * ((j - i) % n + 1) > n:
+                i, j = (j + 1) % n, (i - 1) % n
+            _array_reverse(tour, pos, i, j)
+        timings["array"] = (perf_counter() - began) / reversals * 1e6
+
+        tour, pos = np.arange(n), np.arange(n)
+        began = perf_counter()
+        for a, b in pairs:
+            i, j = sorted((int(pos[a]), int(pos[b])))
+            piece = tour[i:j + 1][::-1].copy()
+            tour[i:j + 1] = piece
+            pos[piece] = np.arange(i, j + 1)
+        timings["numpy_slice"] = (perf_counter() - began) / reversals * 1e6
+
+        two_level = TwoLevelTour(np.arange(n))
+        began = perf_counter()
+        for a, b in pairs:
+            two_level.reverse(a, b)
+        timings["two_level"] = (perf_counter() - began) / reversals * 1e6
+        results[n] = timings
+    return results
+
+
+if __name__ == "__main__":
+    for n, timings in benchmark().items():
+        print(f"n={n:>7}  " + "  ".join(f"{name} {us:9.1f} us" for name, us in timings.items()))
@@ -0,0 +1,154 @@
+"""
+Async (ASGI) version of server.py.
+
+The Flask server blocks a worker thread for the whole DeepSeek completion, so a few
+concurrent users are enough to exhaust it. Here the `/chat` handler awaits the
+completion on the event loop instead, and every request shares one AsyncOpenAI
+client, i.e. one keep-alive HTTP connection pool. A single process can keep
+hundreds of requests in flight; the pool limits below cap how many of them talk
+to DeepSeek at the same time (the rest wait for a free connection).
+
+The response contract is the same as server.py: `{'review': ..., 'status': ...}`
+with status 200, 400 (no item) or 500 (any upstream error). Reviews are cached
+the same way too (review_cache.py), and GET /cache returns the hit/miss counts.
+Identical requests in flight share one upstream call (single_flight.py), and
+GET /coalescing reports how many calls that saved.
+
+Run with:
+    uvicorn async_server:app --host 0.0.0.0 --port 8001
+or:
+    python async_server.py
+
+Pool limits (environment variables):
+    UPSTREAM_MAX_CONNECTIONS   connections open to DeepSeek at once (default 200)
+    UPSTREAM_MAX_KEEPALIVE     idle connections kept for reuse (default 50)
+    UPSTREAM_KEEPALIVE_EXPIRY  seconds an idle connection is kept (default 30)
+    UPSTREAM_TIMEOUT           seconds for one completion, including waiting
+                               for a free connection (default 60)
+"""
+import contextlib
+import os
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from review_cache import cache_key, cache_policy
+from settings import API_KEY, BASE_URL, MODEL, PROMPT_TEMPLATE, build_messages, cache
+from single_flight import AsyncSingleFlight
+
+MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "200"))
+MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "50"))
+KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "60"))
+
+# Identical requests in flight share one upstream call, see single_flight.py
+flights = AsyncSingleFlight()
+
+
+async def call_cache(method, *args):
+    # The SQLite backend does file I/O, keep it off the event loop
+    if cache.blocking:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+def create_client():
+    # One client per process: its connection pool is reused by every request
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
+    return AsyncOpenAI(base_url=BASE_URL, api_key=API_KEY, timeout=TIMEOUT, http_client=http_client)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Open the pool when the server starts and close its connections on shutdown
+    app.state.client = create_client()
+    try:
+        yield
+    finally:
+        await app.state.client.close()
+
+
+async def generate_review(request):
+    try:
+        # Get the item parameter from the request
+        item = request.query_params.get('item')
+
+        if not item:
+            return JSONResponse({
+                'review': 'No item provided',
+                'status': 400
+            }, status_code=400)
+
+        # Serve a cached review unless the request opted out with Cache-Control
+        key = cache_key(item, PROMPT_TEMPLATE, MODEL)
+        read, write = cache_policy(request.headers.get('Cache-Control'))
+        review = await call_cache(cache.get, key) if cache is not None and read else None
+        cache_status = 'HIT' if review is not None else 'MISS' if cache is not None and read else 'BYPASS'
+
+        async def fetch_review():
+            # The previous call for this key may have stored its review after our lookup missed
+            if cache is not None and read:
+                cached = await call_cache(cache.get, key, False)
+                if cached is not None:
+                    return cached, 'HIT'
+
+            # Generate response using DeepSeek without blocking the event loop
+            response = await request.app.state.client.chat.completions.create(
+                model=MODEL,
+                messages=build_messages(item)
+            )
+
+            # Extract the review from the response
+            review = response.choices[0].message.content
+            if cache is not None and write and review is not None:
+                await call_cache(cache.set, key, review)
+            return review, cache_status
+
+        if review is None:
+            # Only requests with the same Cache-Control policy share a call, and each gets the leader's X-Cache
+            review, cache_status = await flights.do((key, read, write), fetch_review)
+
+        return JSONResponse({
+            'review': review,
+            'status': 200
+        }, status_code=200, headers={'X-Cache': cache_status})
+
+    except Exception as e:
+        return JSONResponse({
+            'review': str(e),
+            'status': 500
+        }, status_code=500)
+
+
+async def cache_stats(request):
+    # Hit and miss counts of the response cache
+    if cache is None:
+        return JSONResponse({'backend': 'none'})
+    return JSONResponse(await call_cache(cache.stats))
+
+
+async def coalescing_stats(request):
+    # Upstream calls made and saved by request coalescing
+    return JSONResponse(flights.stats())
+
+
+app = Starlette(routes=[
+    Route('/chat', generate_review, methods=['GET']),
+    Route('/cache', cache_stats, methods=['GET']),
+    Route('/coalescing', coalescing_stats, methods=['GET']),
+], lifespan=lifespan)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=8001)
@@ -0,0 +1,231 @@
+"""
+Response cache for `/chat`.
+
+Popular items are requested over and over, and each request pays for a full
+DeepSeek completion. Reviews are cached under a key built from the normalized
+item (whitespace collapsed, case folded), the prompt template and the model, so
+changing either of the last two never serves stale reviews. Entries expire
+after a TTL, and the least recently used entry is evicted when the cache is full.
+
+Backends (REVIEW_CACHE_BACKEND):
+    memory   an in-process LRU dict (default); each worker has its own
+    sqlite   an on-disk SQLite file (REVIEW_CACHE_PATH) shared by every worker
+             process on the machine, e.g. gunicorn workers
+    none     no caching
+
+Other settings: REVIEW_CACHE_SIZE (entries, default 1024) and REVIEW_CACHE_TTL
+(seconds, default 3600).
+
+`get(key, count=False)` looks an entry up without touching the hit/miss counts
+(the servers use it to re-check the cache right before calling upstream).
+
+A request can opt out with the standard Cache-Control header: `no-cache` skips
+the lookup but still stores the fresh review, `no-store` skips both.
+"""
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+
+def normalize_item(item):
+    return " ".join(item.split()).casefold()
+
+
+def cache_key(item, template, model):
+    raw = json.dumps([model, template, normalize_item(item)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cache_policy(cache_control):
+    """Return (read, write) for the request's Cache-Control header."""
+    directives = {part.strip().lower() for part in (cache_control or "").split(",")}
+    if "no-store" in directives:
+        return False, False
+    return "no-cache" not in directives, True
+
+
+def _stats(backend, hits, misses, size):
+    total = hits + misses
+    return {
+        'backend': backend,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+        'size': size,
+    }
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL. Safe to share between threads."""
+
+    # get/set never block on I/O, the async server can call them on the event loop
+    blocking = False
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += count
+                return None
+            self._entries.move_to_end(key)
+            self.hits += count
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {**_stats('memory', self.hits, self.misses, len(self._entries)),
+                    'maxsize': self.maxsize, 'ttl': self.ttl}
+
+
+class SQLiteCache:
+    """
+    LRU cache with a per-entry TTL in a SQLite file. Every process that opens the
+    same file shares the entries and the hit/miss counts.
+
+    A lookup is a plain SELECT and never takes the database write lock. The
+    recency and hit/miss updates it implies are kept in memory and written in
+    one transaction with the next set(), the next stats() call, or every
+    `flush_every` lookups, so other processes see this one's counts with that
+    delay. They are also written at interpreter exit; a process that is killed
+    loses at most `flush_every` lookups.
+    """
+
+    blocking = True
+    flush_every = 64
+
+    def __init__(self, maxsize=1024, ttl=3600, path="review_cache.sqlite3"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        # Connections are opened lazily per thread, so nothing is shared across a fork
+        self._local = threading.local()
+        # Lookups not yet written to the file: key -> last use, and the hit/miss counts
+        self._used = {}
+        self._hits = 0
+        self._misses = 0
+        self._reads = 0
+        self._lock = threading.Lock()
+        with sqlite3.connect(path, timeout=30) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+        conn.close()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+        return conn
+
+    def _write_pending(self, conn):
+        # Called inside a transaction: apply the buffered lookups and drop expired entries
+        with self._lock:
+            used, hits, misses = self._used, self._hits, self._misses
+            self._used, self._hits, self._misses, self._reads = {}, 0, 0, 0
+        if used:
+            conn.executemany("UPDATE entries SET used = MAX(used, ?) WHERE key = ?",
+                             [(when, key) for key, when in used.items()])
+        if hits or misses:
+            conn.executemany("UPDATE counters SET count = count + ? WHERE name = ?",
+                             [(hits, 'hits'), (misses, 'misses')])
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+
+    def flush(self):
+        """Write the buffered lookups to the file now."""
+        conn = self._connection()
+        with conn:
+            self._write_pending(conn)
+
+    def get(self, key, count=True):
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        with self._lock:
+            if row is not None:
+                self._used[key] = now
+            if count:
+                if row is None:
+                    self._misses += 1
+                else:
+                    self._hits += 1
+            self._reads += 1
+            due = self._reads >= self.flush_every
+        if due:
+            self.flush()
+        return None if row is None else row[0]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        conn = self._connection()
+        with conn:
+            # Buffered recency first, so the eviction below sees this process's latest uses
+            self._write_pending(conn)
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, value, expires, now))
+            conn.execute("DELETE FROM entries WHERE key IN "
+                         "(SELECT key FROM entries ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.maxsize,))
+
+    def stats(self):
+        self.flush()
+        conn = self._connection()
+        counts = dict(conn.execute("SELECT name, count FROM counters"))
+        size = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {**_stats('sqlite', counts['hits'], counts['misses'], size),
+                'maxsize': self.maxsize, 'ttl': self.ttl}
+
+
+def _flush_at_exit(ref):
+    cache = ref()
+    if cache is not None:
+        cache.flush()
+
+
+CACHE_BACKENDS = {
+    "memory": MemoryCache,
+    "sqlite": SQLiteCache,
+}
+
+
+def create_cache(backend=None, maxsize=None, ttl=None, path=None):
+    """Build the cache from the arguments or the REVIEW_CACHE_* environment variables; None for 'none'."""
+    backend = backend or os.getenv("REVIEW_CACHE_BACKEND", "memory")
+    if backend == "none":
+        return None
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend {backend!r}; expected 'none' or one of {sorted(CACHE_BACKENDS)}.")
+    options = {
+        'maxsize': maxsize if maxsize is not None else int(os.getenv("REVIEW_CACHE_SIZE", "1024")),
+        'ttl': ttl if ttl is not None else float(os.getenv("REVIEW_CACHE_TTL", "3600")),
+    }
+    if backend == "sqlite":
+        options['path'] = path or os.getenv("REVIEW_CACHE_PATH", "review_cache.sqlite3")
+    return CACHE_BACKENDS[backend](**options)
@@ -1,51 +1,85 @@
 from flask import Flask, request, jsonify
 from openai import OpenAI
-import os
+
+from review_cache import cache_key, cache_policy
+from settings import API_KEY, BASE_URL, MODEL, PROMPT_TEMPLATE, build_messages, cache
+from single_flight import SingleFlight
 
 app = Flask(__name__)
 
-# Initialize OpenAI client with DeepSeek configuration
+# Initialize OpenAI client with DeepSeek configuration (see settings.py)
 client = OpenAI(
-    base_url="https://api.deepseek.com",
-    api_key=os.getenv("DEEPSEEK_API_KEY", "your-api-key-here"),  # Replace with your API key
+    base_url=BASE_URL,
+    api_key=API_KEY,
 )
 
+# Identical requests in flight share one upstream call, see single_flight.py
+flights = SingleFlight()
+
+
 @app.route('/chat', methods=['GET'])
 def generate_review():
     try:
         # Get the item parameter from the request
         item = request.args.get('item')
-        
+
         if not item:
             return jsonify({
                 'review': 'No item provided',
                 'status': 400
             }), 400
 
-        # Construct the prompt
-        prompt = f'please make a scathing review for {item}'
-        
-        # Generate response using DeepSeek
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        # Extract the review from the response
-        review = response.choices[0].message.content
-        
+        # Serve a cached review unless the request opted out with Cache-Control
+        key = cache_key(item, PROMPT_TEMPLATE, MODEL)
+        read, write = cache_policy(request.headers.get('Cache-Control'))
+        review = cache.get(key) if cache is not None and read else None
+        cache_status = 'HIT' if review is not None else 'MISS' if cache is not None and read else 'BYPASS'
+
+        def fetch_review():
+            # The previous call for this key may have stored its review after our lookup missed
+            if cache is not None and read:
+                cached = cache.get(key, count=False)
+                if cached is not None:
+                    return cached, 'HIT'
+
+            # Generate response using DeepSeek
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=build_messages(item)
+            )
+
+            # Extract the review from the response
+            review = response.choices[0].message.content
+            if cache is not None and write and review is not None:
+                cache.set(key, review)
+            return review, cache_status
+
+        if review is None:
+            # Only requests with the same Cache-Control policy share a call, and each gets the leader's X-Cache
+            review, cache_status = flights.do((key, read, write), fetch_review)
+
         return jsonify({
             'review': review,
             'status': 200
-        }), 200
-        
+        }), 200, {'X-Cache': cache_status}
+
     except Exception as e:
         return jsonify({
             'review': str(e),
             'status': 500
         }), 500
 
+@app.route('/cache', methods=['GET'])
+def cache_stats():
+    # Hit and miss counts of the response cache
+    if cache is None:
+        return jsonify({'backend': 'none'}), 200
+    return jsonify(cache.stats()), 200
+
+@app.route('/coalescing', methods=['GET'])
+def coalescing_stats():
+    # Upstream calls made and saved by request coalescing
+    return jsonify(flights.stats()), 200
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8001) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8001)
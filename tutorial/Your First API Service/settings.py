@@ -0,0 +1,26 @@
+"""
+Settings shared by the Flask server (server.py) and the async server (async_server.py).
+
+Each server builds its own DeepSeek client; importing this module only reads the
+configuration and opens the response cache, so neither server drags in the other.
+"""
+import os
+
+from review_cache import create_cache
+
+# DeepSeek configuration
+BASE_URL = "https://api.deepseek.com"
+API_KEY = os.getenv("DEEPSEEK_API_KEY", "your-api-key-here")  # Replace with your API key
+MODEL = "deepseek-chat"
+PROMPT_TEMPLATE = 'please make a scathing review for {item}'
+
+# Cached reviews, see review_cache.py (None when REVIEW_CACHE_BACKEND=none)
+cache = create_cache()
+
+
+def build_messages(item):
+    # Construct the prompt
+    prompt = PROMPT_TEMPLATE.format(item=item)
+    return [
+        {"role": "user", "content": prompt}
+    ]
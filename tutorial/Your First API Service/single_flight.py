@@ -0,0 +1,129 @@
+"""
+Request coalescing ("single flight") for `/chat`.
+
+When an item trends, many identical requests arrive before the first one has
+filled the response cache, and each would pay for its own completion. Here the
+first request for a key (the leader) makes the upstream call, and identical
+requests that arrive while it is in flight wait for the leader's result instead.
+If the call fails, every waiter gets the same error (a RuntimeError if the
+leader was interrupted, e.g. by SystemExit). Waiters give up after a
+timeout (COALESCE_TIMEOUT seconds, default 60) and raise TimeoutError; the
+leader is bounded by the upstream timeout instead.
+
+Coalescing is per process: SingleFlight for the threaded Flask server and
+AsyncSingleFlight for the async server. `stats()` reports upstream_calls (calls
+actually made), coalesced (requests served by another request's call, i.e.
+upstream calls saved), timeouts and in_flight.
+"""
+import asyncio
+import os
+import threading
+
+COALESCE_TIMEOUT = float(os.getenv("COALESCE_TIMEOUT", "60"))
+
+
+class _Metrics:
+
+    def __init__(self):
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def _stats(self, in_flight):
+        return {
+            'upstream_calls': self.upstream_calls,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts,
+            'in_flight': in_flight,
+        }
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(_Metrics):
+    """Coalesces identical calls made from different threads."""
+
+    def __init__(self):
+        super().__init__()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return self._stats(len(self._calls))
+
+    def do(self, key, func, timeout=COALESCE_TIMEOUT):
+        """Return func(), or the result of the identical call already in flight for key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.upstream_calls += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = func()
+                return call.result
+            except BaseException as e:
+                # Record anything that ends the call, or the waiters would return None as if it succeeded
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError('Timed out waiting for an identical request in flight')
+        if isinstance(call.error, Exception):
+            raise call.error
+        if call.error is not None:
+            raise RuntimeError('The identical request in flight was interrupted') from call.error
+        return call.result
+
+
+class AsyncSingleFlight(_Metrics):
+    """Coalesces identical calls made from coroutines on one event loop."""
+
+    def __init__(self):
+        super().__init__()
+        self._tasks = {}
+
+    def stats(self):
+        return self._stats(len(self._tasks))
+
+    def _finished(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the error as retrieved even if every waiter has already timed out
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, func, timeout=COALESCE_TIMEOUT):
+        """Return await func(), or the result of the identical call already in flight for key."""
+        task = self._tasks.get(key)
+        leader = task is None
+        if leader:
+            # The call runs as its own task, so a client that disconnects does not cancel it for the others
+            task = self._tasks[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.upstream_calls += 1
+            return await asyncio.shield(task)
+
+        self.coalesced += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise TimeoutError('Timed out waiting for an identical request in flight') from None
@@ -0,0 +1,119 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+import async_server
+import server
+from review_cache import MemoryCache
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def completion(review):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=review))])
+
+
+class FakeClient:
+    """Stands in for OpenAI (sync) or AsyncOpenAI: returns `review`, or raises `error`."""
+
+    def __init__(self, review='scathing', error=None, asynchronous=False):
+        self.review, self.error = review, error
+        self.calls = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(
+            create=self.async_create if asynchronous else self.create))
+
+    def create(self, model, messages):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return completion(self.review)
+
+    async def async_create(self, model, messages):
+        return self.create(model, messages)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncServer(unittest.TestCase):
+    """Every response of async_server must match the one server.py gives for the same request."""
+
+    def setUp(self):
+        # Fresh caches and flights, and one fake client per server
+        self.sync_client = FakeClient()
+        self.async_client = FakeClient(asynchronous=True)
+        patches = [
+            mock.patch.object(server, 'client', self.sync_client),
+            mock.patch.object(server, 'cache', MemoryCache()),
+            mock.patch.object(server, 'flights', SingleFlight()),
+            mock.patch.object(async_server, 'create_client', lambda: self.async_client),
+            mock.patch.object(async_server, 'cache', MemoryCache()),
+            mock.patch.object(async_server, 'flights', AsyncSingleFlight()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.flask = server.app.test_client()
+        self.starlette = TestClient(async_server.app)
+        self.starlette.__enter__()
+        self.addCleanup(self.starlette.__exit__, None, None, None)
+
+    def get_both(self, url, headers=None):
+        expected = self.flask.get(url, headers=headers)
+        response = self.starlette.get(url, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.get_json())
+        self.assertEqual(response.headers.get('X-Cache'), expected.headers.get('X-Cache'))
+        return response
+
+    def test_review(self):
+        response = self.get_both('/chat?item=tea')
+        self.assertEqual(response.json(), {'review': 'scathing', 'status': 200})
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+
+        self.assertEqual(self.get_both('/chat?item=tea').headers['X-Cache'], 'HIT')
+        self.assertEqual(self.get_both('/chat?item=tea', {'Cache-Control': 'no-cache'}).headers['X-Cache'], 'BYPASS')
+        self.assertEqual(self.async_client.calls, 2)
+
+    def test_no_item(self):
+        response = self.get_both('/chat')
+        self.assertEqual(response.json(), {'review': 'No item provided', 'status': 400})
+        self.assertEqual(self.async_client.calls, 0)
+
+    def test_upstream_error(self):
+        self.sync_client.error = self.async_client.error = RuntimeError('upstream failed')
+        response = self.get_both('/chat?item=tea')
+        self.assertEqual(response.json(), {'review': 'upstream failed', 'status': 500})
+        self.assertNotIn('X-Cache', response.headers)
+
+    def test_cache_stats(self):
+        self.get_both('/chat?item=tea')
+        self.get_both('/chat?item=tea')
+        response = self.get_both('/cache')
+        self.assertEqual((response.json()['hits'], response.json()['misses']), (1, 1))
+        with mock.patch.object(server, 'cache', None), mock.patch.object(async_server, 'cache', None):
+            self.assertEqual(self.get_both('/cache').json(), {'backend': 'none'})
+
+    def test_lifespan(self):
+        # The client pool is opened on startup, shared by every request and closed on shutdown
+        self.assertIs(async_server.app.state.client, self.async_client)
+        self.assertFalse(self.async_client.closed)
+        self.starlette.__exit__(None, None, None)
+        self.assertTrue(self.async_client.closed)
+
+
+class TestCreateClient(unittest.TestCase):
+
+    def test_pool_limits(self):
+        with mock.patch.object(async_server, 'MAX_CONNECTIONS', 7), \
+                mock.patch.object(async_server, 'MAX_KEEPALIVE', 3):
+            client = async_server.create_client()
+        pool = client._client._transport._pool
+        self.assertEqual((pool._max_connections, pool._max_keepalive_connections), (7, 3))
+        self.assertEqual(client.timeout, async_server.TIMEOUT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+from review_cache import MemoryCache, SQLiteCache, cache_key, cache_policy, create_cache
+
+
+class CacheBehaviour:
+    """Tests shared by both backends; subclasses provide make_cache(maxsize)."""
+
+    def test_hit_and_miss(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 'review')
+        self.assertEqual(cache.get('a'), 'review')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+        # A lookup with count=False leaves the counts alone
+        cache.get('a', count=False)
+        cache.get('b', count=False)
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (1, 1))
+
+    def test_ttl_expiry(self):
+        cache = self.make_cache()
+        cache.set('old', 'review', ttl=0)
+        cache.set('new', 'review', ttl=60)
+        self.assertIsNone(cache.get('old'))
+        self.assertEqual(cache.get('new'), 'review')
+        self.assertEqual(cache.stats()['size'], 1)
+
+    def test_lru_eviction(self):
+        cache = self.make_cache(maxsize=2)
+        cache.set('a', 'review a')
+        cache.set('b', 'review b')
+        # Reading 'a' makes 'b' the least recently used entry
+        self.assertEqual(cache.get('a'), 'review a')
+        cache.set('c', 'review c')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'review a')
+        self.assertEqual(cache.get('c'), 'review c')
+        self.assertEqual(cache.stats()['size'], 2)
+
+
+class TestMemoryCache(CacheBehaviour, unittest.TestCase):
+
+    def make_cache(self, maxsize=16):
+        return MemoryCache(maxsize=maxsize)
+
+
+class TestSQLiteCache(CacheBehaviour, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_cache(self, maxsize=16):
+        return SQLiteCache(maxsize=maxsize, path=self.path)
+
+    def test_shared_between_instances(self):
+        # Two instances on one file stand in for two worker processes
+        first, second = self.make_cache(), self.make_cache()
+        first.set('a', 'review')
+        self.assertEqual(second.get('a'), 'review')
+        self.assertIsNone(second.get('b'))
+
+        # Lookups are buffered until a flush, then both instances report the same counts
+        self.assertEqual(first.stats()['hits'], 0)
+        second.flush()
+        self.assertEqual(first.stats(), second.stats())
+        self.assertEqual((first.stats()['hits'], first.stats()['misses']), (1, 1))
+
+    def test_flush_every(self):
+        first, second = self.make_cache(), self.make_cache()
+        second.flush_every = 3
+        for _ in range(3):
+            second.get('missing')
+        self.assertEqual(first.stats()['misses'], 3)
+
+
+class TestCacheHelpers(unittest.TestCase):
+
+    def test_cache_key(self):
+        key = cache_key('Green  Tea', 'review {item}', 'deepseek-chat')
+        self.assertEqual(key, cache_key(' green tea ', 'review {item}', 'deepseek-chat'))
+        self.assertNotEqual(key, cache_key('green tea', 'praise {item}', 'deepseek-chat'))
+        self.assertNotEqual(key, cache_key('green tea', 'review {item}', 'deepseek-reasoner'))
+
+    def test_cache_policy(self):
+        self.assertEqual(cache_policy(None), (True, True))
+        self.assertEqual(cache_policy('max-age=0'), (True, True))
+        self.assertEqual(cache_policy('No-Cache'), (False, True))
+        self.assertEqual(cache_policy('max-age=0, no-store'), (False, False))
+        self.assertEqual(cache_policy('no-cache, no-store'), (False, False))
+
+    def test_create_cache(self):
+        self.assertIsNone(create_cache('none'))
+        cache = create_cache('memory', maxsize=3, ttl=5)
+        self.assertIsInstance(cache, MemoryCache)
+        self.assertEqual((cache.maxsize, cache.ttl), (3, 5))
+        with tempfile.TemporaryDirectory() as directory:
+            cache = create_cache('sqlite', path=os.path.join(directory, 'cache.sqlite3'))
+            self.assertIsInstance(cache, SQLiteCache)
+        with self.assertRaises(ValueError):
+            create_cache('redis')
+
+
+if __name__ == '__main__':
+    unittest.main()
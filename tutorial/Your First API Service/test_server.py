@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import server
+from review_cache import MemoryCache
+from single_flight import SingleFlight
+
+
+class FakeClient:
+    """Stands in for OpenAI: each completion blocks until release is set."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.calls = 0
+        self.release = threading.Event()
+
+    def create(self, model, messages):
+        self.calls += 1
+        call = self.calls
+        self.release.wait(5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f'review {call}'))])
+
+
+class TestConcurrentRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeClient()
+        self.flights = SingleFlight()
+        for name, value in [('client', self.client), ('cache', MemoryCache()), ('flights', self.flights)]:
+            patcher = mock.patch.object(server, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_all(self, headers, wait_for):
+        # Send one request per entry of headers at the same time; release the upstream once wait_for() holds
+        responses = [None] * len(headers)
+
+        def get(i):
+            responses[i] = server.app.test_client().get('/chat?item=tea', headers=headers[i])
+
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(len(headers))]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        deadline = time.monotonic() + 2
+        while not wait_for() and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.client.release.set()
+        for thread in threads:
+            thread.join()
+        return [(r.get_json()['review'], r.headers['X-Cache']) for r in responses]
+
+    def test_coalesced_requests_share_x_cache(self):
+        results = self.get_all([{}, {}, {}], lambda: self.flights.coalesced == 2)
+        self.assertEqual(results, [('review 1', 'MISS')] * 3)
+        self.assertEqual(self.client.calls, 1)
+
+    def test_no_cache_request_is_not_coalesced(self):
+        # A no-cache request arriving while a normal one is in flight makes its own call
+        results = self.get_all([{}, {'Cache-Control': 'no-cache'}], lambda: self.client.calls == 2)
+        self.assertEqual(results, [('review 1', 'MISS'), ('review 2', 'BYPASS')])
+        self.assertEqual(self.flights.stats()['coalesced'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.started, self.release = threading.Event(), threading.Event()
+        self.calls = 0
+
+    def run_waiters(self, flights, key, func, count, **kwargs):
+        # Start the leader, then `count` identical calls while it is still running
+        results = []
+
+        def call():
+            try:
+                results.append(flights.do(key, func, **kwargs))
+            except BaseException as e:
+                results.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        self.started.wait()
+        waiters = [threading.Thread(target=call) for _ in range(count)]
+        for waiter in waiters:
+            waiter.start()
+        while flights.coalesced < count:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in [leader] + waiters:
+            thread.join()
+        return results
+
+    def fake_func(self, result=None, error=None):
+        def func():
+            self.calls += 1
+            self.started.set()
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return result
+        return func
+
+    def test_coalescing(self):
+        flights = SingleFlight()
+        results = self.run_waiters(flights, 'tea', self.fake_func('scathing'), 4)
+        self.assertEqual(results, ['scathing'] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(flights.stats(), {'upstream_calls': 1, 'coalesced': 4, 'timeouts': 0, 'in_flight': 0})
+
+        # Once the call is done, the next request for the key makes a new one
+        self.assertEqual(flights.do('tea', lambda: 'again'), 'again')
+        self.assertEqual(flights.stats()['upstream_calls'], 2)
+
+    def test_error_propagation(self):
+        flights = SingleFlight()
+        error = ValueError('upstream failed')
+        results = self.run_waiters(flights, 'tea', self.fake_func(error=error), 3)
+        self.assertEqual(results, [error] * 4)
+
+        # A leader interrupted by a BaseException never hands its waiters a None review
+        self.started.clear()
+        self.release.clear()
+        results = self.run_waiters(flights, 'tea', self.fake_func(error=KeyboardInterrupt()), 2)
+        self.assertIsInstance(results[0], KeyboardInterrupt)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results[1:]))
+        self.assertEqual(flights.stats()['in_flight'], 0)
+
+    def test_waiter_timeout(self):
+        flights = SingleFlight()
+        func = self.fake_func('scathing')
+        leader = threading.Thread(target=flights.do, args=('tea', func))
+        leader.start()
+        self.started.wait()
+        with self.assertRaises(TimeoutError):
+            flights.do('tea', func, timeout=0.01)
+        self.release.set()
+        leader.join()
+        self.assertEqual(flights.stats(), {'upstream_calls': 1, 'coalesced': 1, 'timeouts': 1, 'in_flight': 0})
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    def fake_func(self, result=None, error=None, delay=0.05):
+        async def func():
+            self.calls += 1
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            return result
+        return func
+
+    def gather(self, flights, key, func, count, **kwargs):
+        async def run():
+            return await asyncio.gather(*(flights.do(key, func, **kwargs) for _ in range(count)),
+                                        return_exceptions=True)
+        return asyncio.run(run())
+
+    def test_coalescing(self):
+        flights = AsyncSingleFlight()
+        self.assertEqual(self.gather(flights, 'tea', self.fake_func('scathing'), 5), ['scathing'] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(flights.stats(), {'upstream_calls': 1, 'coalesced': 4, 'timeouts': 0, 'in_flight': 0})
+
+    def test_error_propagation(self):
+        flights = AsyncSingleFlight()
+        error = ValueError('upstream failed')
+        self.assertEqual(self.gather(flights, 'tea', self.fake_func(error=error), 3), [error] * 3)
+        self.assertEqual(self.calls, 1)
+
+    def test_waiter_timeout(self):
+        flights = AsyncSingleFlight()
+        func = self.fake_func('scathing', delay=0.2)
+
+        async def run():
+            leader = asyncio.ensure_future(flights.do('tea', func))
+            await asyncio.sleep(0)
+            with self.assertRaises(TimeoutError):
+                await flights.do('tea', func, timeout=0.01)
+            # The waiter giving up does not cancel the call the leader is waiting for
+            return await leader
+
+        self.assertEqual(asyncio.run(run()), 'scathing')
+        self.assertEqual(flights.stats(), {'upstream_calls': 1, 'coalesced': 1, 'timeouts': 1, 'in_flight': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()